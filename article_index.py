@@ -0,0 +1,444 @@
+import os
+import re
+import hashlib
+import sqlite3
+import threading
+import time
+import zlib
+import numpy as np
+from instrumentation import timed, increment
+
+# Default location of the on-disk article index
+DEFAULT_INDEX_PATH = os.path.join('.cache', 'article_index.sqlite')
+
+# MinHash signature of a content:- NUM_PERMUTATIONS hash functions over word shingles of SHINGLE_SIZE words,
+# drawn from a fixed seed so signatures are comparable across runs and processes
+NUM_PERMUTATIONS = 64
+SHINGLE_SIZE = 3
+MINHASH_SEED = 20240101
+
+# Prime modulus of the MinHash functions(above every 32-bit shingle hash)
+MINHASH_PRIME = 4294967311
+
+# Locality-sensitive hashing:- the signature is split into LSH_BANDS bands of NUM_PERMUTATIONS / LSH_BANDS rows,
+# contents sharing any band are compared(pairs above ~0.5 similarity nearly always share one)
+LSH_BANDS = 16
+
+# Estimated Jaccard similarity above which a content is a near-duplicate of an indexed story
+DEFAULT_SIMILARITY_THRESHOLD = 0.8
+
+# Titles shorter than this(in words) are too generic('Market update') to match stories by
+MIN_TITLE_WORDS = 4
+
+# Maximum number of cleaned texts kept on disk, least recently used are evicted first
+DEFAULT_MAX_CLEANED_CONTENTS = 200000
+
+# Maximum number of stories kept on disk, oldest are evicted first(with their contents, buckets and titles)
+DEFAULT_MAX_STORIES = 100000
+
+# Number of keys looked up per SQLite statement(below SQLite's bound parameter limit)
+INDEX_BATCH_SIZE = 500
+
+WORD_PATTERN = re.compile(r'[a-z0-9]+')
+
+# Random coefficients of the MinHash functions(a * x + b mod MINHASH_PRIME), a * x stays below 2^63
+_minhash_rng = np.random.default_rng(MINHASH_SEED)
+MINHASH_A = _minhash_rng.integers(1, 2 ** 31, NUM_PERMUTATIONS, dtype=np.uint64)
+MINHASH_B = _minhash_rng.integers(0, 2 ** 31, NUM_PERMUTATIONS, dtype=np.uint64)
+
+def normalize_words(text):
+    """
+    @Args:- text:- str object
+    @Description:-
+                This method lowercases the text and keeps its words(letters and digits), so copies differing
+                only in case, punctuation or whitespace normalize to the same words
+    @Returns:- list object of str objects
+    """
+    return WORD_PATTERN.findall(str(text).lower()) if isinstance(text, str) else []
+
+def get_content_key(text):
+    """
+    @Args:- text:- str object containing an article text
+    @Description:-
+                This method hashes the text exactly as it is, so only identical texts share a key(and the
+                work done on it, like the cleaned text)
+    @Returns:- content_key:- str object(hex digest)
+    """
+    return hashlib.sha256((text if isinstance(text, str) else '').encode('utf-8')).hexdigest()
+
+def get_title_key(title, day):
+    """
+    @Args:- title:- str object containing an article title,
+            day:- str object containing the publication day('YYYY-MM-DD')
+    @Description:-
+                This method hashes the normalized title together with the publication day
+    @Returns:- title_key:- str object(hex digest) or None for titles shorter than MIN_TITLE_WORDS words
+    """
+    words = normalize_words(title)
+    if len(words) < MIN_TITLE_WORDS:
+        return None
+
+    return hashlib.sha256(f"{day}\0{' '.join(words)}".encode('utf-8')).hexdigest()
+
+def compute_minhash(text):
+    """
+    @Args:- text:- str object containing an article text
+    @Description:-
+                This method computes the MinHash signature of the word shingles of the text
+    @Returns:- signature:- uint64 numpy array of NUM_PERMUTATIONS values or None for a text without words
+    """
+    words = normalize_words(text)
+    if not words:
+        return None
+
+    size = min(SHINGLE_SIZE, len(words))
+    shingles = {' '.join(words[i:i + size]) for i in range(len(words) - size + 1)}
+    hashes = np.fromiter((zlib.crc32(shingle.encode('utf-8')) for shingle in shingles), dtype=np.uint64,
+                         count=len(shingles))
+
+    return ((np.outer(hashes, MINHASH_A) + MINHASH_B) % MINHASH_PRIME).min(axis=0)
+
+def get_lsh_buckets(signature):
+    """
+    @Args:- signature:- uint64 numpy array returned by compute_minhash
+    @Description:-
+                This method hashes every band of the signature(with its band number) into a bucket
+    @Returns:- list object of LSH_BANDS int objects(signed 64-bit, as stored by SQLite)
+    """
+    bands = signature.reshape(LSH_BANDS, -1)
+
+    return [int.from_bytes(hashlib.blake2b(band.tobytes(), digest_size=8, salt=bytes([number])).digest(),
+                           'little', signed=True)
+            for number, band in enumerate(bands)]
+
+def estimate_similarity(signature, other_signature):
+    """
+    @Args:- signature, other_signature:- uint64 numpy arrays returned by compute_minhash
+    @Description:-
+                This method estimates the Jaccard similarity of two shingle sets from their signatures
+    @Returns:- float object between 0 and 1
+    """
+    return float(np.mean(signature == other_signature))
+
+class ArticleIndex:
+    """
+    On-disk index of article contents.
+
+    It stores the cleaned text of every distinct content, shared by identical contents only, so it
+    never depends on which copy of a story was seen first. On request(resolve), contents are also
+    mapped to the story they were first seen as:- a content whose MinHash signature shows a
+    near-duplicate of a story(found through its LSH buckets, or through its title and publication
+    day) joins that story, which reports how often the same story comes back. Both parts are
+    bounded:- see evict.
+    """
+
+    def __init__(self, path=DEFAULT_INDEX_PATH, similarity_threshold=DEFAULT_SIMILARITY_THRESHOLD,
+                 max_cleaned_contents=DEFAULT_MAX_CLEANED_CONTENTS, max_stories=DEFAULT_MAX_STORIES):
+        """
+        @Args:- path:- str object containing the SQLite file path,
+                similarity_threshold:- float object containing the estimated Jaccard similarity above
+                                       which contents are merged,
+                max_cleaned_contents:- int object containing the maximum number of cleaned texts(None is unbounded),
+                max_stories:- int object containing the maximum number of stories(None is unbounded)
+        @Description:-
+                    This method opens(or creates) the index database
+        @Returns:-
+        """
+        self.path = path
+        self.similarity_threshold = similarity_threshold
+        self.max_cleaned_contents = max_cleaned_contents
+        self.max_stories = max_stories
+
+        self.evictions = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # The connection is shared between sessions, every access goes through the lock
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.executescript("""
+            CREATE TABLE IF NOT EXISTS contents (
+                content_key TEXT PRIMARY KEY,
+                story_key TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS contents_story ON contents (story_key);
+            CREATE TABLE IF NOT EXISTS stories (
+                story_key TEXT PRIMARY KEY,
+                signature BLOB
+            );
+            CREATE TABLE IF NOT EXISTS story_buckets (
+                bucket INTEGER NOT NULL,
+                story_key TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS story_buckets_bucket ON story_buckets (bucket);
+            CREATE INDEX IF NOT EXISTS story_buckets_story ON story_buckets (story_key);
+            CREATE TABLE IF NOT EXISTS story_titles (
+                title_key TEXT PRIMARY KEY,
+                story_key TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS cleaned_contents (
+                content_key TEXT PRIMARY KEY,
+                cleaned TEXT NOT NULL
+            );
+        """)
+
+        # Indexes created before eviction lack the timestamps(their rows count as the oldest)
+        for table, column in (('stories', 'created_at'), ('cleaned_contents', 'last_access')):
+            columns = {row[1] for row in self._connection.execute(f"PRAGMA table_info({table})")}
+            if column not in columns:
+                self._connection.execute(f"ALTER TABLE {table} ADD COLUMN {column} REAL NOT NULL DEFAULT 0")
+        self._connection.commit()
+
+    def _select_in(self, query, keys):
+        # Runs query(with one '{}' placeholder for the IN list) over the keys in batches
+        rows = []
+        for start in range(0, len(keys), INDEX_BATCH_SIZE):
+            batch = keys[start:start + INDEX_BATCH_SIZE]
+            rows.extend(self._connection.execute(query.format(','.join('?' * len(batch))), batch).fetchall())
+        return rows
+
+    @timed(name='resolve_stories')
+    def resolve(self, texts, titles=None, days=None):
+        """
+        @Args:- texts:- list object of str objects containing article texts,
+                titles:- list object of str objects containing the article titles(None skips title matching),
+                days:- list object of str objects containing the publication days('YYYY-MM-DD')
+        @Description:-
+                    This method maps every text to its story, indexing the contents never seen before:- a new
+                    content joins the first candidate story(same title and day, or sharing an LSH bucket) whose
+                    estimated similarity reaches similarity_threshold, otherwise it starts a story of its own.
+                    A title match alone never merges contents.
+        @Returns:- story_keys:- list object of str objects(one per text, equal for copies of a story)
+        """
+        content_keys = [get_content_key(text) for text in texts]
+        titles = titles if titles is not None else [None] * len(texts)
+        days = days if days is not None else [None] * len(texts)
+
+        # Distinct contents with the title and day of their first copy
+        firsts = {}
+        for content_key, text, title, day in zip(content_keys, texts, titles, days):
+            if content_key not in firsts:
+                firsts[content_key] = (text, title, day)
+
+        with self._lock:
+            stories = dict(self._select_in(
+                "SELECT content_key, story_key FROM contents WHERE content_key IN ({})", list(firsts)))
+
+            new_contents = [content_key for content_key in firsts if content_key not in stories]
+            if new_contents:
+                stories.update(self._index_contents({content_key: firsts[content_key]
+                                                     for content_key in new_contents}))
+
+        if new_contents:
+            self.evict()
+
+        increment('articles_indexed', len(new_contents))
+        increment('duplicate_articles', len(texts) - len(set(stories[key] for key in content_keys)))
+
+        return [stories[content_key] for content_key in content_keys]
+
+    def _index_contents(self, new_contents):
+        # Signatures, buckets and title keys of the new contents
+        entries = {}
+        for content_key, (text, title, day) in new_contents.items():
+            signature = compute_minhash(text)
+            buckets = get_lsh_buckets(signature) if signature is not None else []
+            title_key = get_title_key(title, day) if title is not None and day is not None else None
+            entries[content_key] = (signature, buckets, title_key)
+
+        # Candidate stories already indexed, fetched in batches
+        all_buckets = list({bucket for _, buckets, _ in entries.values() for bucket in buckets})
+        bucket_stories = {}
+        for bucket, story_key in self._select_in(
+                "SELECT bucket, story_key FROM story_buckets WHERE bucket IN ({})", all_buckets):
+            bucket_stories.setdefault(bucket, []).append(story_key)
+
+        title_keys = list({title_key for _, _, title_key in entries.values() if title_key is not None})
+        title_stories = dict(self._select_in(
+            "SELECT title_key, story_key FROM story_titles WHERE title_key IN ({})", title_keys))
+
+        candidate_keys = list({story_key for keys in bucket_stories.values() for story_key in keys} |
+                              set(title_stories.values()))
+        signatures = {story_key: None if blob is None else np.frombuffer(blob, dtype=np.uint64)
+                      for story_key, blob in self._select_in(
+                          "SELECT story_key, signature FROM stories WHERE story_key IN ({})", candidate_keys)}
+
+        # The new contents are matched in order, so copies within the batch join the first one's story
+        resolved = {}
+        new_stories = []
+        for content_key, (signature, buckets, title_key) in entries.items():
+            story_key = None
+
+            # Candidates in order:- the story of the same title and day, then the stories of each LSH bucket
+            if signature is not None:
+                candidates = [title_stories[title_key]] if title_key in title_stories else []
+                candidates.extend(candidate for bucket in buckets for candidate in bucket_stories.get(bucket, ()))
+
+                for candidate in candidates:
+                    if (signatures.get(candidate) is not None and
+                            estimate_similarity(signature, signatures[candidate]) >= self.similarity_threshold):
+                        story_key = candidate
+                        break
+
+            if story_key is None:
+                story_key = content_key
+                new_stories.append((story_key, None if signature is None else signature.tobytes()))
+                signatures[story_key] = signature
+                for bucket in buckets:
+                    bucket_stories.setdefault(bucket, []).append(story_key)
+                if title_key is not None:
+                    title_stories.setdefault(title_key, story_key)
+            else:
+                increment('near_duplicate_articles')
+
+            resolved[content_key] = story_key
+
+        self._connection.executemany("INSERT OR IGNORE INTO contents VALUES (?, ?)", resolved.items())
+        now = time.time()
+        self._connection.executemany(
+            "INSERT OR IGNORE INTO stories (story_key, signature, created_at) VALUES (?, ?, ?)",
+            [(story_key, signature, now) for story_key, signature in new_stories])
+        self._connection.executemany(
+            "INSERT INTO story_buckets VALUES (?, ?)",
+            [(bucket, story_key) for story_key, _ in new_stories for bucket in entries[story_key][1]])
+        self._connection.executemany(
+            "INSERT OR IGNORE INTO story_titles VALUES (?, ?)",
+            [(entries[story_key][2], story_key) for story_key, _ in new_stories if entries[story_key][2] is not None])
+        self._connection.commit()
+
+        return resolved
+
+    def get_cleaned_texts(self, content_keys):
+        """
+        @Args:- content_keys:- list object of str objects returned by get_content_key
+        @Description:-
+                    This method looks up the cleaned texts stored for the contents
+        @Returns:- cleaned_texts:- dict object mapping each content already cleaned to its cleaned text
+        """
+        with self._lock:
+            cleaned_texts = dict(self._select_in(
+                "SELECT content_key, cleaned FROM cleaned_contents WHERE content_key IN ({})", list(content_keys)))
+
+            if cleaned_texts:
+                now = time.time()
+                self._connection.executemany("UPDATE cleaned_contents SET last_access = ? WHERE content_key = ?",
+                                             [(now, content_key) for content_key in cleaned_texts])
+                self._connection.commit()
+
+        return cleaned_texts
+
+    def put_cleaned_texts(self, cleaned_texts):
+        """
+        @Args:- cleaned_texts:- dict object mapping content keys to their cleaned text
+        @Description:-
+                    This method stores the cleaned texts in one transaction
+        @Returns:-
+        """
+        now = time.time()
+
+        with self._lock:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO cleaned_contents (content_key, cleaned, last_access) VALUES (?, ?, ?)",
+                [(content_key, cleaned, now) for content_key, cleaned in cleaned_texts.items()])
+            self._connection.commit()
+
+    def evict(self):
+        """
+        @Args:- None
+        @Description:-
+                    This method removes the least recently used cleaned texts above max_cleaned_contents and
+                    the oldest stories above max_stories, with the contents, buckets and titles of those stories
+        @Returns:- removed:- int object containing the number of evicted cleaned texts and stories
+        """
+        removed = 0
+
+        with self._lock:
+            if self.max_cleaned_contents is not None:
+                cursor = self._connection.execute("""
+                    DELETE FROM cleaned_contents WHERE rowid IN (
+                        SELECT rowid FROM cleaned_contents ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                    )
+                """, (self.max_cleaned_contents,))
+                removed += cursor.rowcount
+
+            if self.max_stories is not None:
+                cursor = self._connection.execute("""
+                    DELETE FROM stories WHERE rowid IN (
+                        SELECT rowid FROM stories ORDER BY created_at DESC LIMIT -1 OFFSET ?
+                    )
+                """, (self.max_stories,))
+                removed += cursor.rowcount
+
+                # A content of an evicted story is indexed again(as a new story) when it comes back
+                if cursor.rowcount:
+                    for table in ('contents', 'story_buckets', 'story_titles'):
+                        self._connection.execute(
+                            f"DELETE FROM {table} WHERE story_key NOT IN (SELECT story_key FROM stories)")
+
+            self._connection.commit()
+            self.evictions += removed
+
+        return removed
+
+    def clear(self):
+        """
+        @Args:- None
+        @Description:-
+                    This method deletes the whole index
+        @Returns:-
+        """
+        with self._lock:
+            for table in ('contents', 'stories', 'story_buckets', 'story_titles', 'cleaned_contents'):
+                self._connection.execute(f"DELETE FROM {table}")
+            self._connection.commit()
+
+    def stats(self):
+        """
+        @Args:- None
+        @Description:-
+                    This method reports the index size
+        @Returns:- stats:- dict object containing contents, stories, cleaned_contents and evictions
+        """
+        with self._lock:
+            contents = self._connection.execute("SELECT COUNT(*) FROM contents").fetchone()[0]
+            stories = self._connection.execute("SELECT COUNT(*) FROM stories").fetchone()[0]
+            cleaned = self._connection.execute("SELECT COUNT(*) FROM cleaned_contents").fetchone()[0]
+
+        return {'contents': contents, 'stories': stories, 'cleaned_contents': cleaned, 'evictions': self.evictions}
+
+# Shared index instance (created lazily on first use)
+_article_index = None
+_article_index_lock = threading.Lock()
+
+def get_article_index():
+    """
+    @Args:- None
+    @Description:-
+                This method returns the process-wide ArticleIndex instance
+    @Returns:- article_index:- ArticleIndex object
+    """
+    global _article_index
+
+    if _article_index is None:
+        with _article_index_lock:
+            if _article_index is None:
+                _article_index = ArticleIndex()
+
+    return _article_index
+
+def resolve_news_frame_stories(news_frame, texts=None):
+    """
+    @Args:- news_frame:- dataframe object containing the news frame(see news_frame.NEWS_COLUMNS),
+            texts:- list object of str objects containing the text of each article(defaults to the contents)
+    @Description:-
+                This method maps every article of the news frame to its story in the shared index(on request
+                only:- cleaning and scoring don't need the stories)
+    @Returns:- story_keys:- list object of str objects(one per article)
+    """
+    if texts is None:
+        texts = news_frame['content'].tolist()
+
+    return get_article_index().resolve(texts, news_frame['title'].tolist(),
+                                       news_frame['date'].dt.strftime('%Y-%m-%d').tolist())
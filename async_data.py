@@ -0,0 +1,219 @@
+import asyncio
+import os
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+import aiohttp
+from instrumentation import increment, propagate, propagate_async
+
+# Connections kept open per host(shared by every session of the server)
+DEFAULT_LIMIT_PER_HOST = 16
+
+# Timeouts(seconds) of one HTTP attempt:- whole request and connection establishment
+DEFAULT_TOTAL_TIMEOUT = 30
+DEFAULT_CONNECT_TIMEOUT = 10
+
+# Retries of a request answered with RETRY_STATUS_CODES or failing with a connection error/timeout
+DEFAULT_MAX_RETRIES = 4
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+# Exponential backoff(seconds) between retries, each delay being drawn uniformly from [0, base * 2^attempt]
+DEFAULT_BACKOFF_BASE = 0.5
+DEFAULT_BACKOFF_CAP = 20
+
+# Threads running the calls of libraries without an async API(yfinance), shared by every session
+DEFAULT_BLOCKING_WORKERS = 8
+
+class AsyncDataClient:
+    """
+    Data access on the shared background event loop.
+
+    HTTP requests go through one aiohttp session(per-host connection limits, timeouts and retries with
+    jittered exponential backoff). Blocking library calls run on a small shared thread pool. Concurrent
+    identical requests, e.g. several sessions asking for the same ticker and window, are coalesced:- they
+    all await the one request in flight. Every coroutine must run on the client's event loop.
+    """
+
+    def __init__(self, limit_per_host=DEFAULT_LIMIT_PER_HOST, total_timeout=DEFAULT_TOTAL_TIMEOUT,
+                 connect_timeout=DEFAULT_CONNECT_TIMEOUT, max_retries=DEFAULT_MAX_RETRIES,
+                 backoff_base=DEFAULT_BACKOFF_BASE, backoff_cap=DEFAULT_BACKOFF_CAP,
+                 blocking_workers=DEFAULT_BLOCKING_WORKERS):
+        self.limit_per_host = limit_per_host
+        self.timeout = aiohttp.ClientTimeout(total=total_timeout, sock_connect=connect_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+
+        self._session = None
+        self._in_flight = {}
+        self._executor = ThreadPoolExecutor(max_workers=blocking_workers, thread_name_prefix='blocking-data')
+
+    def _get_session(self):
+        # Created on first use, inside the running loop the session is bound to
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=0, limit_per_host=self.limit_per_host), timeout=self.timeout)
+        return self._session
+
+    async def coalesce(self, key, factory):
+        """
+        @Args:- key:- hashable object identifying the request,
+                factory:- callable object returning the coroutine that performs the request
+        @Description:-
+                    This method starts the request unless an identical one is already in flight, and awaits it.
+                    A caller being cancelled doesn't cancel the request the other callers share.
+        @Returns:- result of the request
+        """
+        task = self._in_flight.get(key)
+
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        else:
+            increment('requests_coalesced')
+
+        return await asyncio.shield(task)
+
+    def _backoff(self, attempt, retry_after=None):
+        delay = random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+
+        # Never retry earlier than a numeric Retry-After header asks for(within the cap)
+        if retry_after is not None and retry_after.isdigit():
+            delay = max(delay, min(self.backoff_cap, float(retry_after)))
+
+        return delay
+
+    async def _get(self, url, params):
+        session = self._get_session()
+
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+
+            try:
+                async with session.get(url, params=params) as response:
+                    body = await response.read()
+                    increment('http_requests')
+                    increment('http_bytes_received', len(body))
+
+                    if response.status not in RETRY_STATUS_CODES or attempt == self.max_retries:
+                        return response.status, body
+
+                    retry_after = response.headers.get('Retry-After')
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                increment('http_errors')
+                if attempt == self.max_retries:
+                    raise
+
+            increment('http_retries')
+            await asyncio.sleep(self._backoff(attempt, retry_after))
+
+    async def get(self, url, params=None):
+        """
+        @Args:- url:- str object containing the URL,
+                params:- dict object containing the query parameters
+        @Description:-
+                    This method performs a coalesced GET request, retrying 429/5xx answers and
+                    connection errors with jittered exponential backoff
+        @Returns:- (status_code, body):- int object and bytes object
+        """
+        params = dict(params or {})
+        key = ('GET', urlsplit(url).geturl(), tuple(sorted(params.items())))
+
+        return await self.coalesce(key, lambda: self._get(url, params))
+
+    async def run_blocking(self, key, function, *args):
+        """
+        @Args:- key:- hashable object identifying the call(None disables coalescing),
+                function:- callable object without an async API, args:- its arguments
+        @Description:-
+                    This method runs a blocking call on the shared thread pool, coalescing identical calls
+        @Returns:- result of function(shared by the coalesced callers)
+        """
+        loop = asyncio.get_running_loop()
+
+        def factory():
+            return loop.run_in_executor(self._executor, propagate(function), *args)
+
+        if key is None:
+            return await factory()
+
+        return await self.coalesce(key, factory)
+
+    async def close(self):
+        """
+        @Args:- None
+        @Description:-
+                    This method closes the HTTP session and the thread pool
+        @Returns:-
+        """
+        if self._session is not None:
+            await self._session.close()
+        self._executor.shutdown(wait=False)
+
+# Background event loop and client of the current process(created lazily, recreated in forked worker processes)
+_background = None
+_background_lock = threading.Lock()
+
+# Loop and client inherited from the parent process by a fork:- their thread doesn't exist in the child, they are
+# only kept referenced so that they are never finalized(which would touch the parent's connections)
+_inherited_backgrounds = []
+
+def _run_loop(loop):
+    asyncio.set_event_loop(loop)
+    loop.run_forever()
+
+def _get_background():
+    global _background
+
+    background = _background
+    if background is None or background[0] != os.getpid():
+        with _background_lock:
+            if _background is None or _background[0] != os.getpid():
+                if _background is not None:
+                    _inherited_backgrounds.append(_background)
+
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=_run_loop, args=(loop,), name='async-data-loop', daemon=True)
+                thread.start()
+                _background = (os.getpid(), loop, thread, AsyncDataClient())
+            background = _background
+
+    return background
+
+def get_event_loop():
+    """
+    @Args:- None
+    @Description:-
+                This method returns the process-wide event loop running in a background thread, on which every
+                data access coroutine of the app runs(whatever Streamlit session or worker thread started it)
+    @Returns:- loop:- asyncio event loop object
+    """
+    return _get_background()[1]
+
+def get_async_client():
+    """
+    @Args:- None
+    @Description:-
+                This method returns the process-wide AsyncDataClient instance(bound to get_event_loop())
+    @Returns:- async_client:- AsyncDataClient object
+    """
+    return _get_background()[3]
+
+def run_sync(coroutine, timeout=None):
+    """
+    @Args:- coroutine:- coroutine object,
+            timeout:- float object containing the maximum number of seconds to wait(None waits until done)
+    @Description:-
+                This method runs coroutine on the background event loop and waits for its result from a
+                synchronous caller(e.g. the Streamlit script thread). The current recorder is propagated.
+    @Returns:- result of coroutine
+    """
+    _, loop, thread, _ = _get_background()
+
+    if threading.current_thread() is thread:
+        coroutine.close()
+        raise RuntimeError("run_sync() can't be called from the data event loop, await the coroutine instead")
+
+    return asyncio.run_coroutine_threadsafe(propagate_async(coroutine), loop).result(timeout)
@@ -0,0 +1,277 @@
+"""
+Walk-forward(expanding window) backtest of the ridge model:- every day the model is refitted on all the
+days before it(its alpha chosen by leave-one-out, like the training) and its next-day prediction is traded.
+
+Usage:- python backtest.py --tickers AAPL MSFT --output backtest.csv
+        python backtest.py --watchlist watchlist.txt --min-train 120 --retrain-every 5 --cost-bps 2
+"""
+import argparse
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from feature_store import MODEL_FEATURE_COLUMNS
+from ridge_path import DEFAULT_ALPHAS, solve_ridge_path, leave_one_out_errors
+from train_machine_learning_model import prepare_training_data
+
+# Number of days the first model is trained on
+DEFAULT_MIN_TRAIN_SIZE = 60
+
+# Trading days per year(for the annualized Sharpe ratio)
+TRADING_DAYS_PER_YEAR = 252
+
+def build_design_matrix(combined_data):
+    """
+    @Args:- combined_data:- dataframe object containing the combined stock and sentiment data(left unmodified)
+    @Description:-
+                This method computes the features and target of every day in one vectorized pass. Days
+                with incomplete features(the warm-up of the rolling indicators) are dropped.
+    @Returns:- (dates, X, y, close):- datetime64 array, float arrays of the features(n x p), next-day close
+                                      and same-day close, sorted by date
+    """
+    prepared = prepare_training_data(combined_data.copy())
+
+    # The forward fill of prepare_training_data also fills the last day's target, it has no next close
+    prepared['target'] = prepared['Close'].shift(-1)
+    prepared = prepared.dropna(subset=MODEL_FEATURE_COLUMNS + ['target'])
+
+    return (prepared['Date'].to_numpy(), prepared[MODEL_FEATURE_COLUMNS].to_numpy(dtype=np.float64),
+            prepared['target'].to_numpy(dtype=np.float64), prepared['Close'].to_numpy(dtype=np.float64))
+
+def fit_walk_forward_coefficients(X, y, steps, alphas=DEFAULT_ALPHAS):
+    """
+    @Args:- X:- float array(n x p) of the features, y:- float array(n) of the targets,
+            steps:- int array of the training sizes(the model of step t is trained on rows [0, t)),
+            alphas:- float array of the ridge penalties to choose from(one value gives a fixed-alpha baseline)
+    @Description:-
+                This method fits StandardScaler + RidgePathRegressor(alphas) on every expanding window. The
+                sufficient statistics(count, sums, Gram matrix) of all windows are prefix sums over the rows,
+                so each window costs one p x p eigendecomposition instead of a full refit. The alpha of each
+                window is chosen by exact leave-one-out error over the window's rows, like the training.
+    @Returns:- (coefficients, intercepts, selected_alphas):- float arrays(len(steps) x p, len(steps) and len(steps))
+                                                             in the original feature units
+    """
+    alphas = np.atleast_1d(np.asarray(alphas, dtype=np.float64))
+
+    # Shift by a reference row to keep the Gram differences well conditioned(volume is ~1e7)
+    reference = X[:steps.min()].mean(axis=0)
+    y_reference = y[:steps.min()].mean()
+    Xs = X - reference
+    ys = y - y_reference
+
+    # Prefix sums with a leading zero row:- statistics of rows [0, t) are at index t
+    def prefix(values):
+        return np.concatenate([np.zeros((1,) + values.shape[1:]), np.cumsum(values, axis=0)])
+
+    sum_x = prefix(Xs)[steps]
+    sum_y = prefix(ys)[steps]
+    sum_xx = prefix(np.einsum('ni,nj->nij', Xs, Xs))[steps]
+    sum_xy = prefix(Xs * ys[:, None])[steps]
+    counts = steps.astype(np.float64)
+
+    mean_x = sum_x / counts[:, None]
+    mean_y = sum_y / counts
+
+    # Centered Gram matrix and cross products of every window
+    gram = sum_xx - counts[:, None, None] * np.einsum('ki,kj->kij', mean_x, mean_x)
+    cross = sum_xy - counts[:, None] * mean_x * mean_y[:, None]
+
+    # StandardScaler(population std, constant features keep a unit scale)
+    scale = np.sqrt(np.maximum(np.diagonal(gram, axis1=1, axis2=2) / counts[:, None], 0))
+    scale[scale < 10 * np.finfo(np.float64).eps] = 1.0
+
+    scaled_gram = gram / (scale[:, :, None] * scale[:, None, :])
+    scaled_cross = cross / scale
+
+    scaled_coefficients = np.empty_like(scaled_cross)
+    selected_alphas = np.empty(len(steps))
+
+    for step, size in enumerate(steps):
+        eigenvalues, eigenvectors, path = solve_ridge_path(scaled_gram[step], scaled_cross[step], alphas)
+
+        # The leave-one-out errors need the window's own rows(scaled and centered like RidgePathRegressor sees them)
+        loo_mse = leave_one_out_errors((Xs[:size] - mean_x[step]) / scale[step], ys[:size] - mean_y[step],
+                                       eigenvalues, eigenvectors, path, alphas)
+        best = int(np.argmin(loo_mse))
+        scaled_coefficients[step] = path[best]
+        selected_alphas[step] = alphas[best]
+
+    coefficients = scaled_coefficients / scale
+    intercepts = (mean_y + y_reference) - np.einsum('kj,kj->k', mean_x + reference, coefficients)
+
+    return coefficients, intercepts, selected_alphas
+
+def walk_forward_backtest(combined_data, alphas=DEFAULT_ALPHAS, min_train_size=DEFAULT_MIN_TRAIN_SIZE, retrain_every=1,
+                          cost_bps=0.0, allow_short=True):
+    """
+    @Args:- combined_data:- dataframe object containing the combined stock and sentiment data,
+            alphas:- float array of the ridge penalties chosen from at every refit(one value gives a
+                     fixed-alpha baseline),
+            min_train_size:- int object containing the number of days the first model is trained on,
+            retrain_every:- int object, the model is refitted every retrain_every days(1 refits daily),
+            cost_bps:- float object containing the transaction cost per unit of position change(basis points),
+            allow_short:- bool object, False stays flat instead of shorting when a fall is predicted
+    @Description:-
+                This method predicts every day after the first min_train_size days with a model trained
+                only on the days before it, and trades the predicted direction of the next close
+    @Returns:- (backtest, summary):- dataframe object with one row per predicted day(date, close, actual, predicted,
+                                     error, position, return, pnl, equity, alpha) and dict object of the summary metrics
+    """
+    dates, X, y, close = build_design_matrix(combined_data)
+
+    if len(y) <= min_train_size:
+        raise ValueError(f"Not enough days to backtest({len(y)} usable days, {min_train_size} needed to train).")
+
+    # Model refit days and, for every predicted day, the last refit on or before it
+    predicted_days = np.arange(min_train_size, len(y))
+    refit_days = predicted_days[::max(1, retrain_every)]
+    model_of_day = np.searchsorted(refit_days, predicted_days, side='right') - 1
+
+    coefficients, intercepts, selected_alphas = fit_walk_forward_coefficients(X, y, refit_days, alphas)
+    predicted = np.einsum('kj,kj->k', X[predicted_days], coefficients[model_of_day]) + intercepts[model_of_day]
+
+    actual = y[predicted_days]
+    today_close = close[predicted_days]
+
+    # Trade the predicted direction of the next close
+    position = np.sign(predicted - today_close)
+    if not allow_short:
+        position = np.maximum(position, 0)
+
+    daily_return = actual / today_close - 1
+    turnover = np.abs(np.diff(position, prepend=0))
+    pnl = position * daily_return - turnover * cost_bps / 10000
+
+    backtest = pd.DataFrame({
+        'date': dates[predicted_days],
+        'close': today_close,
+        'actual': actual,
+        'predicted': predicted,
+        'error': predicted - actual,
+        'position': position,
+        'return': daily_return,
+        'pnl': pnl,
+        'equity': np.cumprod(1 + pnl),
+        'alpha': selected_alphas[model_of_day]
+    })
+
+    return backtest, summarize_backtest(backtest)
+
+def summarize_backtest(backtest):
+    """
+    @Args:- backtest:- dataframe object returned by walk_forward_backtest
+    @Description:-
+                This method computes the out-of-sample error and trading metrics of a backtest
+    @Returns:- summary:- dict object
+    """
+    errors = backtest['error'].to_numpy()
+    pnl = backtest['pnl'].to_numpy()
+    equity = backtest['equity'].to_numpy()
+    actual_direction = np.sign(backtest['actual'] - backtest['close'])
+    predicted_direction = np.sign(backtest['predicted'] - backtest['close'])
+    pnl_std = pnl.std()
+
+    return {
+        'days': len(backtest),
+        'mae': float(np.abs(errors).mean()),
+        'rmse': float(np.sqrt((errors ** 2).mean())),
+        'directional_accuracy': float((actual_direction == predicted_direction).mean()),
+        'total_return': float(equity[-1] - 1),
+        'buy_and_hold_return': float(backtest['actual'].iloc[-1] / backtest['close'].iloc[0] - 1),
+        'sharpe': float(pnl.mean() / pnl_std * math.sqrt(TRADING_DAYS_PER_YEAR)) if pnl_std > 0 else 0.0,
+        'max_drawdown': float((equity / np.maximum.accumulate(np.maximum(equity, 1)) - 1).min())
+    }
+
+def backtest_ticker(ticker, combined_data, options):
+    """
+    @Args:- ticker:- str object containing the ticker name,
+            combined_data:- dataframe object containing the combined data of the ticker,
+            options:- dict object of walk_forward_backtest keyword arguments
+    @Description:-
+                This method backtests one ticker(executed in a worker process)
+    @Returns:- (backtest, summary):- see walk_forward_backtest, the summary also holds the ticker
+    """
+    backtest, summary = walk_forward_backtest(combined_data, **options)
+    backtest.insert(0, 'ticker', ticker)
+
+    return backtest, dict(ticker=ticker, **summary)
+
+def run_backtests(combined_data_by_ticker, workers=None, **options):
+    """
+    @Args:- combined_data_by_ticker:- dict object mapping each ticker to its combined data,
+            workers:- int object containing the number of worker processes(defaults to the CPU count),
+            options:- walk_forward_backtest keyword arguments
+    @Description:-
+                This method backtests the tickers in parallel
+    @Returns:- (backtests, summary):- dataframe object of every ticker's daily rows and dataframe object with
+                                      one summary row per ticker(with an 'error' column for failed tickers)
+    """
+    backtests = []
+    summaries = []
+
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        futures = {ticker: executor.submit(backtest_ticker, ticker, combined_data, options)
+                   for ticker, combined_data in combined_data_by_ticker.items()}
+
+        for ticker, future in futures.items():
+            try:
+                backtest, summary = future.result()
+            except Exception as e:
+                summaries.append({'ticker': ticker, 'error': str(e)})
+                continue
+            backtests.append(backtest)
+            summaries.append(summary)
+
+    return (pd.concat(backtests, ignore_index=True) if backtests else pd.DataFrame()), pd.DataFrame(summaries)
+
+def main():
+    # Imported here so that the engine itself doesn't pull in the data layer
+    from batch_runner import read_watchlist, download_watchlist_prices, fetch_watchlist_news, DEFAULT_NEWS_WORKERS
+    from perform_sentiment_analysis import get_sentiments_list
+    from combine_sentiment_and_stock_data import get_combined_sentiment_and_stock_data
+
+    parser = argparse.ArgumentParser(description="Walk-forward backtest of the next trading day price model")
+    parser.add_argument('--watchlist', help="file containing the tickers(one per line or comma separated)")
+    parser.add_argument('--tickers', nargs='*', default=[], help="tickers to backtest(added to the watchlist)")
+    parser.add_argument('--output', default=None, help="daily rows of every ticker(.csv or .parquet)")
+    parser.add_argument('--alphas', type=float, nargs='+', default=list(DEFAULT_ALPHAS),
+                        help="ridge penalties chosen from by leave-one-out at every refit(one value fixes alpha)")
+    parser.add_argument('--min-train', type=int, default=DEFAULT_MIN_TRAIN_SIZE, help="days the first model is trained on")
+    parser.add_argument('--retrain-every', type=int, default=1, help="refit the model every N days")
+    parser.add_argument('--cost-bps', type=float, default=0.0, help="transaction cost in basis points")
+    parser.add_argument('--long-only', action='store_true', help="stay flat instead of shorting")
+    parser.add_argument('--workers', type=int, default=None, help="number of backtest processes")
+    parser.add_argument('--news-workers', type=int, default=DEFAULT_NEWS_WORKERS)
+    args = parser.parse_args()
+
+    tickers = (read_watchlist(args.watchlist) if args.watchlist else []) + args.tickers
+    if not tickers:
+        parser.error("no tickers given, use --watchlist and/or --tickers")
+    tickers = list(dict.fromkeys(ticker.upper() for ticker in tickers))
+
+    stock_data_by_ticker = download_watchlist_prices(tickers)
+    news_by_ticker = fetch_watchlist_news(tickers, args.news_workers)
+
+    combined_data_by_ticker = {}
+    for ticker in tickers:
+        news_frame, news_error, _ = news_by_ticker[ticker]
+        if stock_data_by_ticker[ticker].empty or news_error is not None or news_frame.empty:
+            print(f"Skipping {ticker}: no prices or news")
+            continue
+        combined_data_by_ticker[ticker] = get_combined_sentiment_and_stock_data(
+            news_frame, get_sentiments_list(news_frame), stock_data_by_ticker[ticker], ticker)
+
+    backtests, summary = run_backtests(combined_data_by_ticker, args.workers, alphas=args.alphas,
+                                       min_train_size=args.min_train, retrain_every=args.retrain_every,
+                                       cost_bps=args.cost_bps, allow_short=not args.long_only)
+    print(summary.to_string(index=False))
+
+    if args.output:
+        if args.output.endswith('.parquet'):
+            backtests.to_parquet(args.output, index=False)
+        else:
+            backtests.to_csv(args.output, index=False)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,192 @@
+"""
+Headless batch mode:- runs the whole sentiment-to-prediction pipeline for a watchlist of tickers.
+
+Usage:- python batch_runner.py --watchlist watchlist.txt --output report.csv
+        python batch_runner.py --tickers AAPL MSFT NVDA --output report.parquet --workers 8
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import timedelta
+import pandas as pd
+from data_sources import get_data_source
+from instrumentation import propagate
+from fetch_sentiment_data import fetch_sentiment_data
+from perform_sentiment_analysis import get_sentiments_list
+from combine_sentiment_and_stock_data import get_combined_sentiment_and_stock_data
+from train_machine_learning_model import load_or_train_model
+from get_last_trading_day_price import get_last_trading_day_price
+from predict_next_trading_day_price import predict_next_trading_day_price
+from trading_calendar import get_trading_calendar
+
+# Number of tickers whose news is fetched at the same time
+DEFAULT_NEWS_WORKERS = 8
+
+def read_watchlist(path):
+    """
+    @Args:- path:- str object containing the path of a watchlist file(one ticker per line or comma separated,
+                   '#' starts a comment)
+    @Description:-
+                This method reads the tickers of a watchlist file
+    @Returns:- tickers:- list object containing the unique upper-case tickers in file order
+    """
+    tickers = []
+
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.split('#', 1)[0]
+            tickers.extend(ticker.strip().upper() for ticker in line.replace(',', ' ').split())
+
+    return list(dict.fromkeys(tickers))
+
+def download_watchlist_prices(tickers):
+    """
+    @Args:- tickers:- list object containing the ticker names
+    @Description:-
+                This method downloads the price history(2024-01-01 upto the last completed session) of every ticker
+                in a single download call(yfinance by default) and splits it per ticker
+    @Returns:- stock_data_by_ticker:- dict object mapping each ticker to its stock dataframe(empty if missing)
+    """
+    # Exclusive end date('yyyy-mm-dd') of the bars:- the day after the last completed session(the last
+    # trading day whose bar is final), so nothing is requested for days the market hasn't closed on
+    last_session = get_trading_calendar().last_completed_session()
+    formatted_date = (last_session + timedelta(days=1)).strftime('%Y-%m-%d')
+
+    stock_data = get_data_source().download_prices(tickers, start='2024-01-01', end=formatted_date)
+
+    stock_data_by_ticker = {}
+    for ticker in tickers:
+        if isinstance(stock_data.columns, pd.MultiIndex) and ticker in stock_data.columns.get_level_values(0):
+            stock_data_by_ticker[ticker] = stock_data[ticker].dropna(how='all').copy()
+        else:
+            stock_data_by_ticker[ticker] = pd.DataFrame()
+
+    return stock_data_by_ticker
+
+def fetch_watchlist_news(tickers, news_workers=DEFAULT_NEWS_WORKERS):
+    """
+    @Args:- tickers:- list object containing the ticker names,
+            news_workers:- int object containing the number of tickers fetched concurrently
+    @Description:-
+                This method fetches the news of every ticker concurrently
+    @Returns:- news_by_ticker:- dict object mapping each ticker to (news frame or None, error or None, seconds)
+    """
+    def fetch(ticker):
+        start = time.perf_counter()
+        try:
+            return fetch_sentiment_data(ticker), None, time.perf_counter() - start
+        except Exception as e:
+            return None, str(e), time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=max(1, news_workers)) as executor:
+        return dict(zip(tickers, executor.map(propagate(fetch), tickers)))
+
+def process_ticker(ticker, stock_data, sentiment_description_list):
+    """
+    @Args:- ticker:- str object containing the ticker name,
+            stock_data:- dataframe object containing the stock data of the ticker,
+            sentiment_description_list:- dataframe object containing the news frame of the ticker
+    @Description:-
+                This method runs the sentiment, merge, training and prediction stages of one ticker
+                (executed in a worker process)
+    @Returns:- result:- dict object containing the report row of the ticker(metrics, prices and stage timings)
+    """
+    result = {'ticker': ticker, 'articles': len(sentiment_description_list), 'price_rows': len(stock_data)}
+
+    start = time.perf_counter()
+    sentiments_list = get_sentiments_list(sentiment_description_list)
+    combined_data = get_combined_sentiment_and_stock_data(sentiment_description_list, sentiments_list, stock_data, ticker)
+    result['combine_seconds'] = time.perf_counter() - start
+    result['combined_rows'] = len(combined_data)
+
+    if combined_data.empty:
+        result['error'] = "No combined data obtained for the model"
+        return result
+
+    start = time.perf_counter()
+    cv_scores, mae, r2, imputer, scaler, combined_data, model = load_or_train_model(combined_data, ticker)
+    result['train_seconds'] = time.perf_counter() - start
+    result.update({'cv_r2': float(cv_scores), 'mae': float(mae), 'r2': float(r2)})
+
+    start = time.perf_counter()
+    last_price, last_date = get_last_trading_day_price(combined_data)
+    predicted_price = predict_next_trading_day_price(combined_data, model, ticker, imputer, scaler)
+    result['predict_seconds'] = time.perf_counter() - start
+    result.update({'last_trading_day': last_date, 'last_close': last_price, 'predicted_price': float(predicted_price)})
+
+    return result
+
+def run_watchlist(tickers, output=None, workers=None, news_workers=DEFAULT_NEWS_WORKERS):
+    """
+    @Args:- tickers:- list object containing the ticker names,
+            output:- str object containing the report path('.parquet' or '.csv', None skips writing),
+            workers:- int object containing the number of worker processes(defaults to the CPU count),
+            news_workers:- int object containing the number of tickers whose news is fetched concurrently
+    @Description:-
+                This method runs the pipeline end to end for a watchlist:- one price download for all
+                tickers, concurrent news fetching and per-ticker training/prediction in a process pool
+    @Returns:- report:- dataframe object containing one row per ticker with metrics, prediction and stage timings
+    """
+    tickers = list(dict.fromkeys(ticker.upper() for ticker in tickers))
+
+    start = time.perf_counter()
+    stock_data_by_ticker = download_watchlist_prices(tickers)
+    # The single download is shared, its time is reported per ticker as an equal share
+    price_seconds = (time.perf_counter() - start) / max(1, len(tickers))
+
+    news_by_ticker = fetch_watchlist_news(tickers, news_workers)
+
+    rows = {}
+    futures = {}
+
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        for ticker in tickers:
+            stock_data = stock_data_by_ticker[ticker]
+            sentiment_description_list, news_error, news_seconds = news_by_ticker[ticker]
+            rows[ticker] = {'ticker': ticker, 'price_seconds': price_seconds, 'news_seconds': news_seconds}
+
+            if stock_data.empty:
+                rows[ticker]['error'] = "No data available for the given ticker."
+            elif news_error is not None:
+                rows[ticker]['error'] = f"An error occurred while fetching financial sentiment data: {news_error}"
+            elif sentiment_description_list.empty:
+                rows[ticker]['error'] = f"No sentiment data available for {ticker}."
+            else:
+                futures[ticker] = executor.submit(process_ticker, ticker, stock_data, sentiment_description_list)
+
+        for ticker, future in futures.items():
+            try:
+                rows[ticker].update(future.result())
+            except Exception as e:
+                rows[ticker]['error'] = str(e)
+
+    report = pd.DataFrame([rows[ticker] for ticker in tickers])
+
+    if output:
+        if output.endswith('.parquet'):
+            report.to_parquet(output, index=False)
+        else:
+            report.to_csv(output, index=False)
+
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Predict the next trading day price of a watchlist of tickers")
+    parser.add_argument('--watchlist', help="file containing the tickers(one per line or comma separated)")
+    parser.add_argument('--tickers', nargs='*', default=[], help="tickers to process(added to the watchlist)")
+    parser.add_argument('--output', default='report.csv', help="report path(.csv or .parquet)")
+    parser.add_argument('--workers', type=int, default=None, help="number of training/prediction processes")
+    parser.add_argument('--news-workers', type=int, default=DEFAULT_NEWS_WORKERS,
+                        help="number of tickers whose news is fetched concurrently")
+    args = parser.parse_args()
+
+    tickers = (read_watchlist(args.watchlist) if args.watchlist else []) + args.tickers
+    if not tickers:
+        parser.error("no tickers given, use --watchlist and/or --tickers")
+
+    report = run_watchlist(tickers, args.output, args.workers, args.news_workers)
+    print(report.to_string(index=False))
+
+if __name__ == '__main__':
+    main()
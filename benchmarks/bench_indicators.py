@@ -0,0 +1,108 @@
+"""
+Micro-benchmark of the vectorized indicator kernels against the previous pandas implementation.
+
+Run from the repository root:- python -m benchmarks.bench_indicators --rows 10000 100000 1000000
+"""
+import argparse
+import timeit
+import numpy as np
+import pandas as pd
+from indicators import average_true_range, average_gain_and_loss
+
+def legacy_average_true_range(high, low, close, window=14):
+    """
+    @Args:- high, low, close:- pandas Series objects, window:- int object
+    @Description:-
+                This method is the ATR implementation the kernels replaced(Python max() per element)
+    @Returns:- atr:- pandas Series object
+    """
+    high_low = high - low
+    high_close = abs(high - close.shift())
+    low_close = abs(low - close.shift())
+    tr = high_low.combine(high_close, max).combine(low_close, max)
+    return tr.rolling(window=window).mean()
+
+def legacy_average_gain_and_loss(close, window=14):
+    """
+    @Args:- close:- pandas Series object, window:- int object
+    @Description:-
+                This method is the RSI gain/loss implementation the kernels replaced
+    @Returns:- gain, loss:- pandas Series objects
+    """
+    delta = close.diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=window).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=window).mean()
+    return gain, loss
+
+def make_price_data(rows, seed=0):
+    """
+    @Args:- rows:- int object containing the number of bars, seed:- int object
+    @Description:-
+                This method generates a random-walk OHLCV frame
+    @Returns:- price_data:- dataframe object containing 'Close', 'High', 'Low' and 'Volume'
+    """
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(size=rows))
+    return pd.DataFrame({
+        'Close': close,
+        'High': close + rng.random(rows),
+        'Low': close - rng.random(rows),
+        'Volume': rng.integers(100000, 1000000, rows).astype(float)
+    })
+
+def best_time(function, repeat):
+    """
+    @Args:- function:- callable object, repeat:- int object
+    @Description:-
+                This method times function and keeps the best of repeat runs
+    @Returns:- float object containing seconds
+    """
+    return min(timeit.repeat(function, number=1, repeat=repeat))
+
+def run_benchmark(rows, repeat=3):
+    """
+    @Args:- rows:- int object containing the number of bars, repeat:- int object
+    @Description:-
+                This method times the legacy and vectorized ATR and RSI gain/loss and
+                checks that both return the same values
+    @Returns:- results:- list object of dicts(one per indicator)
+    """
+    price_data = make_price_data(rows)
+    high, low, close = price_data['High'], price_data['Low'], price_data['Close']
+    high_values, low_values, close_values = high.to_numpy(), low.to_numpy(), close.to_numpy()
+
+    np.testing.assert_allclose(average_true_range(high_values, low_values, close_values),
+                               legacy_average_true_range(high, low, close).to_numpy(), equal_nan=True)
+    for kernel, legacy in zip(average_gain_and_loss(close_values), legacy_average_gain_and_loss(close)):
+        np.testing.assert_allclose(kernel, legacy.to_numpy(), equal_nan=True, atol=1e-9)
+
+    cases = [
+        ('ATR', lambda: legacy_average_true_range(high, low, close),
+         lambda: average_true_range(high_values, low_values, close_values)),
+        ('RSI gain/loss', lambda: legacy_average_gain_and_loss(close),
+         lambda: average_gain_and_loss(close_values)),
+    ]
+
+    results = []
+    for name, legacy, vectorized in cases:
+        legacy_seconds = best_time(legacy, repeat)
+        vectorized_seconds = best_time(vectorized, repeat)
+        results.append({'indicator': name, 'rows': rows, 'legacy_seconds': legacy_seconds,
+                        'vectorized_seconds': vectorized_seconds,
+                        'speedup': legacy_seconds / vectorized_seconds})
+
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the vectorized indicator kernels")
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    for rows in args.rows:
+        for result in run_benchmark(rows, args.repeat):
+            print(f"{result['indicator']:<14} rows={result['rows']:<9} legacy={result['legacy_seconds']:.4f}s "
+                  f"vectorized={result['vectorized_seconds']:.4f}s speedup={result['speedup']:.1f}x")
+
+if __name__ == '__main__':
+    main()
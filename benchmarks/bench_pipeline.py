@@ -0,0 +1,327 @@
+"""
+End-to-end benchmark of the sentiment-to-prediction pipeline, stage by stage.
+
+Every stage(fetch, parse, clean, merge, feature, train, predict, plot) is reported with its wall time,
+peak traced memory and throughput, as JSON that can be compared between commits.
+
+Run from the repository root:-
+    python -m benchmarks.bench_pipeline --articles 1000 100000 1000000 --years 1 30 --output bench.json
+    python -m benchmarks.bench_pipeline --fixtures fixtures --ticker AAPL --start 2024-01-01
+    python -m benchmarks.bench_pipeline --articles 100000 --years 5 --baseline bench.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import time
+import tracemalloc
+import warnings
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import sklearn
+from data_sources import DataSource, RecordedDataSource, flatten_price_columns, set_data_source
+from fetch_sentiment_data import get_month_windows, fetch_news_windows, parse_news_articles
+from perform_sentiment_analysis import get_sentiments_list
+from combine_sentiment_and_stock_data import get_combined_sentiment_and_stock_data
+from train_machine_learning_model import prepare_training_data, get_model_metrics_and_train_model
+from predict_next_trading_day_price import predict_next_trading_day_price
+from stock_price_plotter import build_stock_price_figure
+
+# Trading sessions per calendar year(used to size the synthetic bars)
+SESSIONS_PER_YEAR = 252
+
+# Version of the JSON report layout
+REPORT_VERSION = 1
+
+class SyntheticDataSource(DataSource):
+    """
+    In-memory stand-in for the news API and yfinance with a configurable number of articles and bars.
+
+    Each month of news is kept as an encoded JSON payload and decoded on every request, like a real
+    response. The API page limit is ignored so that the stages can be measured past its cap.
+    """
+
+    def __init__(self, ticker, articles, years, seed=0):
+        """
+        @Args:- ticker:- str object containing the ticker name,
+                articles:- int object containing the total number of articles,
+                years:- int object containing the number of years of daily bars(ending yesterday),
+                seed:- int object seeding the random generator
+        @Description:-
+                    This method generates the bars and the month payloads of the news
+        @Returns:-
+        """
+        rng = np.random.default_rng(seed)
+        self.ticker = ticker.upper()
+
+        end = pd.Timestamp.today().normalize() - pd.Timedelta(days=1)
+        sessions = pd.bdate_range(end=end, periods=years * SESSIONS_PER_YEAR, name='Date')
+        self.start = sessions[0].strftime('%Y-%m-%d')
+        self.end = sessions[-1].strftime('%Y-%m-%d')
+
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, len(sessions))))
+        self.prices = pd.DataFrame({
+            'Open': close * (1 + rng.normal(0, 0.002, len(sessions))),
+            'High': close * (1 + rng.random(len(sessions)) * 0.01),
+            'Low': close * (1 - rng.random(len(sessions)) * 0.01),
+            'Close': close,
+            'Volume': rng.integers(1000000, 10000000, len(sessions)).astype(float)
+        }, index=sessions)
+
+        # Articles are published on trading days, sorted by date
+        days = np.sort(rng.integers(0, len(sessions), articles))
+        neg, neu, pos = rng.dirichlet([1, 4, 1], articles).T
+        dates = sessions[days].strftime('%Y-%m-%d')
+
+        # One JSON payload per month, keyed by 'YYYY-MM'
+        self.payloads = {}
+        month_articles = []
+        month = None
+        for i, date in enumerate(dates):
+            if date[:7] != month:
+                if month_articles:
+                    self.payloads[month] = json.dumps(month_articles).encode('utf-8')
+                month, month_articles = date[:7], []
+            month_articles.append({
+                'date': f"{date}T{12 + i % 8:02d}:00:00+00:00",
+                'title': f"{self.ticker} headline {date} #{i}",
+                'content': f"Shares of {self.ticker} moved on {date} as analysts reviewed the quarter, "
+                           f"https://example.com/{i} Continue reading",
+                'symbols': [f"{self.ticker}.US"],
+                'sentiment': {'polarity': float(pos[i] - neg[i]), 'neg': float(neg[i]),
+                              'neu': float(neu[i]), 'pos': float(pos[i])}
+            })
+        if month_articles:
+            self.payloads[month] = json.dumps(month_articles).encode('utf-8')
+
+    def fetch_news(self, ticker, start, end, limit):
+        if ticker.upper() != self.ticker:
+            return 200, []
+
+        news_data = []
+        for month in pd.period_range(start[:7], end[:7], freq='M').strftime('%Y-%m'):
+            if month in self.payloads:
+                news_data.extend(article for article in json.loads(self.payloads[month])
+                                 if start <= article['date'][:10] <= end)
+
+        return 200, news_data
+
+    def download_prices(self, tickers, start, end):
+        # yfinance's end date is exclusive
+        return self.prices[(self.prices.index >= start) & (self.prices.index < end)].copy()
+
+    def get_company_info(self, ticker):
+        return {'longName': f"{ticker.upper()} Synthetic Inc."}
+
+    def get_history(self, ticker, period):
+        return self.prices.tail(1).copy()
+
+def measure(stage, items, function, trace_memory=True, verbose=False):
+    """
+    @Args:- stage:- str object containing the stage name,
+            items:- int object or callable(result -> int) giving the number of items the stage processed,
+            function:- callable object running the stage,
+            trace_memory:- bool object, False skips tracemalloc(which slows the stage down),
+            verbose:- bool object, False silences the stage's prints and warnings
+    @Description:-
+                This method runs one stage and measures its wall time and peak traced memory
+    @Returns:- (result, metrics):- value returned by function and dict object of the stage metrics
+    """
+    if trace_memory:
+        tracemalloc.start()
+
+    start = time.perf_counter()
+    try:
+        with contextlib.ExitStack() as stack:
+            if not verbose:
+                stack.enter_context(contextlib.redirect_stdout(io.StringIO()))
+                stack.enter_context(warnings.catch_warnings())
+                warnings.simplefilter('ignore')
+            result = function()
+        seconds = time.perf_counter() - start
+        peak_bytes = tracemalloc.get_traced_memory()[1] if trace_memory else None
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+
+    items = items(result) if callable(items) else items
+    metrics = {
+        'seconds': seconds,
+        'peak_bytes': peak_bytes,
+        'items': items,
+        'items_per_second': items / seconds if seconds > 0 else None
+    }
+
+    return result, metrics
+
+def run_pipeline(data_source, ticker, start, end, skip=(), clean_workers=None, trace_memory=True, verbose=False):
+    """
+    @Args:- data_source:- DataSource object serving the news and the bars,
+            ticker:- str object containing the ticker name,
+            start:- str object containing the first date('YYYY-MM-DD'),
+            end:- str object containing the last date('YYYY-MM-DD'),
+            skip:- collection of stage names not to run('clean' needs the NLTK data),
+            clean_workers:- int object containing the number of text cleaning processes(None runs serially),
+            trace_memory, verbose:- see measure
+    @Description:-
+                This method runs the whole pipeline once on data_source and measures every stage
+    @Returns:- stages:- dict object mapping each stage name to its metrics(skipped stages are left out)
+    """
+    stages = {}
+    previous_data_source = set_data_source(data_source)
+
+    def run(stage, items, function):
+        result, stages[stage] = measure(stage, items, function, trace_memory, verbose)
+        return result
+
+    try:
+        def fetch():
+            month_windows = get_month_windows(pd.Timestamp(start), pd.Timestamp(end))
+            month_results = fetch_news_windows(ticker, month_windows, end, use_cache=False)
+            end_exclusive = (pd.Timestamp(end) + pd.Timedelta(days=1)).strftime('%Y-%m-%d')
+            stock_data = flatten_price_columns(data_source.download_prices(ticker, start, end_exclusive))
+            return month_results, stock_data
+
+        month_results, stock_data = run('fetch', lambda result: sum(len(news_data or []) for news_data in result[0]), fetch)
+        description_list = run('parse', len, lambda: parse_news_articles(month_results))
+        articles = len(description_list)
+
+        if 'clean' not in skip:
+            # Imported here since it loads the NLTK data
+            from preprocess_text import get_cleaned_contents_csv
+            run('clean', articles, lambda: get_cleaned_contents_csv(description_list, workers=clean_workers,
+                                                                      use_index=False))
+
+        def merge():
+            sentiments_list = get_sentiments_list(description_list)
+            return get_combined_sentiment_and_stock_data(description_list, sentiments_list, stock_data.copy())
+
+        combined_data = run('merge', articles, merge)
+        rows = len(combined_data)
+
+        if 'feature' not in skip:
+            run('feature', rows, lambda: prepare_training_data(combined_data.copy()))
+
+        cv_scores, mae, r2, imputer, scaler, trained_data, model = run(
+            'train', rows, lambda: get_model_metrics_and_train_model(combined_data.copy()))
+
+        if 'predict' not in skip:
+            run('predict', 1, lambda: predict_next_trading_day_price(trained_data, model, ticker, imputer, scaler))
+
+        if 'plot' not in skip:
+            run('plot', len(trained_data), lambda: build_stock_price_figure(trained_data))
+    finally:
+        set_data_source(previous_data_source)
+
+    return stages
+
+def get_environment():
+    """
+    @Args:- None
+    @Description:-
+                This method describes the code and machine the benchmark ran on
+    @Returns:- environment:- dict object
+    """
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        'commit': commit,
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'sklearn': sklearn.__version__
+    }
+
+def compare_reports(report, baseline):
+    """
+    @Args:- report, baseline:- dict objects in the layout written by main
+    @Description:-
+                This method prints the wall time ratio(current / baseline) of every stage the reports share
+    @Returns:-
+    """
+    baseline_runs = {run['scenario']: run['stages'] for run in baseline['runs']}
+
+    print(f"\nCompared with {baseline['environment'].get('commit')}(ratio > 1 is slower):-")
+    for run in report['runs']:
+        baseline_stages = baseline_runs.get(run['scenario'])
+        if baseline_stages is None:
+            continue
+        ratios = [f"{stage}={metrics['seconds'] / baseline_stages[stage]['seconds']:.2f}x"
+                  for stage, metrics in run['stages'].items()
+                  if stage in baseline_stages and baseline_stages[stage]['seconds'] > 0]
+        print(f"{run['scenario']:>28}  {'  '.join(ratios)}")
+
+def print_report(report):
+    """
+    @Args:- report:- dict object in the layout written by main
+    @Description:-
+                This method prints one line per scenario and stage
+    @Returns:-
+    """
+    print(f"{'scenario':>28} {'stage':>8} {'seconds':>10} {'peak MB':>9} {'items':>9} {'items/s':>12}")
+    for run in report['runs']:
+        for stage, metrics in run['stages'].items():
+            peak = '-' if metrics['peak_bytes'] is None else f"{metrics['peak_bytes'] / 2 ** 20:.1f}"
+            rate = '-' if metrics['items_per_second'] is None else f"{metrics['items_per_second']:.0f}"
+            print(f"{run['scenario']:>28} {stage:>8} {metrics['seconds']:>10.4f} {peak:>9} {metrics['items']:>9} {rate:>12}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the sentiment-to-prediction pipeline stage by stage")
+    parser.add_argument('--articles', type=int, nargs='+', default=[1000, 100000], help="synthetic article counts")
+    parser.add_argument('--years', type=int, nargs='+', default=[1], help="synthetic years of daily bars")
+    parser.add_argument('--fixtures', help="benchmark recorded fixtures(see data_sources) instead of synthetic data")
+    parser.add_argument('--ticker', default='AAPL')
+    parser.add_argument('--start', default='2024-01-01', help="first date of the recorded run")
+    parser.add_argument('--end', default=None, help="last date of the recorded run(defaults to yesterday)")
+    parser.add_argument('--skip', nargs='*', default=[], choices=['clean', 'feature', 'predict', 'plot'],
+                        help="stages not to run('clean' needs the NLTK data)")
+    parser.add_argument('--clean-workers', type=int, default=None, help="text cleaning processes(default serial)")
+    parser.add_argument('--no-memory', action='store_true', help="skip tracemalloc for undisturbed timings")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--verbose', action='store_true', help="show the prints of the pipeline")
+    parser.add_argument('--output', help="JSON report path")
+    parser.add_argument('--baseline', help="JSON report of an earlier commit to compare against")
+    args = parser.parse_args()
+
+    options = dict(skip=set(args.skip), clean_workers=args.clean_workers, trace_memory=not args.no_memory,
+                   verbose=args.verbose)
+    runs = []
+
+    if args.fixtures:
+        end = args.end or (pd.Timestamp.today().normalize() - pd.Timedelta(days=1)).strftime('%Y-%m-%d')
+        stages = run_pipeline(RecordedDataSource(args.fixtures), args.ticker.upper(), args.start, end, **options)
+        runs.append({'scenario': f"recorded:{args.ticker.upper()}:{args.start}:{end}", 'source': 'recorded',
+                     'ticker': args.ticker.upper(), 'start': args.start, 'end': end, 'stages': stages})
+    else:
+        for years in args.years:
+            for articles in args.articles:
+                data_source = SyntheticDataSource(args.ticker, articles, years, args.seed)
+                stages = run_pipeline(data_source, data_source.ticker, data_source.start, data_source.end, **options)
+                runs.append({'scenario': f"synthetic:{articles}a:{years}y", 'source': 'synthetic',
+                             'ticker': data_source.ticker, 'articles': articles, 'years': years,
+                             'bars': len(data_source.prices), 'stages': stages})
+
+    report = {'version': REPORT_VERSION, 'environment': get_environment(), 'runs': runs}
+    print_report(report)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            compare_reports(report, json.load(f))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""
+Micro-benchmark of the incremental sentiment index store against recomputing the index from scratch.
+
+Before timing, it checks that news of a constant polarity and count every day keeps the index at that value,
+and that an incremental update equals a full recompute.
+
+Run from the repository root:- python -m benchmarks.bench_sentiment_index --days 1000 10000
+"""
+import argparse
+import os
+import tempfile
+import timeit
+import numpy as np
+import pandas as pd
+from sentiment_index import SentimentIndexStore, compute_sentiment_index_rows
+
+def make_daily_sentiment(days, seed=0):
+    """
+    @Args:- days:- int object containing the number of news days, seed:- int object
+    @Description:-
+                This method generates daily aggregates like aggregate_daily_sentiment(with gaps between news days)
+    @Returns:- daily_sentiment:- dataframe object indexed by 'date' with 'polarity' and 'article_count'
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.Timestamp('2000-01-03') + pd.to_timedelta(np.cumsum(rng.integers(1, 4, days)), unit='D')
+    return pd.DataFrame({'polarity': rng.uniform(-1, 1, days), 'article_count': rng.integers(1, 20, days)},
+                        index=pd.DatetimeIndex(dates, name='date'))
+
+def check_constant_news_keeps_its_value(polarity=0.5, article_count=3, days=400):
+    """
+    @Args:- polarity:- float object, article_count:- int object, days:- int object
+    @Description:-
+                This method checks that the same news every day leaves sentiment_index at the polarity and
+                news_intensity at the article count(each day is decayed exactly once)
+    @Returns:-
+    """
+    daily_sentiment = pd.DataFrame({'polarity': polarity, 'article_count': article_count},
+                                   index=pd.DatetimeIndex(pd.date_range('2024-01-01', periods=days), name='date'))
+    last_row = compute_sentiment_index_rows(daily_sentiment).iloc[-1]
+
+    np.testing.assert_allclose(last_row['sentiment_index'], polarity, rtol=1e-9)
+    np.testing.assert_allclose(last_row['news_intensity'], article_count, rtol=1e-9)
+
+def run_benchmark(days, repeat=3):
+    """
+    @Args:- days:- int object containing the number of news days, repeat:- int object
+    @Description:-
+                This method times a full recompute and the store update adding the last news day to the
+                stored history, after checking that both return the same rows
+    @Returns:- result:- dict object
+    """
+    daily_sentiment = make_daily_sentiment(days)
+    open_day = daily_sentiment.index[-1] + pd.Timedelta(days=1)
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = SentimentIndexStore(os.path.join(directory, 'index.sqlite'))
+
+        def incremental():
+            store.update('BENCH', daily_sentiment.iloc[:-1], open_day)
+            return timeit.timeit(lambda: store.update('BENCH', daily_sentiment, open_day), number=1)
+
+        store.update('BENCH', daily_sentiment, open_day)
+        full_rows = compute_sentiment_index_rows(daily_sentiment)
+        np.testing.assert_allclose(store.get_rows('BENCH')[['sentiment_index', 'news_intensity']].to_numpy(),
+                                   full_rows[['sentiment_index', 'news_intensity']].to_numpy(), rtol=1e-12)
+
+        # The last day is dropped before each timed update, so every update appends exactly one day
+        incremental_seconds = min(incremental() for _ in range(repeat))
+        full_seconds = min(timeit.repeat(lambda: compute_sentiment_index_rows(daily_sentiment), number=1,
+                                         repeat=repeat))
+
+    return {'days': days, 'full_seconds': full_seconds, 'incremental_seconds': incremental_seconds}
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the incremental sentiment index store")
+    parser.add_argument('--days', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    check_constant_news_keeps_its_value()
+
+    for days in args.days:
+        result = run_benchmark(days, args.repeat)
+        print(f"days={result['days']:<7} full={result['full_seconds']:.4f}s "
+              f"incremental={result['incremental_seconds']:.4f}s")
+
+if __name__ == '__main__':
+    main()
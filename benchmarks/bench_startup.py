@@ -0,0 +1,191 @@
+"""
+Cold start benchmark:- import time and import-time memory of the app's modules, and worker spin-up.
+
+Every measurement runs in a fresh interpreter with the network blocked, so a module probing the
+network(e.g. an NLTK download) at import time fails instead of being timed. The heavy third-party
+packages each module pulls in are listed, to catch eager imports creeping back.
+
+Run from the repository root:-
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --modules app cached_pipeline --repeat 5 --output startup.json
+    python -m benchmarks.bench_startup --baseline startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from benchmarks.bench_pipeline import get_environment
+
+# Repository root(the measured modules are imported from there)
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules measured by default('app' runs the Streamlit script in bare mode, without a ticker)
+DEFAULT_MODULES = ['app', 'cached_pipeline', 'data_sources', 'preprocess_text', 'perform_sentiment_analysis',
+                   'train_machine_learning_model']
+
+# Third-party packages reported when a module imports them
+HEAVY_PACKAGES = ['sklearn', 'scipy', 'joblib', 'nltk', 'yfinance', 'plotly', 'aiohttp', 'streamlit', 'pandas']
+
+# Version of the JSON report layout
+REPORT_VERSION = 1
+
+# Script run by the measuring interpreter:- blocks the network, imports the module and reports as JSON
+MEASURE_IMPORT_SCRIPT = """
+import importlib, json, resource, socket, sys, time, tracemalloc
+
+def blocked(*args, **kwargs):
+    raise OSError("network access at import time")
+socket.socket.connect = blocked
+socket.create_connection = blocked
+
+name, trace_memory, packages = sys.argv[1], sys.argv[2] == '1', sys.argv[3].split(',')
+if trace_memory:
+    tracemalloc.start()
+
+start = time.perf_counter()
+importlib.import_module(name)
+seconds = time.perf_counter() - start
+
+peak_bytes = tracemalloc.get_traced_memory()[1] if trace_memory else None
+try:
+    # Peak resident memory of this interpreter(ru_maxrss would include the parent's before the exec)
+    with open('/proc/self/status') as status:
+        rss_kib = int(next(line for line in status if line.startswith('VmHWM')).split()[1])
+except OSError:
+    rss_kib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({'seconds': seconds, 'peak_bytes': peak_bytes, 'rss_bytes': rss_kib * 1024,
+                  'packages': [package for package in packages if package in sys.modules]}))
+"""
+
+# Script measuring the spin-up of a process-pool worker(spawned, like on macOS/Windows) importing a module
+MEASURE_WORKER_SCRIPT = """
+import json, multiprocessing, sys, time
+from concurrent.futures import ProcessPoolExecutor
+
+if __name__ == '__main__':
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as executor:
+        executor.submit(exec, f"import {sys.argv[1]}").result()
+    print(json.dumps({'seconds': time.perf_counter() - start}))
+"""
+
+def run_measurement(script, args):
+    """
+    @Args:- script:- str object containing the measuring script, args:- list object containing its arguments
+    @Description:-
+                This method runs a measuring script in a fresh interpreter from the repository root
+    @Returns:- measurement:- dict object(with 'error' set if the script failed)
+    """
+    completed = subprocess.run([sys.executable, '-c', script, *args], cwd=REPO_ROOT, capture_output=True, text=True)
+
+    if completed.returncode != 0:
+        return {'error': completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else 'failed'}
+
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def measure_module(name, repeat=3, trace_memory=True):
+    """
+    @Args:- name:- str object containing the module name,
+            repeat:- int object containing the number of fresh interpreters measured,
+            trace_memory:- bool object, False skips tracemalloc for undisturbed timings
+    @Description:-
+                This method measures the cold import of a module:- the timings come from untraced interpreters,
+                the peak traced memory from one more interpreter(tracemalloc slows imports down severalfold)
+    @Returns:- metrics:- dict object with the median seconds, the peak traced memory, the peak resident memory
+                        of the process and the heavy packages imported(or 'error')
+    """
+    packages = ','.join(HEAVY_PACKAGES)
+    runs = [run_measurement(MEASURE_IMPORT_SCRIPT, [name, '0', packages]) for _ in range(repeat)]
+    traced_run = run_measurement(MEASURE_IMPORT_SCRIPT, [name, '1', packages]) if trace_memory else {}
+
+    errors = [run['error'] for run in runs + [traced_run] if 'error' in run]
+    if errors:
+        return {'error': errors[0]}
+
+    return {
+        'seconds': statistics.median(run['seconds'] for run in runs),
+        'peak_bytes': traced_run.get('peak_bytes'),
+        'rss_bytes': max(run['rss_bytes'] for run in runs),
+        'packages': runs[0]['packages']
+    }
+
+def measure_worker(name, repeat=3):
+    """
+    @Args:- name:- str object containing the module the worker imports, repeat:- int object
+    @Description:-
+                This method measures the time until a spawned pool worker has imported a module
+    @Returns:- metrics:- dict object with the median seconds(or 'error')
+    """
+    runs = [run_measurement(MEASURE_WORKER_SCRIPT, [name]) for _ in range(repeat)]
+
+    errors = [run['error'] for run in runs if 'error' in run]
+    if errors:
+        return {'error': errors[0]}
+
+    return {'seconds': statistics.median(run['seconds'] for run in runs)}
+
+def print_report(report):
+    """
+    @Args:- report:- dict object in the layout written by main
+    @Description:-
+                This method prints one line per measured module
+    @Returns:-
+    """
+    print(f"{'module':>30} {'seconds':>9} {'peak MB':>9} {'RSS MB':>8}  packages")
+    for name, metrics in report['imports'].items():
+        if 'error' in metrics:
+            print(f"{name:>30}  error:- {metrics['error']}")
+            continue
+        peak = '-' if metrics['peak_bytes'] is None else f"{metrics['peak_bytes'] / 2 ** 20:.1f}"
+        print(f"{name:>30} {metrics['seconds']:>9.3f} {peak:>9} {metrics['rss_bytes'] / 2 ** 20:>8.1f}  "
+              f"{','.join(metrics['packages'])}")
+
+    for name, metrics in report['workers'].items():
+        result = f"error:- {metrics['error']}" if 'error' in metrics else f"{metrics['seconds']:.3f}s"
+        print(f"{'worker:' + name:>30} {result}")
+
+def compare_reports(report, baseline):
+    """
+    @Args:- report, baseline:- dict objects in the layout written by main
+    @Description:-
+                This method prints the import time ratio(current / baseline) of every module the reports share
+    @Returns:-
+    """
+    print(f"\nCompared with {baseline['environment'].get('commit')}(ratio > 1 is slower):-")
+    for section in ('imports', 'workers'):
+        for name, metrics in report[section].items():
+            baseline_metrics = baseline[section].get(name, {})
+            if 'seconds' in metrics and baseline_metrics.get('seconds'):
+                print(f"{section[:-1] + ':' + name:>38}  {metrics['seconds'] / baseline_metrics['seconds']:.2f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the cold start of the app's modules")
+    parser.add_argument('--modules', nargs='+', default=DEFAULT_MODULES, help="modules imported")
+    parser.add_argument('--workers', nargs='*', default=['preprocess_text'],
+                        help="modules imported by a spawned pool worker")
+    parser.add_argument('--repeat', type=int, default=3, help="fresh interpreters per measurement")
+    parser.add_argument('--no-memory', action='store_true', help="skip tracemalloc for undisturbed timings")
+    parser.add_argument('--output', help="JSON report path")
+    parser.add_argument('--baseline', help="JSON report of an earlier commit to compare against")
+    args = parser.parse_args()
+
+    report = {
+        'version': REPORT_VERSION,
+        'environment': get_environment(),
+        'imports': {name: measure_module(name, args.repeat, not args.no_memory) for name in args.modules},
+        'workers': {name: measure_worker(name, args.repeat) for name in args.workers}
+    }
+    print_report(report)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            compare_reports(report, json.load(f))
+
+if __name__ == '__main__':
+    main()
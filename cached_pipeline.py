@@ -0,0 +1,96 @@
+import streamlit as st
+from datetime import datetime
+from stock_price_data import get_stock_data_and_rows, get_company_name
+from fetch_sentiment_data import fetch_sentiment_data
+from preprocess_text import get_cleaned_contents_csv
+from perform_sentiment_analysis import get_sentiments_list
+from combine_sentiment_and_stock_data import get_combined_sentiment_and_stock_data
+from predict_next_trading_day_price import predict_next_trading_day_price
+from trading_day_price_fetcher import fetch_current_stock_price
+from stock_price_plotter import build_stock_price_figure
+from trading_calendar import get_trading_calendar, MARKET_TIMEZONE
+
+# Time-to-live of each kind of cached stage(seconds)
+COMPANY_NAME_TTL = 24 * 60 * 60    # company names practically never change
+HISTORY_TTL = 6 * 60 * 60          # price history, news, model:- also rolled over at market open/close(see below)
+PREDICTION_TTL = 15 * 60           # the prediction uses today's news, which keeps arriving
+CURRENT_PRICE_TTL = 60             # intraday quote
+
+# Maximum number of entries(tickers) kept per cached stage. The bound is process-wide, not per session:- the caches
+# are shared by every Streamlit session(a ticker loaded by one user is instant for the next), so the least recently
+# used entries are evicted once all sessions together have loaded more tickers than this
+MAX_CACHE_ENTRIES = 32
+
+def get_market_cache_epoch(now=None):
+    """
+    @Args:- now:- timezone-aware datetime object(defaults to the current time)
+    @Description:-
+                This method returns a key that changes whenever the market opens or closes(on the trading
+                calendar's sessions and early closes). Every cached stage takes it as an argument, so cached
+                history is reused within one market phase, including across weekends and holidays, and
+                refreshed as soon as a new trading day's data can exist.
+    @Returns:- cache_epoch:- str object of the form 'YYYY-MM-DD:open' or 'YYYY-MM-DD:closed', the date being
+                             the last completed session
+    """
+    now = (now or datetime.now(MARKET_TIMEZONE)).astimezone(MARKET_TIMEZONE)
+    trading_calendar = get_trading_calendar()
+    is_open = trading_calendar.is_open(now)
+
+    return f"{trading_calendar.last_completed_session(now).strftime('%Y-%m-%d')}:{'open' if is_open else 'closed'}"
+
+# Arguments starting with '_' are not hashed by Streamlit:- they are derived from (ticker, cache_epoch),
+# which already identifies the cache entry.
+
+@st.cache_data(ttl=COMPANY_NAME_TTL, max_entries=MAX_CACHE_ENTRIES, show_spinner=False)
+def cached_company_name(ticker):
+    return get_company_name(ticker)
+
+@st.cache_data(ttl=HISTORY_TTL, max_entries=MAX_CACHE_ENTRIES, show_spinner="Downloading stock prices...")
+def cached_stock_data_and_rows(ticker, cache_epoch):
+    return get_stock_data_and_rows(ticker)
+
+@st.cache_data(ttl=HISTORY_TTL, max_entries=MAX_CACHE_ENTRIES, show_spinner="Fetching financial news...")
+def cached_sentiment_data(ticker, cache_epoch):
+    return fetch_sentiment_data(ticker)
+
+@st.cache_data(ttl=HISTORY_TTL, max_entries=MAX_CACHE_ENTRIES, show_spinner="Cleaning the news contents...")
+def cached_cleaned_contents_csv(ticker, cache_epoch, _sentiment_description_list):
+    return get_cleaned_contents_csv(_sentiment_description_list)
+
+@st.cache_data(ttl=HISTORY_TTL, max_entries=MAX_CACHE_ENTRIES, show_spinner=False)
+def cached_combined_data(ticker, cache_epoch, _sentiment_description_list, _stock_data):
+    sentiments_list = get_sentiments_list(_sentiment_description_list)
+    return get_combined_sentiment_and_stock_data(_sentiment_description_list, sentiments_list, _stock_data, ticker)
+
+@st.cache_resource(ttl=HISTORY_TTL, max_entries=MAX_CACHE_ENTRIES, show_spinner="Training the model...")
+def cached_trained_model(ticker, cache_epoch, _combined_data):
+    # scikit-learn is imported on the first training, not when the app starts
+    from train_machine_learning_model import load_or_train_model
+
+    return load_or_train_model(_combined_data, ticker)
+
+def get_trained_model(ticker, cache_epoch, combined_data):
+    """
+    @Args:- ticker:- str object containing the ticker name,
+            cache_epoch:- str object returned by get_market_cache_epoch,
+            combined_data:- dataframe object containing the combined stock and sentiment data
+    @Description:-
+                This method returns the fitted model of the ticker from the resource cache. The fitted
+                objects are shared between sessions, the transformed dataframe is copied per caller
+                since later stages modify it.
+    @Returns:- cv_scores, mae, r2, imputer, scaler, combined_data, model(see get_model_metrics_and_train_model)
+    """
+    cv_scores, mae, r2, imputer, scaler, trained_data, model = cached_trained_model(ticker, cache_epoch, combined_data)
+    return cv_scores, mae, r2, imputer, scaler, trained_data.copy(), model
+
+@st.cache_data(ttl=PREDICTION_TTL, max_entries=MAX_CACHE_ENTRIES, show_spinner="Predicting the next trading day...")
+def cached_prediction(ticker, cache_epoch, _combined_data, _model, _imputer, _scaler):
+    return predict_next_trading_day_price(_combined_data, _model, ticker, _imputer, _scaler)
+
+@st.cache_data(ttl=CURRENT_PRICE_TTL, max_entries=MAX_CACHE_ENTRIES, show_spinner=False)
+def cached_current_stock_price(ticker, cache_epoch):
+    return fetch_current_stock_price(ticker)
+
+@st.cache_data(ttl=HISTORY_TTL, max_entries=MAX_CACHE_ENTRIES, show_spinner=False)
+def cached_stock_price_figure(ticker, cache_epoch, _combined_data):
+    return build_stock_price_figure(_combined_data)
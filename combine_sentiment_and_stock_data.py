@@ -1,36 +1,137 @@
+import numpy as np
 import pandas as pd
+from instrumentation import timed, increment
+from sentiment_index import compute_sentiment_index_rows, get_sentiment_index_at, get_sentiment_index_store
 
-def get_combined_sentiment_and_stock_data(sentiment_description_list,sentiments_list, stock_data):
+# Half-life(hours before the end of the publication day) of the intraday recency weights
+RECENCY_HALF_LIFE_HOURS = 6
+
+# Sentiment labels of an article, ordered like np.sign(polarity) + 1
+SENTIMENT_LABELS = pd.CategoricalDtype(['negative', 'neutral', 'positive'], ordered=True)
+
+# Price columns kept in the combined data
+PRICE_COLUMNS = ['Close', 'High', 'Low', 'Volume']
+
+def aggregate_daily_sentiment(sentiment_description_list, sentiments_list):
+    """
+    @Args:- sentiment_description_list:- dataframe object containing the news frame('date' as datetime64 days, ...),
+            sentiments_list:- dataframe object containing sentiment('compound', 'neg', 'neu', 'pos') of each article
+    @Description:-
+                This method aggregates the article sentiment per publication day in one vectorized pass:-
+                the days are factorized once and every aggregate is a weighted bincount over the day codes
+    @Returns:- daily_sentiment:- dataframe object indexed by the sorted publication days('date') with the columns
+                                 compound(mean of the sign of each article's polarity), neg, neu, pos, polarity(means),
+                                 polarity_std, polarity_recency_weighted, article_count and the
+                                 negative/neutral/positive article counts
+    """
+    days, day_codes = np.unique(sentiment_description_list['date'].to_numpy(), return_inverse=True)
+    day_count = len(days)
+
+    article_counts = np.bincount(day_codes, minlength=day_count)
+
+    def day_mean(values, weights=None):
+        if weights is None:
+            return np.bincount(day_codes, weights=values, minlength=day_count) / article_counts
+        return (np.bincount(day_codes, weights=values * weights, minlength=day_count)
+                / np.bincount(day_codes, weights=weights, minlength=day_count))
+
+    polarity = sentiments_list['compound'].to_numpy(dtype=np.float64)
+    labels = pd.Categorical.from_codes(np.sign(polarity).astype(np.int8) + 1, dtype=SENTIMENT_LABELS)
+
+    # Articles published later in the day weigh more(halved every RECENCY_HALF_LIFE_HOURS before midnight)
+    if 'published_at' in sentiment_description_list:
+        published_at = sentiment_description_list['published_at'].to_numpy()
+        hours_before_end = (days[day_codes] + np.timedelta64(1, 'D') - published_at) / np.timedelta64(1, 'h')
+        recency_weights = np.exp2(-hours_before_end / RECENCY_HALF_LIFE_HOURS)
+    else:
+        recency_weights = np.ones(len(polarity))
+
+    polarity_mean = day_mean(polarity)
+
+    daily_sentiment = pd.DataFrame({
+        'compound': day_mean(np.sign(polarity)),
+        'neg': day_mean(sentiments_list['neg'].to_numpy(dtype=np.float64)),
+        'neu': day_mean(sentiments_list['neu'].to_numpy(dtype=np.float64)),
+        'pos': day_mean(sentiments_list['pos'].to_numpy(dtype=np.float64)),
+        'polarity': polarity_mean,
+        'polarity_std': np.sqrt(np.maximum(day_mean(polarity * polarity) - polarity_mean * polarity_mean, 0)),
+        'polarity_recency_weighted': day_mean(polarity, recency_weights),
+        'article_count': article_counts
+    }, index=pd.DatetimeIndex(days, name='date'))
+
+    # Label counts per day:- one bincount over (day, label) pairs
+    label_counts = np.bincount(day_codes * len(SENTIMENT_LABELS.categories) + labels.codes,
+                               minlength=day_count * len(SENTIMENT_LABELS.categories))
+    label_counts = label_counts.reshape(day_count, len(SENTIMENT_LABELS.categories))
+    for i, label in enumerate(SENTIMENT_LABELS.categories):
+        daily_sentiment[f"{label}_count"] = label_counts[:, i]
+
+    return daily_sentiment
+
+def get_price_frame(stock_data):
+    """
+    @Args:- stock_data:- dataframe object containing stock data(indexed by 'Date' or with a 'Date' column)
+    @Description:-
+                This method selects the price columns on a sorted DatetimeIndex without modifying stock_data
+    @Returns:- prices:- dataframe object indexed by 'Date' with the PRICE_COLUMNS columns
+    """
+    prices = stock_data
+
+    # Check if stock_data has a MultiIndex and flatten it if necessary(on a shallow copy)
+    if isinstance(prices.columns, pd.MultiIndex):
+        prices = prices.copy(deep=False)
+        prices.columns = prices.columns.get_level_values(0)  # Flatten to first level
+
+    if 'Date' in prices.columns:
+        prices = prices.set_index('Date')
+
+    prices = prices[PRICE_COLUMNS]
+    prices.index = pd.DatetimeIndex(prices.index, name='Date')
+
+    if not prices.index.is_monotonic_increasing:
+        prices = prices.sort_index()
+
+    return prices
+
+@timed
+def get_combined_sentiment_and_stock_data(sentiment_description_list,sentiments_list, stock_data, ticker=None):
     """
-    @Args:- sentiment_description_list:- list object containing sentiment of the form('date', 'title', 'content'),
-            sentiments_list:- list object containing sentiment of each sentiment 'content,
-            stock_data:- dataframe object containing stock data
+    @Args:- sentiment_description_list:- dataframe object containing the news frame('date' as datetime64 days, ...),
+            sentiments_list:- dataframe object containing sentiment of each sentiment 'content,
+            stock_data:- dataframe object containing stock data(left unmodified),
+            ticker:- str object containing the ticker name, the sentiment index is then updated incrementally
+                     in(and read from) the sentiment index store instead of being computed from scratch
+                     (from the first day whose news changed)
     @Description:-
-                This method combines sentiment of each sentiment content and stock data
+                This method aggregates the sentiment per day and joins it to every trading day of
+                stock_data on their sorted DatetimeIndex. Days without news keep their row, with the
+                time-decayed sentiment index carrying the earlier news over to them.
     @Returns:- combined_data:- dataframe object that combines stock_data and sentiments_list
+                               (Date, Close, High, Low, Volume, date(NaT without news), the aggregate_daily_sentiment
+                               columns and the SENTIMENT_INDEX_COLUMNS)
     """
 
-    # Create a Dataframe for sentiment scores with timestamps
-    sentiment_df = pd.DataFrame(sentiments_list)
-    # print(sentiment_df)
-    # print(f"Length of sentiments_list: {len(sentiments_list)}")
-    # print(f"Length of sentiment_description_list: {len(sentiment_description_list)}")
+    daily_sentiment = aggregate_daily_sentiment(sentiment_description_list, sentiments_list)
+    prices = get_price_frame(stock_data)
 
-    sentiment_df['date'] = pd.to_datetime([sentiment_description['date']
-                                           for sentiment_description in sentiment_description_list])
-    sentiment_df['compound'] = sentiment_df['compound'].apply(lambda x:-1 if x>0 else {-1 if x<0 else 0})
+    # Same resolution on both sides of the join
+    daily_sentiment.index = daily_sentiment.index.as_unit(prices.index.unit)
 
-    # Group by date and calculate mean for numeric columns
-    grouped_sentiment = sentiment_df.groupby('date').mean(numeric_only=True).reset_index()
+    if ticker is None:
+        index_rows = compute_sentiment_index_rows(daily_sentiment)
+    else:
+        index_rows, written = get_sentiment_index_store().get_index_rows(ticker, daily_sentiment)
+        increment('sentiment_index_days_written', written)
 
-    # Check if stock_data has a MultiIndex and flatten it if necessary
-    if isinstance(stock_data.columns, pd.MultiIndex):
-        stock_data.columns = stock_data.columns.get_level_values(0)  # Flatten to first level
+    # Indexed left join:- every trading day, with or without news(no articles counted on the latter)
+    combined_data = prices.join(daily_sentiment, how='left')
+    has_news = combined_data['article_count'].notna()
+    count_columns = [column for column in daily_sentiment.columns if column.endswith('_count')]
+    combined_data[count_columns] = combined_data[count_columns].fillna(0).astype(np.int64)
 
-    # Merge with stock price data on date
-    stock_data.reset_index(inplace=True)
+    combined_data.insert(len(PRICE_COLUMNS), 'date', combined_data.index.where(has_news))
+    combined_data = combined_data.join(get_sentiment_index_at(index_rows, prices.index))
+    combined_data = combined_data.reset_index()
 
-    combined_data = pd.merge(stock_data[['Date', 'Close', 'High', 'Low', 'Volume']], grouped_sentiment,
-                             left_on='Date', right_on='date', how='inner')
-    # print(combined_data)
-    return combined_data
\ No newline at end of file
+    increment('combined_rows', len(combined_data))
+    return combined_data
@@ -0,0 +1,419 @@
+import asyncio
+import os
+import json
+import threading
+from abc import ABC, abstractmethod
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+from async_data import get_async_client, run_sync
+from instrumentation import increment
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Backend selection:- 'live'(default), 'record'(live + save fixtures) or 'replay'(fixtures only, offline)
+DATA_SOURCE_ENV = 'DATA_SOURCE'
+DATA_FIXTURES_DIR_ENV = 'DATA_FIXTURES_DIR'
+DEFAULT_FIXTURES_DIR = 'fixtures'
+
+class DataSource(ABC):
+    """
+    Interface of every external data entry point of the pipeline:- the EOD news API and yfinance.
+
+    A backend must implement every abstract method, an incomplete one can't be instantiated.
+    """
+
+    @abstractmethod
+    def fetch_news(self, ticker, start, end, limit):
+        """
+        @Args:- ticker:- str object containing the ticker name,
+                start, end:- str objects containing the inclusive date range('YYYY-MM-DD'),
+                limit:- int object containing the maximum number of articles
+        @Description:-
+                    This method fetches the raw news articles of the ticker
+        @Returns:- (status_code, news_data):- int object and list object(None unless status_code is 200)
+        """
+        pass
+
+    @abstractmethod
+    def download_prices(self, tickers, start, end):
+        """
+        @Args:- tickers:- str object(one ticker) or list object(several tickers),
+                start:- str object containing the first date('YYYY-MM-DD'),
+                end:- str object containing the exclusive end date('YYYY-MM-DD')
+        @Description:-
+                    This method downloads daily OHLCV bars like yf.download
+        @Returns:- stock_data:- dataframe object indexed by 'Date'(flat columns for one ticker,
+                   (ticker, field) columns for a list of tickers)
+        """
+        pass
+
+    @abstractmethod
+    def get_company_info(self, ticker):
+        """
+        @Args:- ticker:- str object containing the ticker name
+        @Description:-
+                    This method returns the company information(like yf.Ticker(ticker).info)
+        @Returns:- info:- dict object
+        """
+        pass
+
+    @abstractmethod
+    def get_history(self, ticker, period):
+        """
+        @Args:- ticker:- str object containing the ticker name,
+                period:- str object containing a yfinance period(e.g. '1d')
+        @Description:-
+                    This method returns the recent price history(like yf.Ticker(ticker).history(period))
+        @Returns:- stock_data:- dataframe object
+        """
+        pass
+
+    async def fetch_news_async(self, ticker, start, end, limit):
+        """
+        @Args:- same as fetch_news
+        @Description:-
+                    This method is the coroutine version of fetch_news(to be awaited on the background event
+                    loop of async_data). By default the synchronous fetch_news runs in a worker thread.
+        @Returns:- same as fetch_news
+        """
+        return await asyncio.to_thread(self.fetch_news, ticker, start, end, limit)
+
+class LiveDataSource(DataSource):
+    """
+    Data source backed by the live EOD news API and yfinance, both accessed through the shared
+    AsyncDataClient:- one connection pool for every session, retries with backoff and coalescing
+    of identical concurrent requests. The synchronous methods wait on the background event loop.
+    """
+
+    def __init__(self, api_url=None, api_key=None):
+        self.api_url = api_url or os.getenv('EOD_API_URL')
+        self.api_key = api_key or os.getenv('EOD_API_TOKEN')
+
+    async def fetch_news_async(self, ticker, start, end, limit):
+        status_code, content = await get_async_client().get(self.api_url, {
+            's': ticker.upper(), 'from': start, 'to': end, 'limit': limit, 'api_token': self.api_key, 'fmt': 'json'})
+
+        if status_code == 200:
+            # Decoded per caller, so coalesced callers never share the article objects.
+            # orjson decodes large pages noticeably faster when it is installed
+            return status_code, orjson.loads(content) if orjson else json.loads(content)
+
+        return status_code, None
+
+    def fetch_news(self, ticker, start, end, limit):
+        return run_sync(self.fetch_news_async(ticker, start, end, limit))
+
+    def _download_prices(self, tickers, start, end):
+        # yfinance is imported on first use(it is slow to import and only the live source needs it)
+        import yfinance as yf
+
+        increment('price_downloads')
+        if isinstance(tickers, str):
+            return yf.download(tickers, start=start, end=end, progress=False)
+
+        return yf.download(tickers, start=start, end=end, group_by='ticker', threads=True, progress=False)
+
+    def _get_company_info(self, ticker):
+        import yfinance as yf
+
+        increment('company_info_requests')
+        return yf.Ticker(ticker).info
+
+    def _get_history(self, ticker, period):
+        import yfinance as yf
+
+        return yf.Ticker(ticker).history(period=period)
+
+    def download_prices(self, tickers, start, end):
+        key = ('download_prices', tickers if isinstance(tickers, str) else tuple(tickers), start, end)
+        stock_data = run_sync(get_async_client().run_blocking(key, self._download_prices, tickers, start, end))
+
+        # Coalesced callers get their own copy
+        return stock_data.copy()
+
+    def get_company_info(self, ticker):
+        info = run_sync(get_async_client().run_blocking(('company_info', ticker.upper()), self._get_company_info, ticker))
+        return dict(info)
+
+    def get_history(self, ticker, period):
+        stock_data = run_sync(get_async_client().run_blocking(
+            ('history', ticker.upper(), period), self._get_history, ticker, period))
+        return stock_data.copy()
+
+def flatten_price_columns(stock_data):
+    """
+    @Args:- stock_data:- dataframe object returned by yf.download for one ticker
+    @Description:-
+                This method drops the ticker level of a (Price, Ticker) column MultiIndex
+    @Returns:- stock_data:- dataframe object with flat columns
+    """
+    if isinstance(stock_data.columns, pd.MultiIndex):
+        stock_data = stock_data.copy()
+        stock_data.columns = stock_data.columns.get_level_values(0)
+
+    return stock_data
+
+class RecordedDataSource(DataSource):
+    """
+    Offline data source replaying fixtures from a directory:-
+        news/<TICKER>/<start>_<end>_<limit>.json   raw news API responses
+        prices/<TICKER>.csv                        daily bars(Date, Open, High, Low, Close, Volume)
+        info/<TICKER>.json                         company information
+    Missing news fixtures are answered with an empty article list, missing prices with an empty frame.
+    """
+
+    def __init__(self, directory=DEFAULT_FIXTURES_DIR):
+        self.directory = directory
+        self._prices = {}
+        self._lock = threading.Lock()
+
+    def news_path(self, ticker, start, end, limit):
+        return os.path.join(self.directory, 'news', ticker.upper(), f"{start}_{end}_{limit}.json")
+
+    def prices_path(self, ticker):
+        return os.path.join(self.directory, 'prices', f"{ticker.upper()}.csv")
+
+    def info_path(self, ticker):
+        return os.path.join(self.directory, 'info', f"{ticker.upper()}.json")
+
+    def fetch_news(self, ticker, start, end, limit):
+        try:
+            with open(self.news_path(ticker, start, end, limit), encoding='utf-8') as f:
+                return 200, json.load(f)
+        except FileNotFoundError:
+            return 200, []
+
+    def _load_prices(self, ticker):
+        ticker = ticker.upper()
+
+        with self._lock:
+            if ticker not in self._prices:
+                try:
+                    self._prices[ticker] = pd.read_csv(self.prices_path(ticker), index_col='Date', parse_dates=['Date'])
+                except FileNotFoundError:
+                    self._prices[ticker] = pd.DataFrame(columns=['Open', 'High', 'Low', 'Close', 'Volume'],
+                                                        index=pd.DatetimeIndex([], name='Date'))
+
+        return self._prices[ticker]
+
+    def download_prices(self, tickers, start, end):
+        if isinstance(tickers, str):
+            stock_data = self._load_prices(tickers)
+            return stock_data[(stock_data.index >= start) & (stock_data.index < end)].copy()
+
+        return pd.concat({ticker.upper(): self.download_prices(ticker, start, end) for ticker in tickers}, axis=1)
+
+    def get_company_info(self, ticker):
+        try:
+            with open(self.info_path(ticker), encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def get_history(self, ticker, period):
+        # Only the most recent bar is replayed(the pipeline asks for period='1d')
+        return self._load_prices(ticker).tail(1).copy()
+
+    def _write_json(self, path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+
+    def write_news(self, ticker, start, end, limit, news_data):
+        """
+        @Args:- ticker, start, end, limit:- request parameters(see fetch_news),
+                news_data:- list object containing the raw articles
+        @Description:-
+                    This method saves a news response as a fixture
+        @Returns:-
+        """
+        self._write_json(self.news_path(ticker, start, end, limit), news_data)
+
+    def write_company_info(self, ticker, info):
+        """
+        @Args:- ticker:- str object containing the ticker name, info:- dict object containing the company information
+        @Description:-
+                    This method saves the company information(only the fields the pipeline reads) as a fixture
+        @Returns:-
+        """
+        self._write_json(self.info_path(ticker), {'longName': info.get('longName')})
+
+    def write_prices(self, ticker, stock_data):
+        """
+        @Args:- ticker:- str object containing the ticker name,
+                stock_data:- dataframe object containing daily bars of the ticker
+        @Description:-
+                    This method merges daily bars into the price fixture of the ticker
+        @Returns:-
+        """
+        stock_data = flatten_price_columns(stock_data).dropna(how='all')
+        if stock_data.empty:
+            return
+
+        with self._lock:
+            path = self.prices_path(ticker)
+            if os.path.exists(path):
+                recorded = pd.read_csv(path, index_col='Date', parse_dates=['Date'])
+                stock_data = pd.concat([recorded, stock_data])
+                stock_data = stock_data[~stock_data.index.duplicated(keep='last')]
+
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            stock_data.sort_index().rename_axis('Date').to_csv(path)
+            self._prices.pop(ticker.upper(), None)
+
+class RecordingDataSource(RecordedDataSource):
+    """
+    Live data source that also saves every response as a fixture for RecordedDataSource.
+    """
+
+    def __init__(self, directory=DEFAULT_FIXTURES_DIR, live_source=None):
+        super().__init__(directory)
+        self.live_source = live_source or LiveDataSource()
+
+    def fetch_news(self, ticker, start, end, limit):
+        status_code, news_data = self.live_source.fetch_news(ticker, start, end, limit)
+
+        if status_code == 200:
+            self.write_news(ticker, start, end, limit, news_data)
+
+        return status_code, news_data
+
+    async def fetch_news_async(self, ticker, start, end, limit):
+        status_code, news_data = await self.live_source.fetch_news_async(ticker, start, end, limit)
+
+        if status_code == 200:
+            await asyncio.to_thread(self.write_news, ticker, start, end, limit, news_data)
+
+        return status_code, news_data
+
+    def download_prices(self, tickers, start, end):
+        stock_data = self.live_source.download_prices(tickers, start, end)
+
+        if isinstance(tickers, str):
+            self.write_prices(tickers, stock_data)
+        else:
+            for ticker in tickers:
+                if isinstance(stock_data.columns, pd.MultiIndex) and ticker in stock_data.columns.get_level_values(0):
+                    self.write_prices(ticker, stock_data[ticker])
+
+        return stock_data
+
+    def get_company_info(self, ticker):
+        info = self.live_source.get_company_info(ticker)
+        self.write_company_info(ticker, info)
+        return info
+
+    def get_history(self, ticker, period):
+        return self.live_source.get_history(ticker, period)
+
+def write_synthetic_fixtures(directory, tickers, start='2024-01-01', end=None, articles_per_day=5, seed=0):
+    """
+    @Args:- directory:- str object containing the fixtures directory,
+            tickers:- list object containing the ticker names,
+            start:- str object containing the first date('YYYY-MM-DD'),
+            end:- str object containing the last date('YYYY-MM-DD', defaults to the last completed trading session
+                  like fetch_sentiment_data, so the last month window has the same file name),
+            articles_per_day:- int object containing the number of articles generated per calendar day,
+            seed:- int object seeding the random generator
+    @Description:-
+                This method writes random-walk prices, company information and news(one file per
+                month window, as requested by fetch_sentiment_data) for offline runs at any scale
+    @Returns:-
+    """
+    from fetch_sentiment_data import get_month_windows, NEWS_PAGE_LIMIT
+    from trading_calendar import get_trading_calendar
+
+    rng = np.random.default_rng(seed)
+    days = pd.date_range(start, end or get_trading_calendar().last_completed_session(), freq='D')
+    sessions = days[days.dayofweek < 5]
+    source = RecordedDataSource(directory)
+
+    for ticker in tickers:
+        ticker = ticker.upper()
+
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, len(sessions))))
+        prices = pd.DataFrame({
+            'Open': close * (1 + rng.normal(0, 0.002, len(sessions))),
+            'High': close * (1 + rng.random(len(sessions)) * 0.01),
+            'Low': close * (1 - rng.random(len(sessions)) * 0.01),
+            'Close': close,
+            'Volume': rng.integers(1000000, 10000000, len(sessions)).astype(float)
+        }, index=sessions.rename('Date'))
+        source.write_prices(ticker, prices)
+        source.write_company_info(ticker, {'longName': f"{ticker} Synthetic Inc."})
+
+        for month_start, month_end in get_month_windows(days[0], days[-1]):
+            month_days = days[(days >= month_start) & (days <= month_end)]
+            news_data = []
+            for day in month_days:
+                for i in range(articles_per_day):
+                    neg, neu, pos = rng.dirichlet([1, 4, 1])
+                    news_data.append({
+                        'date': f"{day.strftime('%Y-%m-%d')}T{12 + i % 8:02d}:00:00+00:00",
+                        'title': f"{ticker} headline {day.strftime('%Y-%m-%d')} #{i}",
+                        'content': f"{ticker} shares moved as analysts reviewed the quarter. Continue reading",
+                        'symbols': [f"{ticker}.US"],
+                        'sentiment': {'polarity': float(pos - neg), 'neg': float(neg), 'neu': float(neu), 'pos': float(pos)}
+                    })
+            source.write_news(ticker, month_start, month_end, NEWS_PAGE_LIMIT, news_data[:NEWS_PAGE_LIMIT])
+
+# Shared data source (created lazily on first use from the DATA_SOURCE environment variable)
+_data_source = None
+_data_source_lock = threading.Lock()
+
+def create_data_source(kind=None, directory=None):
+    """
+    @Args:- kind:- str object, 'live', 'record' or 'replay'(defaults to $DATA_SOURCE or 'live'),
+            directory:- str object containing the fixtures directory(defaults to $DATA_FIXTURES_DIR or 'fixtures')
+    @Description:-
+                This method creates a data source backend
+    @Returns:- data_source:- DataSource object
+    """
+    kind = (kind or os.getenv(DATA_SOURCE_ENV) or 'live').lower()
+    directory = directory or os.getenv(DATA_FIXTURES_DIR_ENV) or DEFAULT_FIXTURES_DIR
+
+    if kind == 'live':
+        return LiveDataSource()
+    if kind == 'record':
+        return RecordingDataSource(directory)
+    if kind == 'replay':
+        return RecordedDataSource(directory)
+
+    raise ValueError(f"Unknown data source '{kind}', expected 'live', 'record' or 'replay'.")
+
+def get_data_source():
+    """
+    @Args:- None
+    @Description:-
+                This method returns the process-wide data source used by every data entry point
+    @Returns:- data_source:- DataSource object
+    """
+    global _data_source
+
+    if _data_source is None:
+        with _data_source_lock:
+            if _data_source is None:
+                _data_source = create_data_source()
+
+    return _data_source
+
+def set_data_source(data_source):
+    """
+    @Args:- data_source:- DataSource object(None resets to the $DATA_SOURCE default)
+    @Description:-
+                This method swaps the process-wide data source, e.g. for offline benchmarks
+    @Returns:- previous_data_source:- DataSource object that was in use(None if none was created yet)
+    """
+    global _data_source
+
+    with _data_source_lock:
+        previous_data_source, _data_source = _data_source, data_source
+
+    return previous_data_source
@@ -0,0 +1,269 @@
+import math
+import threading
+from collections import OrderedDict, deque
+import pandas as pd
+from indicators import average_gain_and_loss, average_true_range, rsi_from_averages
+from instrumentation import increment
+from sentiment_index import SENTIMENT_INDEX_COLUMNS
+
+# Technical indicator columns computed from the price data
+TECHNICAL_FEATURE_COLUMNS = ['daily_return', 'SMA_5', 'SMA_20', 'RSI', 'MACD', 'ATR', 'avg_volume_5', 'prev_close']
+
+# Sentiment columns taken as-is from the combined data(the day's news and the time-decayed sentiment index)
+SENTIMENT_FEATURE_COLUMNS = ['neg', 'neu', 'pos'] + SENTIMENT_INDEX_COLUMNS
+
+# Feature columns(in order) the model is trained and predicts on
+MODEL_FEATURE_COLUMNS = SENTIMENT_FEATURE_COLUMNS + TECHNICAL_FEATURE_COLUMNS
+
+# Window lengths and EMA spans of the indicators
+SMA_SHORT_WINDOW = 5
+SMA_LONG_WINDOW = 20
+RSI_WINDOW = 14
+ATR_WINDOW = 14
+VOLUME_WINDOW = 5
+MACD_FAST_SPAN = 12
+MACD_SLOW_SPAN = 26
+
+# Maximum number of tickers whose rolling feature state is kept in memory, least recently used are dropped first
+MAX_FEATURE_STATES = 256
+
+def compute_technical_features(price_data):
+    """
+    @Args:- price_data:- dataframe object containing the 'Close', 'High', 'Low' and 'Volume' columns(sorted by date)
+    @Description:-
+                This method computes every technical indicator of every row in one vectorized pass
+    @Returns:- features:- dataframe object containing TECHNICAL_FEATURE_COLUMNS, aligned to price_data's index
+    """
+    close = price_data['Close']
+    high = price_data['High']
+    low = price_data['Low']
+
+    features = pd.DataFrame(index=price_data.index)
+
+    # Calculate daily returns
+    features['daily_return'] = close.pct_change()
+
+    # Calculate moving averages
+    features['SMA_5'] = close.rolling(window=SMA_SHORT_WINDOW).mean()
+    features['SMA_20'] = close.rolling(window=SMA_LONG_WINDOW).mean()
+
+    # Calculate RSI (14-day)
+    gain, loss = average_gain_and_loss(close.to_numpy(), RSI_WINDOW)
+    features['RSI'] = rsi_from_averages(gain, loss)
+
+    # Calculate MACD
+    ema_fast = close.ewm(span=MACD_FAST_SPAN, adjust=False).mean()
+    ema_slow = close.ewm(span=MACD_SLOW_SPAN, adjust=False).mean()
+    features['MACD'] = ema_fast - ema_slow
+
+    # Calculate ATR (14-day)
+    features['ATR'] = average_true_range(high.to_numpy(), low.to_numpy(), close.to_numpy(), ATR_WINDOW)
+
+    # Calculate average volume over a specified period
+    features['avg_volume_5'] = price_data['Volume'].rolling(window=VOLUME_WINDOW).mean()
+
+    # Lagged features
+    features['prev_close'] = close.shift(1)
+
+    return features
+
+class IncrementalFeatureState:
+    """
+    Rolling state of the technical indicators of one ticker.
+
+    Keeps the window contents and EMA accumulators, so that appending one new trading
+    day updates every indicator in O(1) instead of recomputing the whole history.
+    The values match compute_technical_features row for row.
+    """
+
+    __slots__ = ('last_close', 'closes_short', 'closes_long', 'gains', 'losses', 'true_ranges',
+                 'volumes', 'ema_fast', 'ema_slow', 'latest')
+
+    def __init__(self):
+        """
+        @Args:- None
+        @Description:-
+                    This method creates an empty state(no trading day seen yet)
+        @Returns:-
+        """
+        self.last_close = None
+        self.closes_short = deque(maxlen=SMA_SHORT_WINDOW)
+        self.closes_long = deque(maxlen=SMA_LONG_WINDOW)
+        self.gains = deque(maxlen=RSI_WINDOW)
+        self.losses = deque(maxlen=RSI_WINDOW)
+        self.true_ranges = deque(maxlen=ATR_WINDOW)
+        self.volumes = deque(maxlen=VOLUME_WINDOW)
+        self.ema_fast = None
+        self.ema_slow = None
+        self.latest = None
+
+    @classmethod
+    def from_frame(cls, price_data):
+        """
+        @Args:- price_data:- dataframe object containing the 'Close', 'High', 'Low' and 'Volume' columns(sorted by date)
+        @Description:-
+                    This method builds the state by replaying the whole price history once
+        @Returns:- IncrementalFeatureState object positioned after the last row of price_data
+        """
+        state = cls()
+        for close, high, low, volume in price_data[['Close', 'High', 'Low', 'Volume']].itertuples(index=False, name=None):
+            state.update(close, high, low, volume)
+
+        return state
+
+    @staticmethod
+    def _window_mean(window):
+        # Rolling means are only defined once the window is full(same as pandas rolling(window=n))
+        if len(window) < window.maxlen:
+            return math.nan
+        return sum(window) / window.maxlen
+
+    def update(self, close, high, low, volume):
+        """
+        @Args:- close, high, low, volume:- float objects containing the prices and volume of the new trading day
+        @Description:-
+                    This method appends one trading day to the state in O(1)
+        @Returns:- features:- dict object containing TECHNICAL_FEATURE_COLUMNS of the new trading day
+        """
+        last_close = self.last_close
+
+        if last_close is None:
+            daily_return = math.nan
+            gain = loss = 0.0
+            true_range = high - low
+        else:
+            daily_return = (close - last_close) / last_close
+            delta = close - last_close
+            gain = delta if delta > 0 else 0.0
+            loss = -delta if delta < 0 else 0.0
+            true_range = max(max(high - low, abs(high - last_close)), abs(low - last_close))
+
+        self.closes_short.append(close)
+        self.closes_long.append(close)
+        self.gains.append(gain)
+        self.losses.append(loss)
+        self.true_ranges.append(true_range)
+        self.volumes.append(volume)
+
+        # EMA accumulators(adjust=False recursion, seeded with the first close)
+        if self.ema_fast is None:
+            self.ema_fast = self.ema_slow = close
+        else:
+            alpha_fast = 2 / (MACD_FAST_SPAN + 1)
+            alpha_slow = 2 / (MACD_SLOW_SPAN + 1)
+            self.ema_fast = alpha_fast * close + (1 - alpha_fast) * self.ema_fast
+            self.ema_slow = alpha_slow * close + (1 - alpha_slow) * self.ema_slow
+
+        self.latest = {
+            'daily_return': daily_return,
+            'SMA_5': self._window_mean(self.closes_short),
+            'SMA_20': self._window_mean(self.closes_long),
+            'RSI': float(rsi_from_averages(self._window_mean(self.gains), self._window_mean(self.losses))),
+            'MACD': self.ema_fast - self.ema_slow,
+            'ATR': self._window_mean(self.true_ranges),
+            'avg_volume_5': self._window_mean(self.volumes),
+            'prev_close': math.nan if last_close is None else last_close
+        }
+        self.last_close = close
+
+        return self.latest
+
+class FeatureStateCache:
+    """
+    In-memory rolling feature states per ticker.
+
+    Each state remembers the history it was built from(first day, last day and number of rows), so a
+    later call with the same history plus newer trading days only appends the new days. A history that
+    doesn't extend the stored one(another start, a revised last close, rows added or removed) rebuilds it.
+    """
+
+    def __init__(self, max_entries=MAX_FEATURE_STATES):
+        """
+        @Args:- max_entries:- int object containing the maximum number of tickers kept
+        @Description:-
+                    This method creates an empty cache
+        @Returns:-
+        """
+        self.max_entries = max_entries
+
+        # States are shared between sessions, every access goes through the lock
+        self._lock = threading.Lock()
+        self._states = OrderedDict()
+
+    def get_latest(self, ticker, price_data):
+        """
+        @Args:- ticker:- str object containing the ticker name,
+                price_data:- dataframe object containing the 'Date', 'Close', 'High', 'Low' and 'Volume' columns
+                             (sorted by date)
+        @Description:-
+                    This method advances the ticker's state over the trading days it hasn't seen yet, or
+                    rebuilds it when price_data doesn't extend the history it was built from
+        @Returns:- features:- dict object containing TECHNICAL_FEATURE_COLUMNS of the last row
+        """
+        dates = pd.DatetimeIndex(price_data['Date'])
+        if len(dates) == 0:
+            return IncrementalFeatureState().latest
+
+        ticker = ticker.upper()
+
+        with self._lock:
+            entry = self._states.pop(ticker, None)
+
+            start = 0
+            if entry is not None:
+                state, first_date, last_date, rows = entry
+                if (dates[0] == first_date and len(dates) >= rows and dates[rows - 1] == last_date and
+                        price_data['Close'].iloc[rows - 1] == state.last_close):
+                    start = rows
+            if start == 0:
+                state = IncrementalFeatureState()
+
+            new_rows = price_data[['Close', 'High', 'Low', 'Volume']].iloc[start:]
+            for close, high, low, volume in new_rows.itertuples(index=False, name=None):
+                state.update(close, high, low, volume)
+            increment('feature_days_appended', len(new_rows))
+
+            self._states[ticker] = (state, dates[0], dates[-1], len(dates))
+            while len(self._states) > self.max_entries:
+                self._states.popitem(last=False)
+
+            return dict(state.latest)
+
+# Shared cache instance (created lazily on first use)
+_feature_state_cache = None
+_feature_state_cache_lock = threading.Lock()
+
+def get_feature_state_cache():
+    """
+    @Args:- None
+    @Description:-
+                This method returns the process-wide FeatureStateCache instance
+    @Returns:- feature_state_cache:- FeatureStateCache object
+    """
+    global _feature_state_cache
+
+    if _feature_state_cache is None:
+        with _feature_state_cache_lock:
+            if _feature_state_cache is None:
+                _feature_state_cache = FeatureStateCache()
+
+    return _feature_state_cache
+
+def get_latest_technical_features(combined_data, ticker=None):
+    """
+    @Args:- combined_data:- dataframe object containing the stock data(sorted by date), optionally with the
+                            feature columns already computed by compute_technical_features,
+            ticker:- str object containing the ticker name(None replays the whole history)
+    @Description:-
+                This method returns the technical indicators of the most recent trading day. Precomputed
+                feature columns are read directly. Otherwise the ticker's rolling state is advanced over the
+                trading days added since the last call(see FeatureStateCache), or replayed once without a ticker.
+    @Returns:- features:- dict object containing TECHNICAL_FEATURE_COLUMNS of the last row
+    """
+    if all(column in combined_data.columns for column in TECHNICAL_FEATURE_COLUMNS):
+        return combined_data[TECHNICAL_FEATURE_COLUMNS].iloc[-1].to_dict()
+
+    if ticker is not None and 'Date' in combined_data.columns:
+        return get_feature_state_cache().get_latest(ticker, combined_data)
+
+    return IncrementalFeatureState.from_frame(combined_data).latest
@@ -1,99 +1,222 @@
-import os
-import requests
-from datetime import datetime, timedelta
-import pytz
+import asyncio
+from datetime import datetime
 import calendar
-from dotenv import load_dotenv
+from data_sources import get_data_source
+from news_cache import get_news_cache
+from news_frame import news_frame_from_articles, SENTIMENT_SCORE_COLUMNS
+from local_sentiment import score_missing_sentiment
+from async_data import run_sync
+from instrumentation import timed, increment
+from trading_calendar import get_trading_calendar, MARKET_TIMEZONE
 
-# Load environment variables from .env file
-load_dotenv()
+# Maximum number of month windows fetched concurrently
+DEFAULT_MAX_WORKERS = 8
 
-# Accessing the API key and URL
-api_key = os.getenv('EOD_API_TOKEN')
-api_url = os.getenv('EOD_API_URL')
+# Maximum number of articles requested per month window
+NEWS_PAGE_LIMIT = 1000
 
-# Create an empty list to store descriptions
-description_list = []
-
-def fetch_sentiment_data(ticker):
+def get_month_windows(start_date, end_date):
     """
-    @Args:- ticker:- str object containing the ticker name of the financial company
+    @Args:- start_date:- timezone-aware datetime object of the first day to fetch,
+            end_date:- timezone-aware datetime object of the last day to fetch
     @Description:-
-                This method makes a request to the financial model api website and
-                fetches the news regarding the ticker.
-    @Returns:- description_list:- list object containing all descriptions for the ticker
+                This method splits the range [start_date, end_date] into calendar month
+                windows, the last window being clipped to end_date
+    @Returns:- month_windows:- list of (start_of_month, end_of_month) 'YYYY-MM-DD' str tuples in date order
     """
 
-    # Parse the start date
-    start_date = datetime.strptime('2024-01-01', '%Y-%m-%d')
-
-    # Define your timezone
-    timezone = pytz.timezone("US/Eastern")
-
-    # Get current date and time in the specified timezone
-    now_date = datetime.now(timezone)
-
-    # Get yesterday's date(since training data should be upto previous date)
-    yesterday_date = now_date - timedelta(days=1)
-
-    # Make start date timezone-aware
-    start_date = timezone.localize(start_date)
+    month_windows = []
 
     # Initialize current date to the first day of the start month
     current_date = start_date.replace(day=1)
 
-    while current_date <= yesterday_date:
-        print(current_date, yesterday_date)
+    while current_date <= end_date:
         # Get the last day of the current month
         last_day = calendar.monthrange(current_date.year, current_date.month)[1]
 
-        # Format the start and end dates
+        # Format the start and end dates(never past end_date)
         start_of_month = current_date.strftime("%Y-%m-%d")
-        end_of_month = current_date.replace(day=last_day).strftime("%Y-%m-%d")
+        end_of_month = min(current_date.replace(day=last_day), end_date).strftime("%Y-%m-%d")
+
+        month_windows.append((start_of_month, end_of_month))
 
         # Move to the first day of the next month
-        if current_date.month == 12 and current_date <= yesterday_date:
-            # If it's December and we're still within the range of yesterday, set end_of_month to yesterday's date
-            end_of_month = yesterday_date.strftime("%Y-%m-%d")
+        if current_date.month == 12:
             current_date = current_date.replace(year=current_date.year + 1, month=1)
         else:
             current_date = current_date.replace(month=current_date.month + 1)
 
-        response = requests.get(f"{api_url}?s={ticker.upper()}&from={start_of_month}&to={end_of_month}&limit=1000&api_token={api_key}&fmt=json")
+    return month_windows
+
+async def fetch_month_news_async(ticker, start_of_month, end_of_month):
+    """
+    @Args:- ticker:- str object containing the ticker name of the financial company,
+            start_of_month:- str object containing the window start date('YYYY-MM-DD'),
+            end_of_month:- str object containing the window end date('YYYY-MM-DD')
+    @Description:-
+                This method fetches the raw news of one month window from the configured
+                data source(the live API over the shared async HTTP client by default)
+    @Returns:- news_data:- list object containing the raw articles(None if the request failed)
+    """
+
+    status_code, news_data = await get_data_source().fetch_news_async(ticker, start_of_month, end_of_month, NEWS_PAGE_LIMIT)
 
-        if response.status_code == 200:
-            news_data = response.json()
-            print(f"Fetched financial sentiment data from {start_of_month} to {end_of_month}")
+    if status_code == 200:
+        increment('news_windows_fetched')
+        return news_data
 
-            for article in news_data:
+    print(f"Failed to retrieve data: {status_code}")
+    return None
 
-                # Convert date format from '2024-12-22T12:00:00+00:00' to '23 Aug 2024'
-                original_date = article['date']
+def fetch_month_news(ticker, start_of_month, end_of_month):
+    """
+    @Args:- same as fetch_month_news_async
+    @Description:-
+                This method fetches the raw news of one month window from a synchronous caller
+    @Returns:- news_data:- list object containing the raw articles(None if the request failed)
+    """
+    return run_sync(fetch_month_news_async(ticker, start_of_month, end_of_month))
 
-                # Fixing the timezone format if necessary
-                if original_date.endswith('+00:0'):
-                    original_date = original_date[:-1] + '00'  # Change '+00:0' to '+00:00'
+def is_closed_month_window(start_of_month, end_of_month, yesterday):
+    """
+    @Args:- start_of_month:- str object containing the window start date('YYYY-MM-DD'),
+            end_of_month:- str object containing the window end date('YYYY-MM-DD'),
+            yesterday:- str object containing the last fetched date('YYYY-MM-DD')
+    @Description:-
+                This method checks whether a month window is complete, i.e. it covers the whole
+                calendar month and that month ended before yesterday. The news of a closed month
+                no longer changes and can be served from the cache.
+    @Returns:- bool:- True if the month window is closed, False otherwise
+    """
+    month_start = datetime.strptime(start_of_month, "%Y-%m-%d")
+    last_day = calendar.monthrange(month_start.year, month_start.month)[1]
 
-                # Convert to datetime and format as needed
-                try:
-                    formatted_date = datetime.fromisoformat(original_date).strftime('%d %b %Y')
-                except ValueError as e:
-                    print(f"Error parsing date '{original_date}': {e}")
-                    continue  # Skip this article if there's an error
+    return end_of_month == month_start.replace(day=last_day).strftime("%Y-%m-%d") and end_of_month < yesterday
 
-                if article.get('sentiment') is not None:
-                    # 'sentiment' value should not be None
-                    # Create a dictionary for each article with formatted date, title,content and sentiment
-                    article_object = {
-                        "date": formatted_date,
-                        "title": article['title'],
-                        "content": article['content'],
-                        "sentiment": article['sentiment']
-                    }
+async def fetch_month_news_cached_async(ticker, start_of_month, end_of_month, yesterday, use_cache=True):
+    """
+    @Args:- ticker:- str object containing the ticker name of the financial company,
+            start_of_month:- str object containing the window start date('YYYY-MM-DD'),
+            end_of_month:- str object containing the window end date('YYYY-MM-DD'),
+            yesterday:- str object containing the last fetched date('YYYY-MM-DD'),
+            use_cache:- bool object, False bypasses the on-disk news cache
+    @Description:-
+                This method serves closed month windows from the on-disk news cache and
+                only fetches the open current month and missing months from the API
+    @Returns:- news_data:- list object containing the raw articles(None if the request failed)
+    """
+    closed = use_cache and is_closed_month_window(start_of_month, end_of_month, yesterday)
 
-                    description_list.append(article_object)
+    if closed:
+        news_data = await asyncio.to_thread(get_news_cache().get, ticker, start_of_month, end_of_month)
+        if news_data is not None:
+            increment('news_cache_hits')
+            return news_data
+        increment('news_cache_misses')
 
-        else:
-            print(f"Failed to retrieve data: {response.status_code}")
+    news_data = await fetch_month_news_async(ticker, start_of_month, end_of_month)
+
+    # Only successful responses of closed months are cached
+    if closed and news_data is not None:
+        await asyncio.to_thread(get_news_cache().put, ticker, start_of_month, end_of_month, news_data)
+
+    return news_data
+
+@timed
+def fetch_sentiment_data(ticker, max_workers=DEFAULT_MAX_WORKERS, use_cache=True, score_workers=None):
+    """
+    @Args:- ticker:- str object containing the ticker name of the financial company,
+            max_workers:- int object containing the maximum number of month windows fetched concurrently,
+            use_cache:- bool object, False bypasses the on-disk news and sentiment score caches,
+            score_workers:- int object containing the number of processes scoring the articles without
+                            API sentiment(None or 1 scores them serially)
+    @Description:-
+                This method makes a request to the financial model api website and
+                fetches the news regarding the ticker. Closed months are served from the
+                on-disk news cache, the remaining month windows are fetched concurrently
+                on the shared async HTTP client and merged in date order. Articles without
+                API sentiment are scored locally.
+    @Returns:- news_frame:- dataframe object with one row per article of the ticker(see news_frame.NEWS_COLUMNS)
+    """
+
+    # Parse the start date
+    start_date = datetime.strptime('2024-01-01', '%Y-%m-%d')
+
+    # Exchange timezone
+    timezone = MARKET_TIMEZONE
+
+    # News up to the last completed session(same days as the price bars of the training data), so the
+    # windows don't change while the market is closed
+    yesterday_date = timezone.localize(get_trading_calendar().last_completed_session().to_pydatetime())
+
+    # Make start date timezone-aware
+    start_date = timezone.localize(start_date)
+
+    month_windows = get_month_windows(start_date, yesterday_date)
+    yesterday = yesterday_date.strftime("%Y-%m-%d")
+
+    month_results = fetch_news_windows(ticker, month_windows, yesterday, max_workers, use_cache)
+
+    if use_cache:
+        # Apply the TTL/LRU eviction policy once per lookup
+        get_news_cache().evict()
+
+    return parse_news_articles(month_results, score_workers=score_workers, use_cache=use_cache)
+
+@timed
+def fetch_news_windows(ticker, month_windows, yesterday, max_workers=DEFAULT_MAX_WORKERS, use_cache=True):
+    """
+    @Args:- ticker:- str object containing the ticker name of the financial company,
+            month_windows:- list object returned by get_month_windows,
+            yesterday:- str object containing yesterday's date('YYYY-MM-DD'),
+            max_workers:- int object containing the maximum number of month windows fetched concurrently,
+            use_cache:- bool object, False bypasses the on-disk news cache
+    @Description:-
+                This method fetches the raw news of every month window concurrently on the
+                shared background event loop
+    @Returns:- month_results:- list object containing the raw articles of each window in date order
+                               (None for the windows whose request failed)
+    """
+
+    async def fetch_windows():
+        # At most max_workers month requests in flight, gather() returns them in date order
+        semaphore = asyncio.Semaphore(max(1, max_workers))
+
+        async def fetch_window(start_of_month, end_of_month):
+            async with semaphore:
+                return await fetch_month_news_cached_async(ticker, start_of_month, end_of_month, yesterday, use_cache)
+
+        return list(await asyncio.gather(*(fetch_window(*window) for window in month_windows)))
+
+    # Issue the month requests concurrently on the shared event loop(no thread per request)
+    return run_sync(fetch_windows())
+
+@timed
+def parse_news_articles(month_results, score_missing=True, score_workers=None, use_cache=True):
+    """
+    @Args:- month_results:- list object returned by fetch_news_windows,
+            score_missing:- bool object, False drops the articles without API sentiment instead of scoring them,
+            score_workers:- int object containing the number of local scoring processes(None or 1 runs serially),
+            use_cache:- bool object, False bypasses the on-disk sentiment score cache
+    @Description:-
+                This method ingests the raw articles of every successful window column-wise into
+                one news frame, dropping unparseable dates. Articles without API sentiment are scored
+                locally with VADER(dropped if the VADER lexicon can't be loaded).
+    @Returns:- news_frame:- dataframe object with the NEWS_COLUMNS columns('date' as datetime64 days)
+    """
+
+    # Results are built per call(never shared between reruns or sessions)
+    articles = [article for news_data in month_results if news_data is not None for article in news_data]
+    news_frame = news_frame_from_articles(articles, keep_unscored=score_missing)
+
+    if score_missing:
+        try:
+            news_frame = score_missing_sentiment(news_frame, workers=score_workers, use_cache=use_cache)
+        except LookupError as e:
+            print(f"Articles without sentiment are skipped:- {e}")
+            news_frame = news_frame.dropna(subset=SENTIMENT_SCORE_COLUMNS).reset_index(drop=True)
+
+    increment('articles_parsed', len(news_frame))
+    increment('articles_skipped', len(articles) - len(news_frame))
 
-    return description_list
\ No newline at end of file
+    return news_frame
@@ -1,38 +1,40 @@
+import numpy as np
 import pandas as pd
-from datetime import timedelta
+from price_store import get_price_store
+from trading_calendar import get_trading_calendar
 
-def get_last_trading_day_price(combined_data):
+def get_last_trading_day_price(combined_data, ticker=None):
     """
     Get the last trading day's closing price from combined_data.
 
     @Args:
     - combined_data: DataFrame containing stock data with 'Date' and 'Close' columns.
+    - ticker: Optional stock ticker symbol, the close is then looked up in the local price store
+              instead of scanning combined_data.
 
     @Returns:
     - last_trading_day_price: float, closing price of the last trading day.
     - last_trading_day_date: string, date of the last trading day in 'YYYY-MM-DD' format.
     """
 
-    # Ensure 'Date' is in datetime format
-    combined_data['Date'] = pd.to_datetime(combined_data['Date'])
+    if ticker is not None:
+        # Latest stored close on or before the last date of combined_data(one index seek)
+        last_trading_day_price, last_trading_day_date = get_price_store().latest_close(ticker, combined_data['Date'].max())
+        if last_trading_day_price is not None:
+            return last_trading_day_price, last_trading_day_date
 
-    # Sort by date to ensure we have the latest data
-    combined_data = combined_data.sort_values(by='Date')
+    # Sorted dates(without modifying combined_data)
+    dates = pd.to_datetime(combined_data['Date'])
+    order = np.argsort(dates.to_numpy(), kind='stable')
+    sorted_dates = dates.to_numpy()[order]
 
-    # Get the latest available date
-    last_date = combined_data['Date'].iloc[-1]
+    # Last session on or before the latest available date(skips weekends and holidays), then the
+    # latest row on or before that session with one binary search
+    last_session = get_trading_calendar().previous_session(sorted_dates[-1], inclusive=True)
+    position = np.searchsorted(sorted_dates, last_session.to_datetime64(), side='right') - 1
 
-    # Check if the last date is a weekday (Monday to Friday)
-    if last_date.dayofweek < 5:  # 0=Monday, 1=Tuesday, ..., 6=Sunday
-        # If it's a weekday, return its closing price
-        last_trading_day_price = combined_data.loc[combined_data['Date'] == last_date, 'Close'].values[0]
-        return last_trading_day_price, last_date.strftime('%Y-%m-%d')
+    if position < 0:
+        return None, None  # In case no valid trading day is found
 
-    # If it's a weekend or holiday, find the previous trading day
-    for i in range(1, 8):  # Check up to 7 days back
-        previous_date = last_date - timedelta(days=i)
-        if previous_date in combined_data['Date'].values:
-            last_trading_day_price = combined_data.loc[combined_data['Date'] == previous_date, 'Close'].values[0]
-            return last_trading_day_price, previous_date.strftime('%Y-%m-%d')
-
-    return None, None  # In case no valid trading day is found
\ No newline at end of file
+    last_trading_day_price = combined_data['Close'].to_numpy()[order[position]]
+    return last_trading_day_price, pd.Timestamp(sorted_dates[position]).strftime('%Y-%m-%d')
@@ -0,0 +1,118 @@
+import numpy as np
+
+def rolling_mean(values, window):
+    """
+    @Args:- values:- array-like object of floats,
+            window:- int object containing the window length
+    @Description:-
+                This method computes the trailing moving average of values. Like pandas
+                rolling(window=n).mean(), the first window - 1 entries and every window
+                containing a NaN are NaN.
+    @Returns:- means:- numpy array object of the same length as values
+    """
+    values = np.asarray(values, dtype=np.float64)
+    means = np.full(values.shape[0], np.nan)
+
+    if values.shape[0] >= window:
+        # A 'valid' convolution with a box kernel sums each full window in C(NaN propagates to its windows)
+        means[window - 1:] = np.convolve(values, np.ones(window), mode='valid') / window
+
+    return means
+
+def shift(values, periods=1):
+    """
+    @Args:- values:- array-like object of floats,
+            periods:- int object containing the number of positions to shift forward
+    @Description:-
+                This method shifts values forward, filling the first periods entries with NaN
+    @Returns:- shifted:- numpy array object of the same length as values
+    """
+    values = np.asarray(values, dtype=np.float64)
+    shifted = np.full(values.shape[0], np.nan)
+
+    if values.shape[0] > periods:
+        shifted[periods:] = values[:-periods]
+
+    return shifted
+
+def true_range(high, low, close):
+    """
+    @Args:- high, low, close:- array-like objects of floats(one entry per trading day)
+    @Description:-
+                This method computes the true range of every trading day,
+                max(high - low, |high - previous close|, |low - previous close|).
+                The first day(no previous close) falls back to high - low.
+    @Returns:- true_ranges:- numpy array object
+    """
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    previous_close = shift(close)
+
+    true_ranges = high - low
+    high_close = np.abs(high - previous_close)
+    low_close = np.abs(low - previous_close)
+
+    # Same NaN handling as Python's max(): a NaN candidate never replaces the running maximum
+    true_ranges = np.where(high_close > true_ranges, high_close, true_ranges)
+    true_ranges = np.where(low_close > true_ranges, low_close, true_ranges)
+
+    return true_ranges
+
+def average_true_range(high, low, close, window=14):
+    """
+    @Args:- high, low, close:- array-like objects of floats(one entry per trading day),
+            window:- int object containing the ATR window length
+    @Description:-
+                This method computes the simple moving average of the true range
+    @Returns:- atr:- numpy array object
+    """
+    return rolling_mean(true_range(high, low, close), window)
+
+def gains_and_losses(close):
+    """
+    @Args:- close:- array-like object of closing prices
+    @Description:-
+                This method splits the day-over-day price changes into gains and losses
+                (both non-negative, 0 for the first day)
+    @Returns:- gains, losses:- numpy array objects
+    """
+    close = np.asarray(close, dtype=np.float64)
+    delta = close - shift(close)
+
+    gains = np.where(delta > 0, delta, 0.0)
+    losses = np.where(delta < 0, -delta, 0.0)
+
+    return gains, losses
+
+def average_gain_and_loss(close, window=14):
+    """
+    @Args:- close:- array-like object of closing prices,
+            window:- int object containing the RSI window length
+    @Description:-
+                This method computes the moving averages of the gains and losses used by the RSI
+    @Returns:- average_gain, average_loss:- numpy array objects
+    """
+    gains, losses = gains_and_losses(close)
+    return rolling_mean(gains, window), rolling_mean(losses, window)
+
+def rsi_from_averages(average_gain, average_loss):
+    """
+    @Args:- average_gain, average_loss:- floats(or numpy arrays) containing the average gain and loss over the RSI window
+    @Description:-
+                This method computes the Relative Strength Index from average gain and loss
+                (100 when there is no loss, NaN when there is neither gain nor loss)
+    @Returns:- rsi:- float object(or numpy array)
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return 100 - (100 / (1 + np.divide(average_gain, average_loss)))
+
+def relative_strength_index(close, window=14):
+    """
+    @Args:- close:- array-like object of closing prices,
+            window:- int object containing the RSI window length
+    @Description:-
+                This method computes the Relative Strength Index(100 when there is no loss,
+                NaN when there is neither gain nor loss)
+    @Returns:- rsi:- numpy array object
+    """
+    return rsi_from_averages(*average_gain_and_loss(close, window))
@@ -0,0 +1,231 @@
+import contextvars
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+import pandas as pd
+
+# Environment variable turning on profiling of a recorded run('cprofile' or 'pyinstrument')
+PROFILE_ENV = 'PIPELINE_PROFILE'
+
+# Directory the profiles are written to
+DEFAULT_PROFILE_DIR = os.path.join('.cache', 'profiles')
+
+# Recorder of the current run(None when nothing is being recorded, which makes spans and counters free)
+_current_recorder = contextvars.ContextVar('performance_recorder', default=None)
+
+class PerformanceRecorder:
+    """
+    Collects the timing spans and counters of one pipeline run.
+
+    Spans are aggregated by name(calls, total and max seconds) in first-seen order. Counters count
+    things like HTTP requests, bytes received, rows processed and cache hits. Both are thread-safe.
+    """
+
+    def __init__(self):
+        self.spans = {}
+        self.counters = {}
+        self.profile_path = None
+        self._lock = threading.Lock()
+
+    def add_span(self, name, seconds):
+        with self._lock:
+            calls, total, longest = self.spans.get(name, (0, 0.0, 0.0))
+            self.spans[name] = (calls + 1, total + seconds, max(longest, seconds))
+
+    def increment(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def spans_frame(self):
+        """
+        @Args:- None
+        @Description:-
+                    This method tabulates the recorded spans
+        @Returns:- spans:- dataframe object with the columns span, calls, total_seconds and max_seconds
+        """
+        with self._lock:
+            rows = [(name, calls, total, longest) for name, (calls, total, longest) in self.spans.items()]
+
+        return pd.DataFrame(rows, columns=['span', 'calls', 'total_seconds', 'max_seconds'])
+
+    def counters_frame(self):
+        """
+        @Args:- None
+        @Description:-
+                    This method tabulates the recorded counters
+        @Returns:- counters:- dataframe object with the columns counter and value
+        """
+        with self._lock:
+            rows = list(self.counters.items())
+
+        return pd.DataFrame(rows, columns=['counter', 'value'])
+
+def get_recorder():
+    """
+    @Args:- None
+    @Description:-
+                This method returns the recorder of the current run
+    @Returns:- recorder:- PerformanceRecorder object or None if nothing is being recorded
+    """
+    return _current_recorder.get()
+
+@contextmanager
+def span(name):
+    """
+    @Args:- name:- str object containing the span name
+    @Description:-
+                This method times the enclosed block into the current recorder(no-op when not recording)
+    @Returns:-
+    """
+    recorder = _current_recorder.get()
+    if recorder is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        recorder.add_span(name, time.perf_counter() - start)
+
+def timed(function=None, name=None):
+    """
+    @Args:- function:- callable object to decorate,
+            name:- str object containing the span name(defaults to the function name)
+    @Description:-
+                This method decorates a function so that every call is recorded as a span
+    @Returns:- decorated function
+    """
+    if function is None:
+        return functools.partial(timed, name=name)
+
+    span_name = name or function.__name__
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        recorder = _current_recorder.get()
+        if recorder is None:
+            return function(*args, **kwargs)
+
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            recorder.add_span(span_name, time.perf_counter() - start)
+
+    return wrapper
+
+def increment(name, value=1):
+    """
+    @Args:- name:- str object containing the counter name,
+            value:- int object added to the counter
+    @Description:-
+                This method adds value to a counter of the current recorder(no-op when not recording)
+    @Returns:-
+    """
+    recorder = _current_recorder.get()
+    if recorder is not None:
+        recorder.increment(name, value)
+
+def propagate(function):
+    """
+    @Args:- function:- callable object submitted to a thread pool
+    @Description:-
+                This method binds function to the current recorder, since pool threads don't inherit it
+    @Returns:- wrapped function
+    """
+    recorder = _current_recorder.get()
+    if recorder is None:
+        return function
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        token = _current_recorder.set(recorder)
+        try:
+            return function(*args, **kwargs)
+        finally:
+            _current_recorder.reset(token)
+
+    return wrapper
+
+def propagate_async(coroutine):
+    """
+    @Args:- coroutine:- coroutine object submitted to an event loop running in another thread
+    @Description:-
+                This method binds coroutine to the current recorder, since the loop's tasks don't inherit it
+                (tasks the coroutine creates inherit it in turn)
+    @Returns:- wrapped coroutine
+    """
+    recorder = _current_recorder.get()
+    if recorder is None:
+        return coroutine
+
+    async def wrapper():
+        # The task runs in its own copy of the context, nothing has to be reset
+        _current_recorder.set(recorder)
+        return await coroutine
+
+    return wrapper()
+
+def _start_profiler(kind):
+    if kind == 'pyinstrument':
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            print("pyinstrument is not installed, profiling with cProfile instead")
+        else:
+            profiler = Profiler()
+            profiler.start()
+            return 'pyinstrument', profiler
+
+    import cProfile
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Another profiler(e.g. a concurrent session) is already active in this thread
+        return None, None
+
+    return 'cprofile', profiler
+
+def _stop_profiler(kind, profiler, profile_dir):
+    os.makedirs(profile_dir, exist_ok=True)
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+
+    if kind == 'pyinstrument':
+        profiler.stop()
+        path = os.path.join(profile_dir, f"run-{stamp}.html")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(profiler.output_html())
+        return path
+
+    profiler.disable()
+    path = os.path.join(profile_dir, f"run-{stamp}.prof")
+    profiler.dump_stats(path)
+    return path
+
+@contextmanager
+def recording(profile=None, profile_dir=DEFAULT_PROFILE_DIR):
+    """
+    @Args:- profile:- str object, 'cprofile' or 'pyinstrument' to also profile the run
+                      (defaults to $PIPELINE_PROFILE, unset means no profiling),
+            profile_dir:- str object containing the directory the profile is written to
+    @Description:-
+                This method records the spans and counters of the enclosed block
+    @Returns:- recorder:- PerformanceRecorder object(profile_path is set once the block exits)
+    """
+    recorder = PerformanceRecorder()
+    token = _current_recorder.set(recorder)
+
+    profile = (profile or os.getenv(PROFILE_ENV) or '').lower()
+    kind, profiler = _start_profiler(profile) if profile else (None, None)
+
+    try:
+        yield recorder
+    finally:
+        if profiler is not None:
+            recorder.profile_path = _stop_profiler(kind, profiler, profile_dir)
+        _current_recorder.reset(token)
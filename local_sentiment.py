@@ -0,0 +1,307 @@
+import os
+import hashlib
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from instrumentation import timed, increment
+from news_frame import SENTIMENT_SCORE_COLUMNS
+from nltk_resources import ensure_nltk_resource
+from preprocess_text import preprocess_text
+
+# Default location of the on-disk sentiment score cache
+DEFAULT_SCORE_CACHE_PATH = os.path.join('.cache', 'sentiment_scores.sqlite')
+
+# Identifier of the local scorer, part of every cache key(bump it when the scoring changes so old scores are ignored)
+SCORER_VERSION = 'vader-1'
+
+# Number of articles sent to a worker process at a time in process-pool mode
+DEFAULT_CHUNK_SIZE = 64
+
+# Number of content hashes looked up or stored per SQLite statement(below SQLite's bound parameter limit)
+CACHE_BATCH_SIZE = 500
+
+@lru_cache(maxsize=None)
+def get_vader_analyzer():
+    """
+    @Args:- None
+    @Description:-
+                This method imports NLTK and loads the VADER analyzer on first use(once per process, e.g. once
+                per worker). The lexicon is only downloaded when it isn't installed locally.
+    @Returns:- analyzer:- SentimentIntensityAnalyzer object shared by every call
+    """
+    ensure_nltk_resource('vader_lexicon')
+
+    from nltk.sentiment.vader import SentimentIntensityAnalyzer
+
+    return SentimentIntensityAnalyzer()
+
+def score_text(text):
+    """
+    @Args:- text:- str object containing an article text
+    @Description:-
+                This method scores the text with VADER
+    @Returns:- scores:- tuple object in SENTIMENT_SCORE_COLUMNS order(the compound score being the polarity)
+    """
+    scores = get_vader_analyzer().polarity_scores(text)
+
+    return scores['compound'], scores['neg'], scores['neu'], scores['pos']
+
+def score_cleaned_text(text):
+    """
+    @Args:- text:- str object containing an article text
+    @Description:-
+                This method scores the text after preprocess_text(URLs, punctuation and stop words removed,
+                words lemmatized)
+    @Returns:- scores:- tuple object in SENTIMENT_SCORE_COLUMNS order
+    """
+    return score_text(preprocess_text(text))
+
+def score_texts(texts, clean=False, workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    @Args:- texts:- list object of str objects containing article texts,
+            clean:- bool object, True scores the preprocess_text output instead of the raw text,
+            workers:- int object containing the number of worker processes(None or 1 runs serially),
+            chunk_size:- int object containing the number of articles sent to a worker at a time
+    @Description:-
+                This method scores a batch of texts, sharing one analyzer per process. With workers > 1
+                the texts are scored in a process pool.
+    @Returns:- list object containing the scores of each text(in input order)
+    """
+    scorer = score_cleaned_text if clean else score_text
+
+    if workers is None or workers <= 1 or len(texts) <= chunk_size:
+        return [scorer(text) for text in texts]
+
+    # executor.map() returns the results in input order, so the output matches serial mode
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(scorer, texts, chunksize=max(1, chunk_size)))
+
+def get_content_hash(text, clean=False):
+    """
+    @Args:- text:- str object containing an article text,
+            clean:- bool object, True if the text is scored after preprocess_text
+    @Description:-
+                This method builds the cache key of a text:- a hash of the scorer and the text, so an edited
+                article, or the same article scored another way, gets its own entry
+    @Returns:- content_hash:- str object(hex digest)
+    """
+    scorer = f"{SCORER_VERSION}:{'cleaned' if clean else 'raw'}"
+
+    return hashlib.sha256(f"{scorer}\0{text}".encode('utf-8')).hexdigest()
+
+class SentimentScoreCache:
+    """
+    On-disk cache of local sentiment scores keyed by content hash.
+
+    Scores never expire:- a hash identifies both the text and the scorer, so a cached score
+    is always the score the scorer would compute again.
+    """
+
+    def __init__(self, path=DEFAULT_SCORE_CACHE_PATH):
+        """
+        @Args:- path:- str object containing the SQLite file path
+        @Description:-
+                    This method opens(or creates) the cache database
+        @Returns:-
+        """
+        self.path = path
+
+        self.hits = 0
+        self.misses = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # The connection is shared between sessions, every access goes through the lock
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS sentiment_scores (
+                content_hash TEXT PRIMARY KEY,
+                polarity REAL NOT NULL,
+                neg REAL NOT NULL,
+                neu REAL NOT NULL,
+                pos REAL NOT NULL,
+                scored_at REAL NOT NULL
+            )
+        """)
+        self._connection.commit()
+
+    def get_many(self, content_hashes):
+        """
+        @Args:- content_hashes:- list object of str objects returned by get_content_hash
+        @Description:-
+                    This method looks the hashes up in batches
+        @Returns:- scores:- dict object mapping each cached hash to its scores(missing hashes are left out)
+        """
+        scores = {}
+
+        with self._lock:
+            for start in range(0, len(content_hashes), CACHE_BATCH_SIZE):
+                batch = content_hashes[start:start + CACHE_BATCH_SIZE]
+                rows = self._connection.execute(
+                    f"SELECT content_hash, polarity, neg, neu, pos FROM sentiment_scores "
+                    f"WHERE content_hash IN ({','.join('?' * len(batch))})", batch).fetchall()
+                scores.update((row[0], row[1:]) for row in rows)
+
+            self.hits += len(scores)
+            self.misses += len(set(content_hashes)) - len(scores)
+
+        return scores
+
+    def put_many(self, scores):
+        """
+        @Args:- scores:- dict object mapping content hashes to their scores(SENTIMENT_SCORE_COLUMNS order)
+        @Description:-
+                    This method stores the scores in one transaction
+        @Returns:-
+        """
+        now = time.time()
+
+        with self._lock:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO sentiment_scores VALUES (?, ?, ?, ?, ?, ?)",
+                [(content_hash, *values, now) for content_hash, values in scores.items()])
+            self._connection.commit()
+
+    def clear(self):
+        """
+        @Args:- None
+        @Description:-
+                    This method deletes every cached score
+        @Returns:-
+        """
+        with self._lock:
+            self._connection.execute("DELETE FROM sentiment_scores")
+            self._connection.commit()
+
+    def stats(self):
+        """
+        @Args:- None
+        @Description:-
+                    This method reports the cache usage
+        @Returns:- stats:- dict object containing hits, misses and entries
+        """
+        with self._lock:
+            entries = self._connection.execute("SELECT COUNT(*) FROM sentiment_scores").fetchone()[0]
+
+        return {'hits': self.hits, 'misses': self.misses, 'entries': entries}
+
+# Shared cache instance (created lazily on first use)
+_score_cache = None
+_score_cache_lock = threading.Lock()
+
+def get_sentiment_score_cache():
+    """
+    @Args:- None
+    @Description:-
+                This method returns the process-wide SentimentScoreCache instance
+    @Returns:- score_cache:- SentimentScoreCache object
+    """
+    global _score_cache
+
+    if _score_cache is None:
+        with _score_cache_lock:
+            if _score_cache is None:
+                _score_cache = SentimentScoreCache()
+
+    return _score_cache
+
+def get_article_texts(news_frame):
+    """
+    @Args:- news_frame:- dataframe object containing the news frame(see news_frame.NEWS_COLUMNS)
+    @Description:-
+                This method picks the text scored for each article:- its content, or its title when
+                the content is empty
+    @Returns:- list object of str objects
+    """
+    contents = news_frame['content'].fillna('').astype(str)
+    titles = news_frame['title'].fillna('').astype(str)
+
+    return contents.where(contents.str.strip() != '', titles).tolist()
+
+@timed
+def score_articles(news_frame, clean=False, workers=None, chunk_size=DEFAULT_CHUNK_SIZE, use_cache=True):
+    """
+    @Args:- news_frame:- dataframe object containing the news frame(see news_frame.NEWS_COLUMNS),
+            clean:- bool object, True scores the preprocess_text output instead of the raw text,
+            workers:- int object containing the number of scoring processes(None or 1 runs serially),
+            chunk_size:- int object containing the number of articles sent to a worker process at a time,
+            use_cache:- bool object, False bypasses the on-disk score cache
+    @Description:-
+                This method scores the articles locally. Cached scores are read in batches, only the texts
+                never scored before(each distinct text once) go through VADER, and their scores are stored.
+                Only identical texts share a score(never near-duplicates), so scores don't depend on the
+                order articles were seen in.
+    @Returns:- scores:- float64 numpy array of shape (articles, 4) in SENTIMENT_SCORE_COLUMNS order
+    """
+    texts = get_article_texts(news_frame)
+    if not texts:
+        return np.empty((0, len(SENTIMENT_SCORE_COLUMNS)), dtype=np.float64)
+
+    hashes = [get_content_hash(text, clean) for text in texts]
+    cached = get_sentiment_score_cache().get_many(hashes) if use_cache else {}
+
+    # Distinct texts missing from the cache, in first-seen order
+    missing = {}
+    for content_hash, text in zip(hashes, texts):
+        if content_hash not in cached and content_hash not in missing:
+            missing[content_hash] = text
+
+    if missing:
+        computed = dict(zip(missing, score_texts(list(missing.values()), clean, workers, chunk_size)))
+        if use_cache:
+            get_sentiment_score_cache().put_many(computed)
+        cached.update(computed)
+
+    increment('articles_scored_locally', len(missing))
+    increment('sentiment_score_cache_hits', len(texts) - len(missing))
+
+    return np.array([cached[content_hash] for content_hash in hashes], dtype=np.float64)
+
+def score_missing_sentiment(news_frame, clean=False, workers=None, chunk_size=DEFAULT_CHUNK_SIZE, use_cache=True):
+    """
+    @Args:- news_frame:- dataframe object containing the news frame(see news_frame.NEWS_COLUMNS),
+            clean, workers, chunk_size, use_cache:- see score_articles
+    @Description:-
+                This method fills in the sentiment of the articles the news API returned without one,
+                leaving the API scores of the other articles untouched
+    @Returns:- news_frame:- dataframe object(a copy when any article was scored)
+    """
+    unscored = news_frame[SENTIMENT_SCORE_COLUMNS].isna().any(axis=1).to_numpy()
+    if not unscored.any():
+        return news_frame
+
+    news_frame = news_frame.copy()
+    scores = score_articles(news_frame[unscored], clean, workers, chunk_size, use_cache)
+    news_frame.loc[unscored, SENTIMENT_SCORE_COLUMNS] = scores
+
+    return news_frame
+
+def rescore_news_frame(news_frame, clean=True, workers=None, chunk_size=DEFAULT_CHUNK_SIZE, use_cache=True):
+    """
+    @Args:- news_frame:- dataframe object containing the news frame(see news_frame.NEWS_COLUMNS),
+            clean, workers, chunk_size, use_cache:- see score_articles
+    @Description:-
+                This method replaces the sentiment of every article with the local score(by default of the
+                cleaned text), e.g. to compare the local scorer with the API scores
+    @Returns:- news_frame:- dataframe object(a copy)
+    """
+    news_frame = news_frame.copy()
+    if len(news_frame):
+        news_frame[SENTIMENT_SCORE_COLUMNS] = score_articles(news_frame, clean, workers, chunk_size, use_cache)
+
+    return news_frame
+
+def get_sentiment_score_cache_stats():
+    """
+    @Args:- None
+    @Description:-
+                This method reports the usage of the shared score cache
+    @Returns:- stats:- dict object(see SentimentScoreCache.stats)
+    """
+    return get_sentiment_score_cache().stats()
@@ -0,0 +1,162 @@
+import os
+import re
+import glob
+import hashlib
+import threading
+import joblib
+import pandas as pd
+
+# Default directory of the fitted model artifacts
+DEFAULT_MODEL_STORE_DIR = os.path.join('.cache', 'models')
+
+# Disk budget of the model store, least recently used artifacts are removed above it
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Separator between the ticker and the data hash in artifact names(never part of a ticker, unlike '-' in 'BRK-B')
+ARTIFACT_NAME_SEPARATOR = '__'
+
+# Bumped whenever the features or the training procedure change, so older artifacts are never reused
+MODEL_STORE_VERSION = 2
+
+def get_training_data_hash(combined_data):
+    """
+    @Args:- combined_data:- dataframe object containing the combined stock and sentiment data
+    @Description:-
+                This method hashes the columns and values of the training data(before feature
+                engineering), new trading days or revised sentiment give a different hash
+    @Returns:- data_hash:- str object containing a hex digest
+    """
+    digest = hashlib.sha256()
+    digest.update(f"v{MODEL_STORE_VERSION}:{','.join(map(str, combined_data.columns))}".encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(combined_data, index=False).to_numpy().tobytes())
+
+    return digest.hexdigest()[:32]
+
+class ModelStore:
+    """
+    On-disk store of fitted model artifacts(imputer, scaler, model and metrics) keyed by
+    ticker and training data hash, one joblib file per entry.
+    """
+
+    def __init__(self, directory=DEFAULT_MODEL_STORE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        @Args:- directory:- str object containing the store directory,
+                max_bytes:- int object containing the disk budget of the store
+        @Description:-
+                    This method creates the store directory if needed
+        @Returns:-
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, ticker, data_hash):
+        return os.path.join(self.directory, f"{ticker.upper()}{ARTIFACT_NAME_SEPARATOR}{data_hash}.joblib")
+
+    def _ticker_paths(self, ticker):
+        # Artifacts of exactly this ticker:- the name must be the ticker, the separator and a bare data hash
+        prefix = f"{ticker.upper()}{ARTIFACT_NAME_SEPARATOR}"
+        paths = glob.glob(os.path.join(self.directory, f"{glob.escape(prefix)}*.joblib"))
+
+        return [path for path in paths
+                if re.fullmatch(r'[0-9a-f]+', os.path.basename(path)[len(prefix):-len('.joblib')])]
+
+    def load(self, ticker, data_hash):
+        """
+        @Args:- ticker:- str object containing the ticker name,
+                data_hash:- str object returned by get_training_data_hash
+        @Description:-
+                    This method loads the artifacts trained on exactly this data, if any. An artifact that
+                    can't be unpickled(corrupt file, written by other library versions) is treated as missing,
+                    so the model is trained again and the artifact replaced.
+        @Returns:- artifacts:- dict object(see save) or None when nothing matches
+        """
+        path = self._path(ticker, data_hash)
+
+        try:
+            artifacts = joblib.load(path)
+        except FileNotFoundError:
+            return None
+        except Exception as error:
+            print(f"Ignoring the unreadable model artifact {path}: {error!r}")
+            return None
+
+        # Mark the entry as recently used for the LRU eviction(it may have just been evicted)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+
+        return artifacts
+
+    def save(self, ticker, data_hash, artifacts):
+        """
+        @Args:- ticker:- str object containing the ticker name,
+                data_hash:- str object returned by get_training_data_hash,
+                artifacts:- dict object containing the fitted imputer, scaler, model and metrics
+        @Description:-
+                    This method stores the artifacts, drops the stale entries of the ticker(trained on
+                    older data) and enforces the disk budget
+        @Returns:-
+        """
+        path = self._path(ticker, data_hash)
+
+        with self._lock:
+            for stale_path in self._ticker_paths(ticker):
+                if stale_path != path:
+                    os.remove(stale_path)
+
+            # Write to a temporary file first so that a concurrent load never sees a partial file
+            temporary_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            joblib.dump(artifacts, temporary_path)
+            os.replace(temporary_path, path)
+
+            self._evict()
+
+    def _evict(self):
+        entries = []
+        for path in glob.glob(os.path.join(self.directory, '*.joblib')):
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total_bytes = sum(size for _, size, _ in entries)
+
+        # Remove the least recently used entries until the store fits the budget
+        for _, size, path in sorted(entries):
+            if total_bytes <= self.max_bytes:
+                break
+            os.remove(path)
+            total_bytes -= size
+
+    def clear(self):
+        """
+        @Args:- None
+        @Description:-
+                    This method removes every stored artifact
+        @Returns:-
+        """
+        with self._lock:
+            for path in glob.glob(os.path.join(self.directory, '*.joblib')):
+                os.remove(path)
+
+# Shared store instance (created lazily on first use)
+_model_store = None
+_model_store_lock = threading.Lock()
+
+def get_model_store():
+    """
+    @Args:- None
+    @Description:-
+                This method returns the process-wide ModelStore instance
+    @Returns:- model_store:- ModelStore object
+    """
+    global _model_store
+
+    if _model_store is None:
+        with _model_store_lock:
+            if _model_store is None:
+                _model_store = ModelStore()
+
+    return _model_store
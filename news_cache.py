@@ -0,0 +1,305 @@
+import os
+import json
+import time
+import hashlib
+import zlib
+import sqlite3
+import threading
+from instrumentation import increment
+
+# Default location of the on-disk news cache
+DEFAULT_CACHE_PATH = os.path.join('.cache', 'news_cache.sqlite')
+
+# Cached months older than this are refetched(upstream may revise sentiment scores)
+DEFAULT_TTL_SECONDS = 30 * 24 * 60 * 60
+
+# Maximum number of (ticker, month) entries kept on disk, least recently used are evicted first
+DEFAULT_MAX_ENTRIES = 5000
+
+# Number of article keys looked up per SQLite statement(below SQLite's bound parameter limit)
+ARTICLE_BATCH_SIZE = 500
+
+def get_article_key(article):
+    """
+    @Args:- article:- dict object containing a raw article returned by the news API
+    @Description:-
+                This method hashes the whole article(canonical JSON), so only identical copies share a key
+    @Returns:- article_key:- str object(hex digest)
+    """
+    return hashlib.sha256(json.dumps(article, sort_keys=True, separators=(',', ':')).encode('utf-8')).hexdigest()
+
+class NewsCache:
+    """
+    On-disk cache of raw news API responses keyed by (ticker, month window).
+
+    Each response is stored as the list of its article keys, and each distinct article once as a
+    zlib-compressed JSON blob shared by every ticker and month returning it, so that closed months
+    are served from disk instead of the network without storing a story once per ticker.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl_seconds=DEFAULT_TTL_SECONDS, max_entries=DEFAULT_MAX_ENTRIES):
+        """
+        @Args:- path:- str object containing the SQLite file path,
+                ttl_seconds:- int object containing the time-to-live of an entry(None disables expiry),
+                max_entries:- int object containing the maximum number of cached entries
+        @Description:-
+                    This method opens(or creates) the cache database
+        @Returns:-
+        """
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # The connection is shared between fetch threads, every access goes through the lock
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS news_cache (
+                ticker TEXT NOT NULL,
+                month_start TEXT NOT NULL,
+                month_end TEXT NOT NULL,
+                payload BLOB NOT NULL,
+                fetched_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (ticker, month_start)
+            )
+        """)
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS news_articles (
+                article_key TEXT PRIMARY KEY,
+                payload BLOB NOT NULL
+            )
+        """)
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS news_cache_articles (
+                ticker TEXT NOT NULL,
+                month_start TEXT NOT NULL,
+                article_key TEXT NOT NULL,
+                PRIMARY KEY (ticker, month_start, article_key)
+            )
+        """)
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS news_cache_articles_key ON news_cache_articles (article_key)")
+        self._connection.commit()
+
+    def _load_articles(self, article_keys):
+        # Article blobs of the keys, fetched in batches and returned in the order of the keys
+        payloads = {}
+        distinct_keys = list(dict.fromkeys(article_keys))
+        for start in range(0, len(distinct_keys), ARTICLE_BATCH_SIZE):
+            batch = distinct_keys[start:start + ARTICLE_BATCH_SIZE]
+            payloads.update(self._connection.execute(
+                f"SELECT article_key, payload FROM news_articles WHERE article_key IN ({','.join('?' * len(batch))})",
+                batch).fetchall())
+
+        if len(payloads) < len(distinct_keys):
+            return None
+
+        return [json.loads(zlib.decompress(payloads[article_key])) for article_key in article_keys]
+
+    def get(self, ticker, month_start, month_end):
+        """
+        @Args:- ticker:- str object containing the ticker name,
+                month_start:- str object containing the window start date('YYYY-MM-DD'),
+                month_end:- str object containing the window end date('YYYY-MM-DD')
+        @Description:-
+                    This method looks up a cached month window, expired entries count as misses
+        @Returns:- news_data:- list object containing the raw articles or None on a cache miss
+        """
+        now = time.time()
+
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT payload, fetched_at FROM news_cache WHERE ticker = ? AND month_start = ? AND month_end = ?",
+                (ticker.upper(), month_start, month_end)).fetchone()
+
+            news_data = None
+            if row is not None and (self.ttl_seconds is None or now - row[1] <= self.ttl_seconds):
+                news_data = json.loads(zlib.decompress(row[0]))
+
+                # The articles of an entry are stored as keys, entries written before articles were shared
+                # hold the articles themselves
+                if news_data and isinstance(news_data[0], str):
+                    news_data = self._load_articles(news_data)
+
+            if news_data is None:
+                self.misses += 1
+                return None
+
+            self._connection.execute(
+                "UPDATE news_cache SET last_access = ? WHERE ticker = ? AND month_start = ?",
+                (now, ticker.upper(), month_start))
+            self._connection.commit()
+            self.hits += 1
+
+        return news_data
+
+    def put(self, ticker, month_start, month_end, news_data):
+        """
+        @Args:- ticker:- str object containing the ticker name,
+                month_start:- str object containing the window start date('YYYY-MM-DD'),
+                month_end:- str object containing the window end date('YYYY-MM-DD'),
+                news_data:- list object containing the raw articles returned by the API
+        @Description:-
+                    This method stores(or replaces) the response of one month window. Articles already
+                    stored(e.g. for another ticker) are only referenced.
+        @Returns:-
+        """
+        now = time.time()
+        ticker = ticker.upper()
+        article_keys = [get_article_key(article) for article in news_data]
+        payload = zlib.compress(json.dumps(article_keys, separators=(',', ':')).encode('utf-8'))
+
+        with self._lock:
+            stored = set()
+            distinct_keys = list(dict.fromkeys(article_keys))
+            for start in range(0, len(distinct_keys), ARTICLE_BATCH_SIZE):
+                batch = distinct_keys[start:start + ARTICLE_BATCH_SIZE]
+                stored.update(row[0] for row in self._connection.execute(
+                    f"SELECT article_key FROM news_articles WHERE article_key IN ({','.join('?' * len(batch))})",
+                    batch))
+
+            new_articles = {}
+            for article_key, article in zip(article_keys, news_data):
+                if article_key not in stored and article_key not in new_articles:
+                    new_articles[article_key] = zlib.compress(
+                        json.dumps(article, separators=(',', ':')).encode('utf-8'))
+
+            self._connection.executemany("INSERT OR IGNORE INTO news_articles VALUES (?, ?)", new_articles.items())
+            self._connection.execute(
+                "DELETE FROM news_cache_articles WHERE ticker = ? AND month_start = ?", (ticker, month_start))
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO news_cache_articles VALUES (?, ?, ?)",
+                [(ticker, month_start, article_key) for article_key in distinct_keys])
+            self._connection.execute(
+                "INSERT OR REPLACE INTO news_cache VALUES (?, ?, ?, ?, ?, ?)",
+                (ticker, month_start, month_end, payload, now, now))
+            self._connection.commit()
+
+        increment('news_articles_stored', len(new_articles))
+        increment('news_articles_shared', len(article_keys) - len(new_articles))
+
+    def evict(self):
+        """
+        @Args:- None
+        @Description:-
+                    This method removes expired entries and then the least recently used
+                    entries above max_entries, with the articles no other entry references
+        @Returns:- removed:- int object containing the number of evicted entries
+        """
+        removed = 0
+
+        with self._lock:
+            if self.ttl_seconds is not None:
+                cursor = self._connection.execute(
+                    "DELETE FROM news_cache WHERE fetched_at < ?", (time.time() - self.ttl_seconds,))
+                removed += cursor.rowcount
+
+            if self.max_entries is not None:
+                cursor = self._connection.execute("""
+                    DELETE FROM news_cache WHERE rowid IN (
+                        SELECT rowid FROM news_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                    )
+                """, (self.max_entries,))
+                removed += cursor.rowcount
+
+            if removed:
+                self._remove_unreferenced_articles()
+
+            self._connection.commit()
+            self.evictions += removed
+
+        return removed
+
+    def _remove_unreferenced_articles(self):
+        # References of the removed entries, then the articles no entry references any more
+        self._connection.execute("""
+            DELETE FROM news_cache_articles WHERE NOT EXISTS (
+                SELECT 1 FROM news_cache
+                WHERE news_cache.ticker = news_cache_articles.ticker
+                AND news_cache.month_start = news_cache_articles.month_start
+            )
+        """)
+        self._connection.execute("""
+            DELETE FROM news_articles WHERE NOT EXISTS (
+                SELECT 1 FROM news_cache_articles WHERE news_cache_articles.article_key = news_articles.article_key
+            )
+        """)
+
+    def clear(self, ticker=None):
+        """
+        @Args:- ticker:- str object containing the ticker to drop(None drops every ticker)
+        @Description:-
+                    This method deletes cached entries
+        @Returns:-
+        """
+        with self._lock:
+            if ticker is None:
+                self._connection.execute("DELETE FROM news_cache")
+            else:
+                self._connection.execute("DELETE FROM news_cache WHERE ticker = ?", (ticker.upper(),))
+            self._remove_unreferenced_articles()
+            self._connection.commit()
+
+    def stats(self):
+        """
+        @Args:- None
+        @Description:-
+                    This method reports the cache usage
+        @Returns:- stats:- dict object containing hits, misses, evictions, entries, tickers, articles(stored once),
+                           article_references(one per ticker and month returning an article) and size_bytes
+        """
+        with self._lock:
+            entries, tickers, size_bytes = self._connection.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT ticker), COALESCE(SUM(LENGTH(payload)), 0) FROM news_cache").fetchone()
+            articles, article_bytes = self._connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(payload)), 0) FROM news_articles").fetchone()
+            article_references = self._connection.execute("SELECT COUNT(*) FROM news_cache_articles").fetchone()[0]
+
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'entries': entries,
+            'tickers': tickers,
+            'articles': articles,
+            'article_references': article_references,
+            'size_bytes': size_bytes + article_bytes
+        }
+
+# Shared cache instance (created lazily on first use)
+_news_cache = None
+_news_cache_lock = threading.Lock()
+
+def get_news_cache():
+    """
+    @Args:- None
+    @Description:-
+                This method returns the process-wide NewsCache instance
+    @Returns:- news_cache:- NewsCache object
+    """
+    global _news_cache
+
+    if _news_cache is None:
+        with _news_cache_lock:
+            if _news_cache is None:
+                _news_cache = NewsCache()
+
+    return _news_cache
+
+def get_news_cache_stats():
+    """
+    @Args:- None
+    @Description:-
+                This method reports the usage of the shared news cache
+    @Returns:- stats:- dict object(see NewsCache.stats)
+    """
+    return get_news_cache().stats()
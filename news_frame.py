@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+
+# Columns of a news frame, one row per article
+NEWS_COLUMNS = ['date', 'published_at', 'title', 'content', 'polarity', 'neg', 'neu', 'pos']
+
+# Sentiment scores of an article as returned by the news API
+SENTIMENT_SCORE_COLUMNS = ['polarity', 'neg', 'neu', 'pos']
+
+def empty_news_frame():
+    """
+    @Args:- None
+    @Description:-
+                This method creates a news frame without articles
+    @Returns:- news_frame:- dataframe object with the NEWS_COLUMNS columns and their dtypes
+    """
+    news_frame = pd.DataFrame({
+        'date': pd.Series(dtype='datetime64[ns]'),
+        'published_at': pd.Series(dtype='datetime64[ns]'),
+        'title': pd.Series(dtype=object),
+        'content': pd.Series(dtype=object)
+    })
+    for column in SENTIMENT_SCORE_COLUMNS:
+        news_frame[column] = pd.Series(dtype=np.float64)
+
+    return news_frame
+
+def news_frame_from_articles(articles, keep_unscored=False):
+    """
+    @Args:- articles:- list object containing raw articles returned by the news API,
+            keep_unscored:- bool object, True keeps the articles without sentiment(with NaN scores)
+    @Description:-
+                This method ingests the raw articles column-wise:- the dates are parsed in one
+                vectorized pass into datetime64 days and the sentiment scores become float columns.
+                Articles with an unparseable date are dropped, and so are articles without sentiment
+                unless keep_unscored is set.
+    @Returns:- news_frame:- dataframe object with the NEWS_COLUMNS columns(default RangeIndex), 'date' is the
+                            publication day and 'published_at' the publication time(as published, tz-naive)
+    """
+    if not articles:
+        return empty_news_frame()
+
+    raw = pd.DataFrame.from_records(articles, columns=['date', 'title', 'content', 'sentiment'])
+
+    # Fixing the timezone format if necessary('+00:0' -> '+00:00') and validating the whole timestamp
+    timestamps = raw['date'].astype(str).str.replace(r'\+00:0$', '+00:00', regex=True)
+    valid = pd.to_datetime(timestamps, utc=True, errors='coerce', format='ISO8601').notna()
+
+    # 'sentiment' value should not be None(unless it's scored later)
+    if not keep_unscored:
+        valid &= raw['sentiment'].notna()
+
+    raw = raw[valid.to_numpy()]
+    if raw.empty:
+        return empty_news_frame()
+
+    # The article day and time are taken as published(in the API's own offset)
+    local_timestamps = pd.to_datetime(timestamps[valid].str.slice(0, 19), format='ISO8601', errors='coerce')
+    news_frame = pd.DataFrame({
+        'date': local_timestamps.dt.normalize().to_numpy(),
+        'published_at': local_timestamps.to_numpy(),
+        'title': raw['title'].to_numpy(),
+        'content': raw['content'].to_numpy()
+    })
+    # A missing sentiment becomes a row of NaN scores
+    sentiments = [sentiment if isinstance(sentiment, dict) else {} for sentiment in raw['sentiment'].tolist()]
+    scores = pd.DataFrame.from_records(sentiments, columns=SENTIMENT_SCORE_COLUMNS)
+    for column in SENTIMENT_SCORE_COLUMNS:
+        news_frame[column] = scores[column].to_numpy(dtype=np.float64)
+
+    return news_frame
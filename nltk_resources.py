@@ -0,0 +1,57 @@
+import threading
+
+# NLTK resources used by the project and their location in the NLTK data directories
+NLTK_RESOURCE_PATHS = {
+    'stopwords': 'corpora/stopwords',
+    'punkt_tab': 'tokenizers/punkt_tab',
+    'wordnet': 'corpora/wordnet',
+    'vader_lexicon': 'sentiment/vader_lexicon.zip'
+}
+
+# Resources already found(or downloaded) in this process
+_available_resources = set()
+_resources_lock = threading.Lock()
+
+def is_nltk_resource_installed(name):
+    """
+    @Args:- name:- str object containing a key of NLTK_RESOURCE_PATHS
+    @Description:-
+                This method looks the resource up in the local NLTK data directories only(no network access),
+                as a directory or as the zip archive the downloader leaves
+    @Returns:- bool object
+    """
+    from nltk.data import find
+
+    path = NLTK_RESOURCE_PATHS[name]
+    for candidate in (path, path if path.endswith('.zip') else f"{path}.zip"):
+        try:
+            find(candidate)
+            return True
+        except LookupError:
+            pass
+
+    return False
+
+def ensure_nltk_resource(name):
+    """
+    @Args:- name:- str object containing a key of NLTK_RESOURCE_PATHS
+    @Description:-
+                This method makes sure the resource is installed, downloading it only when the local lookup
+                fails. The result is remembered, so later calls cost a set lookup.
+    @Returns:-
+    """
+    if name in _available_resources:
+        return
+
+    with _resources_lock:
+        if name in _available_resources:
+            return
+
+        if not is_nltk_resource_installed(name):
+            import nltk
+
+            if not nltk.download(name, quiet=True) or not is_nltk_resource_installed(name):
+                raise LookupError(f"NLTK resource '{name}' is not installed and couldn't be downloaded "
+                                  f"(run: python -m nltk.downloader {name})")
+
+        _available_resources.add(name)
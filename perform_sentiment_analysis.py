@@ -1,32 +1,22 @@
-import nltk
-from nltk.sentiment import SentimentIntensityAnalyzer
+import numpy as np
+import pandas as pd
+from instrumentation import timed
+from news_frame import SENTIMENT_SCORE_COLUMNS
 
-# Using the pre-trained VADER model for sentiment analysis
-nltk.download('vader_lexicon')
-
-# Add an empty sentiments_list to store('neg', 'neu', ;pos')
-sentiments_list = []
-
-# Sentiment Intensity Analyzer
-sia = SentimentIntensityAnalyzer()
+# Columns of the sentiments frame returned by get_sentiments_list
+SENTIMENT_COLUMNS = ['compound', 'neg', 'neu', 'pos']
 
+@timed
 def get_sentiments_list(sentiment_description_list):
     """
-    @Args:- sentiment_description_list:- list object containing various sentiment descriptions
+    @Args:- sentiment_description_list:- dataframe object containing the news frame(see news_frame.NEWS_COLUMNS)
     @Description:-
-                This method performs sentiment analysis on each description in the sentiment_description_list
-    @Returns:- sentiments_list:- list object containing sentiment of each description
+                This method takes the sentiment columns of the news frame as they are(the API
+                polarity is the compound score), without any per-article conversion
+    @Returns:- sentiments_list:- dataframe object containing sentiment('compound', 'neg', 'neu', 'pos') of each description
     """
 
-    for description in sentiment_description_list:
-
-        combined_score = {
-            'compound':description['sentiment']['polarity'],
-            'neg':description['sentiment']['neg'],
-            'neu':description['sentiment']['neu'],
-            'pos':description['sentiment']['pos']
-        }
-
-        sentiments_list.append(combined_score)
-
-    return sentiments_list
\ No newline at end of file
+    return pd.DataFrame({
+        column: sentiment_description_list[source_column].to_numpy(dtype=np.float64)
+        for column, source_column in zip(SENTIMENT_COLUMNS, SENTIMENT_SCORE_COLUMNS)
+    })
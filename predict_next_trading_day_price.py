@@ -1,70 +1,67 @@
-import requests
-import os
+from datetime import datetime
 import numpy as np
 import pandas as pd
-from dotenv import load_dotenv
-
-# Load environment variables from .env file
-load_dotenv()
-
-# Accessing the API key and URL
-api_key = os.getenv('EOD_API_TOKEN')
-api_url = os.getenv('EOD_API_URL')
-
-
-def fetch_news_sentiment(ticker, date):
+from data_sources import get_data_source
+from feature_store import get_latest_technical_features, MODEL_FEATURE_COLUMNS
+from instrumentation import timed
+from sentiment_index import get_latest_sentiment_index
+from trading_calendar import get_trading_calendar, MARKET_TIMEZONE
+
+@timed
+def fetch_news_sentiment(ticker, date, end_date=None):
     """
     Fetches news sentiment data for the given ticker symbol from EODHD API.
 
     @Args:
     - ticker: Stock ticker symbol (e.g., 'AAPL')
     - date: Date in 'YYYY-MM-DD' format for which to fetch sentiment data.
+    - end_date: Optional last date in 'YYYY-MM-DD' format, the news of [date, end_date] is then averaged.
 
     @Returns:
-    - latest_sentiment: dict containing average 'neg', 'neu', 'pos' sentiment scores.
+    - latest_sentiment: dict containing average 'neg', 'neu', 'pos', 'polarity' sentiment scores and the 'article_count'.
     """
 
-    url = f"{api_url}?s={ticker.upper()}&from={date}&to={date}&limit=100&api_token={api_key}&fmt=json"
-
-    response = requests.get(url)
-
-    if response.status_code == 200:
-        news_data = response.json()
-        print(news_data)
+    # Same data source(and shared async HTTP client) as fetch_sentiment_data
+    status_code, news_data = get_data_source().fetch_news(ticker, date, end_date or date, 100)
 
+    if status_code == 200:
         # Check if the news_data is empty
         if not news_data or not isinstance(news_data, list) or len(news_data) == 0:
-            print(f"No news data available for {ticker} on {date}. Returning default values.")
-            return {'neg': 0, 'neu': 0, 'pos': 0}  # Default values if no data is available
+            print(f"No news data available for {ticker} on {date}{f' to {end_date}' if end_date else ''}. Returning default values.")
+            return {'neg': 0, 'neu': 0, 'pos': 0, 'polarity': 0, 'article_count': 0}  # Default values if no data is available
 
         # Initialize sums and counts for averaging
-        total_neg = total_neu = total_pos = 0
+        total_neg = total_neu = total_pos = total_polarity = 0
         count = len(news_data)
 
         # Aggregate sentiment scores from all news items
         for item in news_data:
-            sentiment = item.get('sentiment', {})
+            sentiment = item.get('sentiment') or {}
             total_neg += sentiment.get('neg', 0)
             total_neu += sentiment.get('neu', 0)
             total_pos += sentiment.get('pos', 0)
+            total_polarity += sentiment.get('polarity', 0)
 
         # Calculate average sentiment scores
         return {
             'neg': total_neg / count,
             'neu': total_neu / count,
-            'pos': total_pos / count
+            'pos': total_pos / count,
+            'polarity': total_polarity / count,
+            'article_count': count
         }
 
     print(f"Failed to fetch news sentiment for {ticker} on {date}. Returning default values.")
-    return {'neg': 0, 'neu': 0, 'pos': 0}  # Default values if fetching fails or no data is available
+    return {'neg': 0, 'neu': 0, 'pos': 0, 'polarity': 0, 'article_count': 0}  # Default values if fetching fails or no data is available
 
+@timed
 def predict_next_trading_day_price(combined_data, model, ticker, imputer, scaler):
     """
     Predicts the next trading day's stock price using the trained model and latest data.
 
     @Args:
     - combined_data: DataFrame containing stock and sentiment data up to previous trading day.
-    - model: Trained RidgeCV model.
+    - model: Trained RidgePathRegressor model.
     - ticker: Stock ticker symbol to fetch new sentiment data.
     - imputer: Fitted SimpleImputer instance(same imputer used in training).
     - scaler: Fitted StandardScaler instance(same sclaer used in training).
@@ -76,52 +73,29 @@ def predict_next_trading_day_price(combined_data, model, ticker, imputer, scaler
     # Ensure combined_data is sorted by date and contains no NaN values
     combined_data = combined_data.dropna(subset=['Close', 'High', 'Low', 'Volume', 'neg', 'neu', 'pos'])
 
-    # Fetch new sentiment data for today's date(US time zone)
-    today_date = (pd.to_datetime("now").tz_localize('US/Eastern').strftime('%Y-%m-%d'))
-    print("Today's Date in US:", today_date)
-    latest_sentiment = fetch_news_sentiment(ticker, today_date)
-
-    # Extract the last row (most recent trading day)
-    latest_data = combined_data.iloc[-1].copy()
-
-    # Prepare features for prediction using fetched sentiments
-    daily_return = (latest_data['Close'] - combined_data['Close'].iloc[-2]) / combined_data['Close'].iloc[-2]
-
-    # Calculate moving averages
-    sma_5 = combined_data['Close'].rolling(window=5).mean().iloc[-1]
-    sma_20 = combined_data['Close'].rolling(window=20).mean().iloc[-1]
-
-    # Calculate RSI (14-day)
-    delta = combined_data['Close'].diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean().iloc[-1]
-    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean().iloc[-1]
-    rs = gain / loss if loss != 0 else 0
-    rsi = 100 - (100 / (1 + rs))
-
-    # Calculate MACD
-    ema_12 = combined_data['Close'].ewm(span=12, adjust=False).mean().iloc[-1]
-    ema_26 = combined_data['Close'].ewm(span=26, adjust=False).mean().iloc[-1]
-    macd = ema_12 - ema_26
-
-    # Calculate ATR (14-day)
-    high_low = combined_data['High'] - combined_data['Low']
-    high_close = abs(combined_data['High'] - combined_data['Close'].shift())
-    low_close = abs(combined_data['Low'] - combined_data['Close'].shift())
-
+    # The predicted session is the one after the last trading day of combined_data. Its features use the
+    # news published since that day, up to today(US time zone), e.g. the weekend's news on a Monday.
+    trading_calendar = get_trading_calendar()
+    last_trading_day = pd.Timestamp(combined_data['Date'].iloc[-1])
+    prediction_date = trading_calendar.next_session(last_trading_day).strftime('%Y-%m-%d')
+    news_start_date = (last_trading_day + pd.Timedelta(days=1)).strftime('%Y-%m-%d')
+    today_date = datetime.now(MARKET_TIMEZONE).strftime('%Y-%m-%d')
 
-    tr = high_low.combine(high_close, max).combine(low_close, max)
-    atr = tr.rolling(window=14).mean().iloc[-1]
+    if news_start_date <= today_date:
+        latest_sentiment = fetch_news_sentiment(ticker, news_start_date, min(today_date, prediction_date))
+    else:
+        latest_sentiment = {'neg': 0, 'neu': 0, 'pos': 0, 'polarity': 0, 'article_count': 0}
 
-    # Calculate average volume over a specified period
-    avg_volume_5 = combined_data['Volume'].rolling(window=5).mean().iloc[-1]
+    # Technical indicators of the most recent trading day(same feature store as the training)
+    latest_features = get_latest_technical_features(combined_data, ticker)
 
-    # Lagged features
-    prev_close = latest_data['Close']
+    # Sentiment index carried over from the last trading day to the predicted session, including the new news
+    latest_sentiment_index = get_latest_sentiment_index(combined_data, prediction_date, latest_sentiment['polarity'],
+                                                        latest_sentiment['article_count'])
 
     # Prepare input feature array for prediction using fetched sentiments
-    X_new = np.array([[latest_sentiment['neg'], latest_sentiment['neu'], latest_sentiment['pos'],
-                       daily_return, sma_5, sma_20, rsi, macd,
-                       atr, avg_volume_5, prev_close]])
+    feature_values = dict(latest_features, **latest_sentiment, **latest_sentiment_index)
+    X_new = np.array([[feature_values[column] for column in MODEL_FEATURE_COLUMNS]])
 
     # Impute missing values using mean strategy (if any remain)
     X_new_imputed = imputer.transform(X_new)
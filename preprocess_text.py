@@ -1,12 +1,64 @@
+import io
+import csv
 import re
-import nltk
-from nltk.corpus import stopwords
-from nltk.stem import WordNetLemmatizer
-from nltk.tokenize import word_tokenize
+from functools import lru_cache
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
+from instrumentation import timed, increment
+from nltk_resources import ensure_nltk_resource
+from article_index import get_article_index, get_content_key
+
+# Maximum number of distinct words whose lemma is memoized
+LEMMA_CACHE_SIZE = 100000
+
+# Number of articles sent to a worker process at a time in process-pool mode
+DEFAULT_CHUNK_SIZE = 64
+
+# Precompiled patterns, applied in the same order as the original five re.sub passes:
+# i. URLs, ii. mentions, hashtags, punctuation and numbers,
+# iii. newlines and the 'Continue reading'/'View comments' phrases(also when split by newlines)
+URL_PATTERN = re.compile(r'http\S+|www\S+|https\S+', flags=re.MULTILINE)
+NON_ALPHA_PATTERN = re.compile(r'\@\w+|[^a-zA-Z\s]')
+NEWLINE_PHRASE_PATTERN = re.compile(r'Continue(?: |\n+)reading|View(?: |\n+)comments|(\n+)')
+
+@lru_cache(maxsize=None)
+def get_text_tools():
+    """
+    @Args:- None
+    @Description:-
+                This method imports NLTK and loads the stop words, the tokenizer and the lemmatizer on first
+                use(once per process, e.g. once per worker), so importing this module stays cheap and offline.
+                The NLTK data is only downloaded when it isn't installed locally.
+    @Returns:- (stop_words, word_tokenize, lemmatizer):- frozenset object(built once instead of once per token),
+               tokenizer function and the WordNetLemmatizer instance shared by every call
+    """
+    for name in ('stopwords', 'punkt_tab', 'wordnet'):
+        ensure_nltk_resource(name)
+
+    from nltk.corpus import stopwords
+    from nltk.stem import WordNetLemmatizer
+    from nltk.tokenize import word_tokenize
+
+    return frozenset(stopwords.words('english')), word_tokenize, WordNetLemmatizer()
+
+@lru_cache(maxsize=LEMMA_CACHE_SIZE)
+def lemmatize(word):
+    """
+    @Args:- word:- str object containing a lowercase token
+    @Description:-
+                This method returns the memoized WordNet lemma of the token
+    @Returns:- lemma:- str object
+    """
+    return get_text_tools()[2].lemmatize(word)
 
-nltk.download('stopwords')
-nltk.download('punkt_tab')
-nltk.download('wordnet')
+def replace_newline_or_phrase(match):
+    """
+    @Args:- match:- re.Match object of NEWLINE_PHRASE_PATTERN
+    @Description:-
+                This method replaces a newline run with a space and removes unwanted phrases
+    @Returns:- replacement:- str object
+    """
+    return ' ' if match.group(1) else ''
 
 def preprocess_text(text):
     """
@@ -16,57 +68,150 @@ def preprocess_text(text):
                 description list
     @Returns:- formatted 'content' text
     """
-    # Remove URLs and special characters
-    text = re.sub(r'http\S+|www\S+|https\S+', '', text, flags=re.MULTILINE)
-    text = re.sub(r'\@\w+|\#', '', text)  # Remove mentions and hashtags
-    text = re.sub(r'[^a-zA-Z\s]', '', text)  # Remove punctuation and numbers
+    # Remove URLs, then mentions, hashtags, punctuation and numbers
+    text = URL_PATTERN.sub('', text)
+    text = NON_ALPHA_PATTERN.sub('', text)
+
+    # Replace newlines with space and remove specific phrases('Continue reading', 'View comments')
+    text = NEWLINE_PHRASE_PATTERN.sub(replace_newline_or_phrase, text)
 
-    # Remove specific unwanted text patterns
-    text = re.sub(r'\n+', ' ', text)  # Replace newlines with space
-    text = re.sub(r'Continue reading|View comments|\.', '', text)  # Remove specific phrases
+    stop_words, word_tokenize, _ = get_text_tools()
 
-    # Convert to lowercase and tokenize
-    tokens = nltk.word_tokenize(text.lower())
+    # Convert to lowercase and tokenize(only letters and whitespace are left, so no sentence splitting is needed)
+    tokens = word_tokenize(text.lower(), preserve_line=True)
 
     # Remove stop words and lemmatize
-    lemmatizer = WordNetLemmatizer()
-    tokens = [lemmatizer.lemmatize(word) for word in tokens if word not in stopwords.words('english')]
+    return ' '.join([lemmatize(word) for word in tokens if word not in stop_words])
 
-    return ' '.join(tokens)
+# Header row of the cleaned contents CSV
+CLEANED_CONTENTS_HEADER = ["Date", "Title", "Content", "polarity", "neg", "neu", "pos"]
 
-import csv
+def iter_cleaned_contents(description_list, workers=None, chunk_size=DEFAULT_CHUNK_SIZE, use_index=True):
+    """
+    @Args:
+        description_list: dataframe object containing the news frame(see news_frame.NEWS_COLUMNS)
+        workers: int object containing the number of preprocessing processes(None or 1 runs serially)
+        chunk_size: int object containing the number of articles sent to a worker process at a time
+        use_index: bool object, False preprocesses every article without the shared article index
+    @Description:
+        This generator yields the formatted content of each description, preprocessing the contents
+        batch by batch as they are consumed. With the article index, identical contents(the same article
+        tagged to several tickers or fetched again) share the cleaned text stored in the index, and only
+        the contents never cleaned before are preprocessed.
+    @Returns: generator object of str objects(in row order)
+    """
+    contents = description_list['content'].tolist()
+
+    executor = ProcessPoolExecutor(max_workers=workers) if workers is not None and workers > 1 else None
+
+    with executor or nullcontext():
+        def clean(texts):
+            # executor.map() returns the results in input order, so the output matches serial mode
+            if executor is None:
+                return map(preprocess_text, texts)
+            return executor.map(preprocess_text, texts, chunksize=max(1, chunk_size))
+
+        if not use_index:
+            yield from clean(contents)
+            return
+
+        # The contents are cleaned batch by batch, each distinct content once
+        article_index = get_article_index()
+        content_keys = [get_content_key(content) for content in contents]
+        batch_size = max(1, chunk_size) * max(1, workers or 1)
+
+        for start in range(0, len(contents), batch_size):
+            batch_keys = content_keys[start:start + batch_size]
+            cleaned_texts = article_index.get_cleaned_texts(set(batch_keys))
 
-def write_cleaned_contents_to_file(description_list, filename='cleaned_contents.csv'):
+            # One copy of each content never cleaned before
+            missing = {}
+            for content_key, content in zip(batch_keys, contents[start:start + batch_size]):
+                if content_key not in cleaned_texts and content_key not in missing:
+                    missing[content_key] = content
+
+            if missing:
+                computed = dict(zip(missing, clean(list(missing.values()))))
+                article_index.put_cleaned_texts(computed)
+                cleaned_texts.update(computed)
+                increment('contents_cleaned', len(missing))
+
+            for content_key in batch_keys:
+                yield cleaned_texts[content_key]
+
+        article_index.evict()
+
+def iter_cleaned_content_rows(description_list, workers=None, chunk_size=DEFAULT_CHUNK_SIZE, use_index=True):
     """
     @Args:
-        description_list: list object containing sentiment descriptions
-        filename: str object containing default file name
+        description_list: dataframe object containing the news frame(see news_frame.NEWS_COLUMNS)
+        workers: int object containing the number of preprocessing processes(None or 1 runs serially)
+        chunk_size: int object containing the number of articles sent to a worker process at a time
+        use_index: bool object, False preprocesses every article without the shared article index
     @Description:
-        This method processes each element of description_list and saves it to the specified CSV file.
-    @Returns:
+        This generator yields the header row followed by one cleaned row per description,
+        preprocessing the contents only as their rows are consumed(see iter_cleaned_contents).
+    @Returns: generator object of CSV rows(lists)
     """
+    yield CLEANED_CONTENTS_HEADER
 
-    # Open the file in write mode with utf-8 encoding
-    with open(filename, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
+    # The non-text columns of every row, with the dates formatted in one vectorized pass('23 Aug 2024')
+    dates = description_list['date'].dt.strftime('%d %b %Y')
+    columns = [description_list[column].tolist() for column in ('title', 'polarity', 'neg', 'neu', 'pos')]
+    cleaned_descriptions = iter_cleaned_contents(description_list, workers, chunk_size, use_index)
 
-        # Write the header row
-        writer.writerow(["Date", "Title", "Content", "polarity", "neg", "neu", "pos"])
+    for date, cleaned_description, (title, *scores) in zip(dates, cleaned_descriptions, zip(*columns)):
+        yield [date, title, cleaned_description, *scores]
 
-        required_keys = ['date', 'title', 'content', 'sentiment']
+def write_cleaned_contents(description_list, stream, workers=None, chunk_size=DEFAULT_CHUNK_SIZE, use_index=True):
+    """
+    @Args:
+        description_list: dataframe object containing the news frame(see news_frame.NEWS_COLUMNS)
+        stream: text stream object(opened with newline='') the CSV rows are written to
+        workers: int object containing the number of preprocessing processes(None or 1 runs serially)
+        chunk_size: int object containing the number of articles sent to a worker process at a time
+        use_index: bool object, False preprocesses every article without the shared article index
+    @Description:
+        This method streams the cleaned rows of description_list into stream as CSV.
+    @Returns:
+    """
+    csv.writer(stream).writerows(iter_cleaned_content_rows(description_list, workers, chunk_size, use_index))
 
-        # Iterate through the description list and write each row
-        for description in description_list:
-            # Check if all required keys exist in 'description' and 'sentiment' key is not 'null'
-            if all(key in description for key in required_keys) and description.get('sentiment') is not None:
-                created_at = description['date']
-                title = description['title']
+@timed
+def get_cleaned_contents_csv(description_list, workers=None, chunk_size=DEFAULT_CHUNK_SIZE, use_index=True):
+    """
+    @Args:
+        description_list: dataframe object containing the news frame(see news_frame.NEWS_COLUMNS)
+        workers: int object containing the number of preprocessing processes(None or 1 runs serially)
+        chunk_size: int object containing the number of articles sent to a worker process at a time
+        use_index: bool object, False preprocesses every article without the shared article index
+    @Description:
+        This method builds the cleaned contents CSV in a per-call in-memory buffer, so nothing is
+        written to(or raced on in) the shared working directory.
+    @Returns:
+        bytes object containing the utf-8 encoded CSV(same bytes as write_cleaned_contents_to_file)
+    """
+    buffer = io.StringIO(newline='')
+    write_cleaned_contents(description_list, buffer, workers, chunk_size, use_index)
+    increment('articles_cleaned', len(description_list))
 
-                polarity_value = description['sentiment']['polarity']
-                neg_value = description['sentiment']['neg']
-                neu_value = description['sentiment']['neu']
-                pos_value = description['sentiment']['pos']
+    return buffer.getvalue().encode('utf-8')
 
-                cleaned_description = preprocess_text(description['content'])
+def write_cleaned_contents_to_file(description_list, filename='cleaned_contents.csv', workers=None,
+                                   chunk_size=DEFAULT_CHUNK_SIZE, use_index=True):
+    """
+    @Args:
+        description_list: dataframe object containing the news frame(see news_frame.NEWS_COLUMNS)
+        filename: str object containing default file name
+        workers: int object containing the number of preprocessing processes(None or 1 runs serially)
+        chunk_size: int object containing the number of articles sent to a worker process at a time
+        use_index: bool object, False preprocesses every article without the shared article index
+    @Description:
+        This method processes each element of description_list and saves it to the specified CSV file.
+        The file is byte-identical whether the contents are preprocessed serially or in a process pool.
+    @Returns:
+    """
 
-                writer.writerow([created_at, title, cleaned_description, polarity_value, neg_value, neu_value, pos_value])
\ No newline at end of file
+    # Open the file in write mode with utf-8 encoding
+    with open(filename, 'w', newline='', encoding='utf-8') as f:
+        write_cleaned_contents(description_list, f, workers, chunk_size, use_index)
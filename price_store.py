@@ -0,0 +1,208 @@
+import os
+import sqlite3
+import threading
+import pandas as pd
+from data_sources import get_data_source, flatten_price_columns
+from instrumentation import timed, increment
+from trading_calendar import get_trading_calendar
+
+# Default location of the local market data store
+DEFAULT_STORE_PATH = os.path.join('.cache', 'market_data.sqlite')
+
+# Columns kept for every daily bar
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+class PriceStore:
+    """
+    Local, append-only store of daily OHLCV bars per ticker.
+
+    Bars live in a SQLite table clustered on (ticker, date). Only the bars after the last
+    stored date(top-up) or before the first requested date(backfill, recorded in a coverage
+    table) are ever requested from the data source(yfinance by default).
+    """
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        """
+        @Args:- path:- str object containing the SQLite file path
+        @Description:-
+                    This method opens(or creates) the store
+        @Returns:-
+        """
+        self.path = path
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._connection.executescript("""
+            CREATE TABLE IF NOT EXISTS prices (
+                ticker TEXT NOT NULL,
+                date TEXT NOT NULL,
+                open REAL, high REAL, low REAL, close REAL, volume REAL,
+                PRIMARY KEY (ticker, date)
+            ) WITHOUT ROWID;
+
+            CREATE TABLE IF NOT EXISTS price_coverage (
+                ticker TEXT PRIMARY KEY,
+                start_date TEXT NOT NULL
+            );
+        """)
+        self._connection.commit()
+
+    def _download(self, ticker, start, end):
+        # yfinance's end date is exclusive
+        stock_data = get_data_source().download_prices(ticker, start, end)
+
+        # Single-ticker downloads may still come with a (Price, Ticker) column MultiIndex
+        return flatten_price_columns(stock_data)
+
+    def _insert(self, ticker, stock_data):
+        if stock_data.empty:
+            return
+
+        rows = [
+            (ticker, date.strftime('%Y-%m-%d'), *(None if pd.isna(value) else float(value) for value in values))
+            for date, values in zip(stock_data.index, stock_data.reindex(columns=PRICE_COLUMNS).itertuples(index=False, name=None))
+        ]
+        self._connection.executemany("INSERT OR REPLACE INTO prices VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def _covered_start(self, ticker):
+        row = self._connection.execute(
+            "SELECT start_date FROM price_coverage WHERE ticker = ?", (ticker,)).fetchone()
+        return None if row is None else row[0]
+
+    def _last_date(self, ticker):
+        return self._connection.execute(
+            "SELECT MAX(date) FROM prices WHERE ticker = ?", (ticker,)).fetchone()[0]
+
+    @timed(name='price_store_update')
+    def update(self, ticker, start, end):
+        """
+        @Args:- ticker:- str object containing the ticker name,
+                start:- str object containing the first date('YYYY-MM-DD'),
+                end:- str object containing the exclusive end date('YYYY-MM-DD')
+        @Description:-
+                    This method makes sure the bars of [start, end) are stored, downloading only the
+                    missing part(backfill before the first requested date, top-up after the last stored bar)
+                    and only when that part contains a trading session
+        @Returns:- downloaded:- int object containing the number of bars downloaded
+        """
+        ticker = ticker.upper()
+        downloaded = 0
+
+        # Range before the covered start(the whole request for a new ticker) that widens the coverage
+        backfill_range = None
+
+        with self._lock:
+            covered_start = self._covered_start(ticker)
+            last_date = self._last_date(ticker)
+
+            if covered_start is None or last_date is None:
+                backfill_range = (start, end)
+                missing_ranges = [backfill_range]
+            else:
+                missing_ranges = []
+                if start < covered_start:
+                    backfill_range = (start, covered_start)
+                    missing_ranges.append(backfill_range)
+
+                # The top-up starts at the next session after the last stored bar(not the next calendar day)
+                top_up_start = get_trading_calendar().next_session(last_date).strftime('%Y-%m-%d')
+                if top_up_start < end:
+                    missing_ranges.append((top_up_start, end))
+
+        # Ranges without any session(weekends, holidays) have no bars:- nothing is requested for them
+        missing_ranges = [(range_start, range_end) for range_start, range_end in missing_ranges
+                          if len(get_trading_calendar().sessions_in_range(range_start, range_end)) > 0]
+
+        # Download outside the lock so that other tickers aren't blocked(re-inserting the same bars is harmless)
+        downloads = {missing_range: self._download(ticker, *missing_range) for missing_range in missing_ranges}
+
+        # The coverage only widens once the backfill returned bars(a failed or empty download is retried next
+        # time), or when the backfill range has no session at all
+        widen_coverage = backfill_range is not None and (backfill_range not in downloads or
+                                                         not downloads[backfill_range].empty)
+
+        if widen_coverage or downloads:
+            with self._lock:
+                for stock_data in downloads.values():
+                    self._insert(ticker, stock_data)
+                    downloaded += len(stock_data)
+                increment('price_bars_downloaded', downloaded)
+
+                if widen_coverage:
+                    self._connection.execute(
+                        "INSERT INTO price_coverage VALUES (?, ?) "
+                        "ON CONFLICT(ticker) DO UPDATE SET start_date = MIN(start_date, excluded.start_date)",
+                        (ticker, start))
+                self._connection.commit()
+
+        return downloaded
+
+    def get_prices(self, ticker, start, end):
+        """
+        @Args:- ticker:- str object containing the ticker name,
+                start:- str object containing the first date('YYYY-MM-DD'),
+                end:- str object containing the exclusive end date('YYYY-MM-DD')
+        @Description:-
+                    This method returns the daily bars of [start, end), topping the store up first
+        @Returns:- stock_data:- dataframe object indexed by 'Date' with the columns Open, High, Low, Close, Volume
+        """
+        self.update(ticker, start, end)
+
+        with self._lock:
+            stock_data = pd.read_sql_query(
+                "SELECT date AS Date, open AS Open, high AS High, low AS Low, close AS Close, volume AS Volume "
+                "FROM prices WHERE ticker = ? AND date >= ? AND date < ? ORDER BY date",
+                self._connection, params=(ticker.upper(), start, end), parse_dates=['Date'])
+
+        return stock_data.set_index('Date')
+
+    def latest_close(self, ticker, on_or_before=None):
+        """
+        @Args:- ticker:- str object containing the ticker name,
+                on_or_before:- str object(or datetime) of the latest date to consider(None means any date)
+        @Description:-
+                    This method looks up the most recent stored close with one index seek
+        @Returns:- (close, date):- float object and 'YYYY-MM-DD' str object, (None, None) if nothing is stored
+        """
+        on_or_before = '9999-12-31' if on_or_before is None else pd.Timestamp(on_or_before).strftime('%Y-%m-%d')
+
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT close, date FROM prices WHERE ticker = ? AND date <= ? AND close IS NOT NULL "
+                "ORDER BY date DESC LIMIT 1", (ticker.upper(), on_or_before)).fetchone()
+
+        return (None, None) if row is None else (row[0], row[1])
+
+    def last_stored_date(self, ticker):
+        """
+        @Args:- ticker:- str object containing the ticker name
+        @Description:-
+                    This method returns the date of the last stored bar
+        @Returns:- date:- 'YYYY-MM-DD' str object or None if nothing is stored
+        """
+        with self._lock:
+            return self._last_date(ticker.upper())
+
+# Shared store instance (created lazily on first use)
+_price_store = None
+_price_store_lock = threading.Lock()
+
+def get_price_store():
+    """
+    @Args:- None
+    @Description:-
+                This method returns the process-wide PriceStore instance
+    @Returns:- price_store:- PriceStore object
+    """
+    global _price_store
+
+    if _price_store is None:
+        with _price_store_lock:
+            if _price_store is None:
+                _price_store = PriceStore()
+
+    return _price_store
@@ -0,0 +1,109 @@
+"""
+Local stand-in for the EOD news API that replays recorded(or synthetic) fixtures.
+
+Usage:- python replay_server.py --fixtures fixtures --port 8765 --latency 0.05 --jitter 0.02 --error-rate 0.01
+        then point the app at it with EOD_API_URL=http://127.0.0.1:8765/news
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from data_sources import RecordedDataSource, DEFAULT_FIXTURES_DIR
+
+# Status codes returned for injected failures
+INJECTED_ERROR_STATUS_CODES = (429, 500, 503)
+
+def make_replay_handler(data_source, latency=0.0, jitter=0.0, error_rate=0.0, seed=None):
+    """
+    @Args:- data_source:- RecordedDataSource object serving the fixtures,
+            latency:- float object containing the base response delay in seconds,
+            jitter:- float object containing the maximum random delay added to latency in seconds,
+            error_rate:- float object containing the probability of answering with an injected error,
+            seed:- int object seeding the latency/error random generator(None for a random seed)
+    @Description:-
+                This method builds the request handler class of the replay server
+    @Returns:- handler class(subclass of BaseHTTPRequestHandler)
+    """
+    rng = random.Random(seed)
+    rng_lock = threading.Lock()
+
+    class ReplayHandler(BaseHTTPRequestHandler):
+        # Keep-alive connections, like the real API
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            query = parse_qs(urlparse(self.path).query)
+            with rng_lock:
+                delay = latency + rng.random() * jitter
+                failed = rng.random() < error_rate
+                error_status_code = rng.choice(INJECTED_ERROR_STATUS_CODES)
+
+            time.sleep(delay)
+
+            if failed:
+                status_code, body = error_status_code, {'error': 'injected failure'}
+            elif 's' not in query:
+                status_code, body = 422, {'error': "missing parameter 's'"}
+            else:
+                ticker = query['s'][0].split('.')[0]
+                status_code, body = data_source.fetch_news(
+                    ticker, query.get('from', [''])[0], query.get('to', [''])[0], int(query.get('limit', ['50'])[0]))
+
+            payload = json.dumps(body).encode('utf-8')
+            self.send_response(status_code)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            # Silence the per-request logging of the base class
+            pass
+
+    return ReplayHandler
+
+def start_replay_server(fixtures_dir=DEFAULT_FIXTURES_DIR, host='127.0.0.1', port=0, latency=0.0, jitter=0.0,
+                        error_rate=0.0, seed=None):
+    """
+    @Args:- fixtures_dir:- str object containing the fixtures directory,
+            host:- str object containing the interface to bind,
+            port:- int object containing the port to bind(0 picks a free port),
+            latency, jitter, error_rate, seed:- see make_replay_handler
+    @Description:-
+                This method starts the replay server in a background thread
+    @Returns:- (server, url):- ThreadingHTTPServer object(call shutdown() to stop it) and the base url
+                               to use as EOD_API_URL
+    """
+    handler = make_replay_handler(RecordedDataSource(fixtures_dir), latency, jitter, error_rate, seed)
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    return server, f"http://{host}:{server.server_address[1]}/news"
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded EOD news API responses locally")
+    parser.add_argument('--fixtures', default=DEFAULT_FIXTURES_DIR, help="fixtures directory")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help="base response delay in seconds")
+    parser.add_argument('--jitter', type=float, default=0.0, help="maximum random extra delay in seconds")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="probability of an injected 429/5xx")
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    handler = make_replay_handler(RecordedDataSource(args.fixtures), args.latency, args.jitter, args.error_rate, args.seed)
+    server = ThreadingHTTPServer((args.host, args.port), handler)
+    print(f"Replaying {args.fixtures} on http://{args.host}:{args.port}/news")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == '__main__':
+    main()
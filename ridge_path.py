@@ -0,0 +1,149 @@
+import numpy as np
+
+# Ridge penalties evaluated by the training(1e-3 ... 1e3, includes the former fixed alpha of 1.0)
+DEFAULT_ALPHAS = np.logspace(-3, 3, 13)
+
+# Number of cross validation folds(consecutive blocks, like cross_val_score(cv=5))
+DEFAULT_CV_FOLDS = 5
+
+def solve_ridge_path(gram, cross, alphas):
+    """
+    @Args:- gram:- float array(p x p) containing the centered Gram matrix Xc'Xc,
+            cross:- float array(p) containing the centered cross products Xc'yc,
+            alphas:- float array of the ridge penalties
+    @Description:-
+                This method decomposes the Gram matrix once and solves the ridge problem of every alpha from
+                its eigenvalues:- w(alpha) = V diag(1 / (lambda + alpha)) V' Xc'yc
+    @Returns:- (eigenvalues, eigenvectors, coefficients):- float arrays(p, p x p and len(alphas) x p)
+    """
+    eigenvalues, eigenvectors = np.linalg.eigh(gram)
+    eigenvalues = np.maximum(eigenvalues, 0)
+
+    projected_cross = eigenvectors.T @ cross
+    coefficients = (projected_cross / (eigenvalues + alphas[:, None])) @ eigenvectors.T
+
+    return eigenvalues, eigenvectors, coefficients
+
+def leave_one_out_errors(X_centered, y_centered, eigenvalues, eigenvectors, coefficients, alphas):
+    """
+    @Args:- X_centered:- float array(n x p) of the centered features, y_centered:- float array(n) of the centered targets,
+            eigenvalues, eigenvectors, coefficients:- values returned by solve_ridge_path, alphas:- float array
+    @Description:-
+                This method computes the exact leave-one-out mean squared error of every alpha without refitting,
+                from the residuals and the diagonal of the hat matrix(the intercept's 1/n included)
+    @Returns:- mean_squared_errors:- float array(len(alphas))
+    """
+    n_samples = len(y_centered)
+
+    # Hat matrix diagonal of every alpha:- h_ii = 1/n + sum_k (x_i . v_k)^2 / (lambda_k + alpha)
+    projections = (X_centered @ eigenvectors) ** 2
+    leverages = 1 / n_samples + projections @ (1 / (eigenvalues[:, None] + alphas[None, :]))
+
+    residuals = y_centered[:, None] - X_centered @ coefficients.T
+    loo_residuals = residuals / (1 - leverages)
+
+    return (loo_residuals ** 2).mean(axis=0)
+
+class RidgePathRegressor:
+    """
+    Ridge regression over a grid of alphas, the alpha being chosen by exact leave-one-out error.
+
+    The Gram matrix is decomposed once per fit, so fitting and selecting among any number of
+    alphas costs about the same as a single ridge fit.
+    """
+
+    def __init__(self, alphas=DEFAULT_ALPHAS):
+        """
+        @Args:- alphas:- float array(or scalar) of the ridge penalties to choose from
+        @Description:-
+                    This method creates an unfitted model
+        @Returns:-
+        """
+        self.alphas = np.atleast_1d(np.asarray(alphas, dtype=np.float64))
+
+    def fit(self, X, y):
+        """
+        @Args:- X:- float array(n x p) of the features, y:- float array(n) of the targets
+        @Description:-
+                    This method fits the ridge path and keeps the alpha with the lowest leave-one-out error
+        @Returns:- self(with alpha_, coef_, intercept_ and loo_mse_ set)
+        """
+        X = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+
+        mean_x = X.mean(axis=0)
+        mean_y = y.mean()
+        X_centered = X - mean_x
+        y_centered = y - mean_y
+
+        eigenvalues, eigenvectors, coefficients = solve_ridge_path(X_centered.T @ X_centered, X_centered.T @ y_centered,
+                                                                   self.alphas)
+        self.loo_mse_ = leave_one_out_errors(X_centered, y_centered, eigenvalues, eigenvectors, coefficients, self.alphas)
+
+        best = int(np.argmin(self.loo_mse_))
+        self.alpha_ = float(self.alphas[best])
+        self.coef_ = coefficients[best]
+        self.intercept_ = float(mean_y - mean_x @ self.coef_)
+
+        return self
+
+    def predict(self, X):
+        """
+        @Args:- X:- float array(n x p) of the features
+        @Description:-
+                    This method predicts the targets with the selected alpha
+        @Returns:- float array(n) of the predictions
+        """
+        return np.asarray(X, dtype=np.float64) @ self.coef_ + self.intercept_
+
+def ridge_path_cross_val_score(X, y, alphas=DEFAULT_ALPHAS, cv=DEFAULT_CV_FOLDS):
+    """
+    @Args:- X:- float array(n x p) of the features, y:- float array(n) of the targets,
+            alphas:- float array of the ridge penalties, cv:- int object containing the number of folds
+    @Description:-
+                This method scores RidgePathRegressor on consecutive K folds(same folds as
+                cross_val_score(cv=cv)). The training Gram matrix and sums of each fold are the full-data ones
+                downdated by the fold's rows, so they are never recomputed. The nested alpha selection still
+                goes over every training row of the fold(the leave-one-out residuals and leverages).
+    @Returns:- r2_scores:- float array(cv) containing the R-squared of each held-out fold
+    """
+    X = np.asarray(X, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    alphas = np.atleast_1d(np.asarray(alphas, dtype=np.float64))
+
+    # Full-data sufficient statistics(centered on the full means for conditioning)
+    full_mean_x = X.mean(axis=0)
+    full_mean_y = y.mean()
+    X_shifted = X - full_mean_x
+    y_shifted = y - full_mean_y
+    full_gram = X_shifted.T @ X_shifted
+    full_cross = X_shifted.T @ y_shifted
+
+    r2_scores = np.empty(cv)
+
+    for fold, test_index in enumerate(np.array_split(np.arange(len(y)), cv)):
+        X_test, y_test = X_shifted[test_index], y_shifted[test_index]
+        train_mask = np.ones(len(y), dtype=bool)
+        train_mask[test_index] = False
+        n_train = len(y) - len(test_index)
+
+        # Downdate the full statistics by the held-out rows, then center on the training means
+        train_sum_x = -X_test.sum(axis=0)
+        train_sum_y = -y_test.sum()
+        train_mean_x = train_sum_x / n_train
+        train_mean_y = train_sum_y / n_train
+        gram = full_gram - X_test.T @ X_test - n_train * np.outer(train_mean_x, train_mean_x)
+        cross = full_cross - X_test.T @ y_test - n_train * train_mean_x * train_mean_y
+
+        eigenvalues, eigenvectors, coefficients = solve_ridge_path(gram, cross, alphas)
+
+        # Nested alpha selection by leave-one-out on the training rows(like RidgeCV inside cross_val_score)
+        loo_mse = leave_one_out_errors(X_shifted[train_mask] - train_mean_x, y_shifted[train_mask] - train_mean_y,
+                                       eigenvalues, eigenvectors, coefficients, alphas)
+        coefficient = coefficients[int(np.argmin(loo_mse))]
+
+        predictions = train_mean_y + (X_test - train_mean_x) @ coefficient
+        total = ((y_test - y_test.mean()) ** 2).sum()
+        r2_scores[fold] = 1 - ((y_test - predictions) ** 2).sum() / total if total > 0 else 0.0
+
+    return r2_scores
@@ -0,0 +1,367 @@
+import os
+import sqlite3
+import threading
+import numpy as np
+import pandas as pd
+from price_store import DEFAULT_STORE_PATH
+
+# Half-life(calendar days) of the sentiment carried over to the following days
+SENTIMENT_INDEX_HALF_LIFE_DAYS = 5
+
+# Daily decay factor of the sentiment index
+SENTIMENT_INDEX_DECAY = 0.5 ** (1 / SENTIMENT_INDEX_HALF_LIFE_DAYS)
+
+# Version of the index formula, stored rows computed with another version(or half-life) are rebuilt
+SENTIMENT_INDEX_VERSION = 2
+
+# Columns the sentiment index adds to the combined data
+SENTIMENT_INDEX_COLUMNS = ['sentiment_index', 'news_intensity']
+
+# Daily aggregates an index row is computed from, stored with it to detect days whose news changed
+SENTIMENT_INDEX_INPUT_COLUMNS = ['polarity', 'article_count']
+
+def get_open_news_day(now=None):
+    """
+    @Args:- now:- pd.Timestamp object(defaults to the current time)
+    @Description:-
+                This method returns the first news day that may still receive articles:- the current UTC
+                day(the news days are UTC publication days)
+    @Returns:- open_day:- datetime64 object(day resolution)
+    """
+    now = pd.Timestamp.now(tz='UTC') if now is None else pd.Timestamp(now)
+    if now.tzinfo is not None:
+        now = now.tz_convert('UTC').tz_localize(None)
+
+    return np.datetime64(now.normalize(), 'D')
+
+class SentimentIndexState:
+    """
+    Exponentially decayed sentiment level of one ticker as of a given day.
+
+    Every calendar day decays the level towards neutral(factor decay) and each day with news adds
+    (1 - decay) times that day's mean polarity, so news of a constant polarity every day keeps the
+    level at that polarity. news_intensity does the same with the article count. One update is O(1),
+    so new days never require replaying the history.
+    """
+
+    __slots__ = ('date', 'level', 'intensity')
+
+    def __init__(self, date=None, level=0.0, intensity=0.0):
+        """
+        @Args:- date:- datetime64 object of the day the state is positioned on(None before any news),
+                level:- float object containing the sentiment index,
+                intensity:- float object containing the news intensity
+        @Description:-
+                    This method creates a state
+        @Returns:-
+        """
+        self.date = None if date is None else np.datetime64(date, 'D')
+        self.level = level
+        self.intensity = intensity
+
+    def decayed_to(self, date):
+        """
+        @Args:- date:- datetime64 object(or str) of a day on or after self.date
+        @Description:-
+                    This method returns the (sentiment_index, news_intensity) carried over to date
+        @Returns:- (level, intensity):- float objects
+        """
+        if self.date is None:
+            return 0.0, 0.0
+
+        decay = SENTIMENT_INDEX_DECAY ** max(int((np.datetime64(date, 'D') - self.date) / np.timedelta64(1, 'D')), 0)
+        return self.level * decay, self.intensity * decay
+
+    def update(self, date, polarity, article_count):
+        """
+        @Args:- date:- datetime64 object(or str) of a day after self.date,
+                polarity:- float object containing the mean polarity of the day's articles,
+                article_count:- int object containing the number of articles of the day
+        @Description:-
+                    This method decays the state to date(once per calendar day since self.date) and adds
+                    the day's news
+        @Returns:-
+        """
+        level, intensity = self.decayed_to(date)
+        self.date = np.datetime64(date, 'D')
+        self.level = level + (1 - SENTIMENT_INDEX_DECAY) * polarity
+        self.intensity = intensity + (1 - SENTIMENT_INDEX_DECAY) * article_count
+
+def compute_sentiment_index_rows(daily_sentiment, state=None):
+    """
+    @Args:- daily_sentiment:- dataframe object returned by aggregate_daily_sentiment(sorted by day),
+            state:- SentimentIndexState object to continue from(None starts from neutral), updated in place
+    @Description:-
+                This method applies the days of daily_sentiment after state.date to the state
+    @Returns:- index_rows:- dataframe object indexed by the news days('date') with the SENTIMENT_INDEX_COLUMNS
+                           values right after each day's news and the SENTIMENT_INDEX_INPUT_COLUMNS they come from
+    """
+    state = state or SentimentIndexState()
+    days = daily_sentiment.index.to_numpy(dtype='datetime64[D]')
+
+    if state.date is not None:
+        new_days = days > state.date
+        daily_sentiment, days = daily_sentiment[new_days], days[new_days]
+
+    polarities = daily_sentiment['polarity'].to_numpy(dtype=np.float64)
+    article_counts = daily_sentiment['article_count'].to_numpy(dtype=np.int64)
+
+    levels = np.empty(len(days))
+    intensities = np.empty(len(days))
+    for i, (day, polarity, article_count) in enumerate(zip(days, polarities, article_counts)):
+        state.update(day, polarity, article_count)
+        levels[i], intensities[i] = state.level, state.intensity
+
+    return pd.DataFrame({'sentiment_index': levels, 'news_intensity': intensities, 'polarity': polarities,
+                         'article_count': article_counts}, index=pd.DatetimeIndex(days, name='date'))
+
+def find_first_changed_day(stored_inputs, daily_sentiment):
+    """
+    @Args:- stored_inputs:- dataframe object indexed by the stored news days with the SENTIMENT_INDEX_INPUT_COLUMNS,
+            daily_sentiment:- dataframe object returned by aggregate_daily_sentiment(sorted by day)
+    @Description:-
+                This method compares the stored daily aggregates with the current ones:- a day that is new,
+                gone, or whose polarity or article count changed(e.g. late articles, a month window fetched
+                after failing, articles scored or merged differently) invalidates the stored rows from that day on
+    @Returns:- first_changed_day:- datetime64 object(day resolution) or None if nothing changed
+    """
+    stored_days = stored_inputs.index.to_numpy(dtype='datetime64[D]')
+    days = daily_sentiment.index.to_numpy(dtype='datetime64[D]')
+
+    changed = np.setxor1d(stored_days, days)
+
+    common, stored_positions, positions = np.intersect1d(stored_days, days, return_indices=True)
+    differs = ((stored_inputs['article_count'].to_numpy()[stored_positions]
+                != daily_sentiment['article_count'].to_numpy()[positions]) |
+               ~np.isclose(stored_inputs['polarity'].to_numpy(dtype=np.float64)[stored_positions],
+                           daily_sentiment['polarity'].to_numpy(dtype=np.float64)[positions], rtol=0, atol=1e-12))
+    changed = np.concatenate([changed, common[differs]])
+
+    return changed.min() if len(changed) else None
+
+def get_sentiment_index_at(index_rows, trading_days):
+    """
+    @Args:- index_rows:- dataframe object returned by compute_sentiment_index_rows(or SentimentIndexStore.get_rows),
+            trading_days:- DatetimeIndex object(sorted) of the days to look the index up on
+    @Description:-
+                This method carries the latest index row on or before each trading day over to it(as-of lookup
+                followed by the decay of the days in between), so days without news keep a sentiment value
+    @Returns:- sentiment_index:- dataframe object indexed like trading_days with the SENTIMENT_INDEX_COLUMNS
+    """
+    sentiment_index = pd.DataFrame(0.0, index=trading_days, columns=SENTIMENT_INDEX_COLUMNS)
+    if index_rows.empty or len(trading_days) == 0:
+        return sentiment_index
+
+    days = trading_days.to_numpy(dtype='datetime64[D]')
+    row_days = index_rows.index.to_numpy(dtype='datetime64[D]')
+
+    # Position of the last index row on or before each trading day(-1 before the first news)
+    positions = np.searchsorted(row_days, days, side='right') - 1
+    known = positions >= 0
+    positions = positions[known]
+
+    decay = SENTIMENT_INDEX_DECAY ** ((days[known] - row_days[positions]) / np.timedelta64(1, 'D'))
+    for column in SENTIMENT_INDEX_COLUMNS:
+        values = np.zeros(len(days))
+        values[known] = index_rows[column].to_numpy()[positions] * decay
+        sentiment_index[column] = values
+
+    return sentiment_index
+
+def get_latest_sentiment_index(combined_data, date, polarity=0.0, article_count=0):
+    """
+    @Args:- combined_data:- dataframe object containing 'Date' and the SENTIMENT_INDEX_COLUMNS(sorted by date),
+            date:- str object(or datetime64) of the day to predict on, after the last row of combined_data,
+            polarity:- float object containing the mean polarity of that day's articles so far,
+            article_count:- int object containing the number of that day's articles so far
+    @Description:-
+                This method carries the index of the last row of combined_data over to date and adds
+                that day's news(O(1), nothing is replayed)
+    @Returns:- latest_sentiment_index:- dict object containing the SENTIMENT_INDEX_COLUMNS values
+    """
+    last_row = combined_data.iloc[-1]
+    state = SentimentIndexState(last_row['Date'], last_row['sentiment_index'], last_row['news_intensity'])
+
+    if article_count > 0:
+        state.update(date, polarity, article_count)
+        level, intensity = state.level, state.intensity
+    else:
+        level, intensity = state.decayed_to(date)
+
+    return {'sentiment_index': level, 'news_intensity': intensity}
+
+class SentimentIndexStore:
+    """
+    Store of the sentiment index rows of every ticker, kept in the market data SQLite file next to
+    the price bars. Each row keeps the daily aggregates it was computed from:- an update only recomputes
+    from the first day whose aggregates changed, continuing from the stored state of the day before.
+    Days that may still receive articles are never stored.
+    """
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        """
+        @Args:- path:- str object containing the SQLite file path(the price store's by default)
+        @Description:-
+                    This method opens(or creates) the store
+        @Returns:-
+        """
+        self.path = path
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._connection.executescript("""
+            CREATE TABLE IF NOT EXISTS sentiment_index (
+                ticker TEXT NOT NULL,
+                date TEXT NOT NULL,
+                sentiment_index REAL NOT NULL,
+                news_intensity REAL NOT NULL,
+                polarity REAL,
+                article_count INTEGER,
+                PRIMARY KEY (ticker, date)
+            ) WITHOUT ROWID;
+        """)
+
+        # Rows stored before the daily aggregates were kept get NULL aggregates, which count as changed days
+        columns = {row[1] for row in self._connection.execute("PRAGMA table_info(sentiment_index)")}
+        for column, kind in (('polarity', 'REAL'), ('article_count', 'INTEGER')):
+            if column not in columns:
+                self._connection.execute(f"ALTER TABLE sentiment_index ADD COLUMN {column} {kind}")
+
+        # Rows computed by another version of the formula or with another half-life are dropped(rebuilt on update)
+        formula = f"{SENTIMENT_INDEX_VERSION}:{SENTIMENT_INDEX_HALF_LIFE_DAYS}"
+        self._connection.execute("CREATE TABLE IF NOT EXISTS sentiment_index_meta (key TEXT PRIMARY KEY, value TEXT)")
+        row = self._connection.execute("SELECT value FROM sentiment_index_meta WHERE key = 'formula'").fetchone()
+        if row is None or row[0] != formula:
+            self._connection.execute("DELETE FROM sentiment_index")
+            self._connection.execute("INSERT OR REPLACE INTO sentiment_index_meta VALUES ('formula', ?)", (formula,))
+        self._connection.commit()
+
+    def _latest(self, ticker, before=None):
+        if before is None:
+            row = self._connection.execute(
+                "SELECT date, sentiment_index, news_intensity FROM sentiment_index WHERE ticker = ? "
+                "ORDER BY date DESC LIMIT 1", (ticker,)).fetchone()
+        else:
+            row = self._connection.execute(
+                "SELECT date, sentiment_index, news_intensity FROM sentiment_index WHERE ticker = ? AND date < ? "
+                "ORDER BY date DESC LIMIT 1", (ticker, before)).fetchone()
+        return SentimentIndexState() if row is None else SentimentIndexState(*row)
+
+    def latest(self, ticker):
+        """
+        @Args:- ticker:- str object containing the ticker name
+        @Description:-
+                    This method reads the state after the last stored news day with one index seek
+        @Returns:- state:- SentimentIndexState object(neutral with date None if nothing is stored)
+        """
+        with self._lock:
+            return self._latest(ticker.upper())
+
+    def update(self, ticker, daily_sentiment, open_day=None):
+        """
+        @Args:- ticker:- str object containing the ticker name,
+                daily_sentiment:- dataframe object returned by aggregate_daily_sentiment,
+                open_day:- datetime64 object of the first day that may still receive articles
+                           (defaults to get_open_news_day()), it and later days aren't stored
+        @Description:-
+                    This method finds the first closed day whose aggregates are new or changed, drops the
+                    stored rows from that day on and recomputes them from the stored state of the day
+                    before, instead of recomputing the whole history
+        @Returns:- written:- int object containing the number of news days(re)computed
+        """
+        ticker = ticker.upper()
+        open_day = get_open_news_day() if open_day is None else np.datetime64(open_day, 'D')
+        daily_sentiment = daily_sentiment[daily_sentiment.index.to_numpy(dtype='datetime64[D]') < open_day]
+
+        with self._lock:
+            stored_inputs = pd.read_sql_query(
+                "SELECT date, polarity, article_count FROM sentiment_index WHERE ticker = ? ORDER BY date",
+                self._connection, params=(ticker,), parse_dates=['date']).set_index('date')
+
+            first_changed_day = find_first_changed_day(stored_inputs, daily_sentiment)
+            if first_changed_day is None:
+                return 0
+
+            first_changed = str(first_changed_day)
+            self._connection.execute(
+                "DELETE FROM sentiment_index WHERE ticker = ? AND date >= ?", (ticker, first_changed))
+            index_rows = compute_sentiment_index_rows(daily_sentiment, self._latest(ticker, before=first_changed))
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO sentiment_index VALUES (?, ?, ?, ?, ?, ?)",
+                [(ticker, day.strftime('%Y-%m-%d'), level, intensity, polarity, int(article_count))
+                 for day, level, intensity, polarity, article_count in zip(
+                     index_rows.index, index_rows['sentiment_index'], index_rows['news_intensity'],
+                     index_rows['polarity'], index_rows['article_count'])])
+            self._connection.commit()
+
+        return len(index_rows)
+
+    def get_index_rows(self, ticker, daily_sentiment, open_day=None):
+        """
+        @Args:- ticker, daily_sentiment, open_day:- see update
+        @Description:-
+                    This method updates the stored rows and adds the rows of the still-open days, computed
+                    in memory from the last stored state(never stored, they're recomputed on every call)
+        @Returns:- (index_rows, written):- dataframe object like get_rows covering every day of daily_sentiment
+                                          and int object returned by update
+        """
+        written = self.update(ticker, daily_sentiment, open_day)
+        index_rows = self.get_rows(ticker)
+        open_rows = compute_sentiment_index_rows(daily_sentiment, self.latest(ticker))
+        if not open_rows.empty:
+            index_rows = open_rows if index_rows.empty else pd.concat([index_rows, open_rows])
+
+        return index_rows, written
+
+    def get_rows(self, ticker):
+        """
+        @Args:- ticker:- str object containing the ticker name
+        @Description:-
+                    This method reads the stored index rows of a ticker
+        @Returns:- index_rows:- dataframe object indexed by the news days('date') with the SENTIMENT_INDEX_COLUMNS
+                               and the SENTIMENT_INDEX_INPUT_COLUMNS
+        """
+        with self._lock:
+            index_rows = pd.read_sql_query(
+                "SELECT date, sentiment_index, news_intensity, polarity, article_count FROM sentiment_index "
+                "WHERE ticker = ? ORDER BY date", self._connection, params=(ticker.upper(),), parse_dates=['date'])
+
+        return index_rows.set_index('date')
+
+    def clear(self, ticker=None):
+        """
+        @Args:- ticker:- str object containing the ticker name(None clears every ticker)
+        @Description:-
+                    This method deletes stored index rows, e.g. before rebuilding with another half-life
+        @Returns:-
+        """
+        with self._lock:
+            if ticker is None:
+                self._connection.execute("DELETE FROM sentiment_index")
+            else:
+                self._connection.execute("DELETE FROM sentiment_index WHERE ticker = ?", (ticker.upper(),))
+            self._connection.commit()
+
+# Shared store instance (created lazily on first use)
+_sentiment_index_store = None
+_sentiment_index_store_lock = threading.Lock()
+
+def get_sentiment_index_store():
+    """
+    @Args:- None
+    @Description:-
+                This method returns the process-wide SentimentIndexStore instance
+    @Returns:- sentiment_index_store:- SentimentIndexStore object
+    """
+    global _sentiment_index_store
+
+    if _sentiment_index_store is None:
+        with _sentiment_index_store_lock:
+            if _sentiment_index_store is None:
+                _sentiment_index_store = SentimentIndexStore()
+
+    return _sentiment_index_store
@@ -1,7 +1,11 @@
-import yfinance as yf
-from datetime import datetime, timedelta
+from datetime import timedelta
+from price_store import get_price_store
+from data_sources import get_data_source
+from instrumentation import timed
+from trading_calendar import get_trading_calendar
 
 # Function to get company name from ticker
+@timed
 def get_company_name(ticker_name):
     """
     @Args:- ticker_name:- str object containing the ticker name
@@ -9,8 +13,7 @@ def get_company_name(ticker_name):
                 This method gets the company name corresponding to a ticker name
     @Returns:- longName:- str object containing company name
     """
-    stock = yf.Ticker(ticker_name)
-    company_name = stock.info.get('longName')
+    company_name = get_data_source().get_company_info(ticker_name).get('longName')
 
     if not company_name:
         raise ValueError("Company name not found for the given ticker.")
@@ -18,6 +21,7 @@ def get_company_name(ticker_name):
     return company_name
 
 # Step 1.1: Gather Stock Price Data
+@timed
 def get_stock_data_and_rows(ticker_name):
     """
     @Args:- ticker_name:- str object that contains the stock ticker name
@@ -29,12 +33,14 @@ def get_stock_data_and_rows(ticker_name):
                 company_name:- str object containing the company name from ticker name
     """
 
-    # Format the last trading date(upto yesterday or previous day) date as 'yyyy-mm-dd'
-    yesterday_date = datetime.today() - timedelta(days=1)
-    formatted_date = yesterday_date.strftime('%Y-%m-%d')
+    # Exclusive end date('yyyy-mm-dd') of the bars:- the day after the last completed session(the last
+    # trading day whose bar is final), so nothing is requested for days the market hasn't closed on
+    last_session = get_trading_calendar().last_completed_session()
+    formatted_date = (last_session + timedelta(days=1)).strftime('%Y-%m-%d')
 
-    # Download stock data(Start from 2024-01-01) upto last trading day(yesterday)
-    stock_data = yf.download(ticker_name, start='2024-01-01', end=formatted_date)
+    # Get stock data(Start from 2024-01-01) upto the last completed trading day from the local price store,
+    # which only downloads the bars after the last stored date
+    stock_data = get_price_store().get_prices(ticker_name, start='2024-01-01', end=formatted_date)
 
     # Getting the total number of rows present in stock_data
     total_rows = stock_data.shape[0]  # or use len(stock_data)
@@ -1,17 +1,21 @@
 import streamlit as st
-import plotly.graph_objects as go
+from instrumentation import timed
 
-def plot_stock_price_and_predictions(combined_data):
+@timed
+def build_stock_price_figure(combined_data):
     """
-    Plots the stock price over time and highlights the predicted movements interactively in Streamlit.
+    Builds the figure of the stock price over time with the predicted movements highlighted.
 
     @Args:
     - combined_data: DataFrame containing 'Date', 'Close', and 'target' columns.
 
     @Returns:
-    - None: Displays the interactive plot in Streamlit.
+    - fig: plotly Figure object.
     """
 
+    # plotly is imported on first use, not when the app starts
+    import plotly.graph_objects as go
+
     # Create a figure
     fig = go.Figure()
 
@@ -47,5 +51,21 @@ def plot_stock_price_and_predictions(combined_data):
         template='plotly_white'
     )
 
+    return fig
+
+def plot_stock_price_and_predictions(combined_data, fig=None):
+    """
+    Plots the stock price over time and highlights the predicted movements interactively in Streamlit.
+
+    @Args:
+    - combined_data: DataFrame containing 'Date', 'Close', and 'target' columns.
+    - fig: Optional prebuilt figure(e.g. from a cache) returned by build_stock_price_figure.
+
+    @Returns:
+    - None: Displays the interactive plot in Streamlit.
+    """
+    if fig is None:
+        fig = build_stock_price_figure(combined_data)
+
     # Display the interactive plot in Streamlit
     st.plotly_chart(fig, use_container_width=True)
\ No newline at end of file
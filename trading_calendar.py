@@ -0,0 +1,254 @@
+import threading
+from datetime import date, datetime, time, timedelta
+import numpy as np
+import pandas as pd
+import pytz
+
+# Exchange timezone and regular trading hours(NYSE)
+MARKET_TIMEZONE = pytz.timezone("US/Eastern")
+MARKET_OPEN_TIME = time(9, 30)
+MARKET_CLOSE_TIME = time(16, 0)
+
+# Close of the shortened sessions(day before Independence Day, day after Thanksgiving, Christmas Eve)
+EARLY_CLOSE_TIME = time(13, 0)
+
+# Years precomputed by the calendar
+CALENDAR_FIRST_YEAR = 1990
+CALENDAR_LAST_YEAR = 2100
+
+# Unscheduled full-day closures(national days of mourning, weather, 9/11)
+SPECIAL_CLOSURES = [
+    '1994-04-27',                                              # Richard Nixon's funeral
+    '2001-09-11', '2001-09-12', '2001-09-13', '2001-09-14',   # September 11 attacks
+    '2004-06-11',                                              # Ronald Reagan's funeral
+    '2007-01-02',                                              # Gerald Ford's funeral
+    '2012-10-29', '2012-10-30',                                # Hurricane Sandy
+    '2018-12-05',                                              # George H. W. Bush's funeral
+    '2025-01-09',                                              # Jimmy Carter's funeral
+]
+
+def get_easter_sunday(year):
+    """
+    @Args:- year:- int object containing the year
+    @Description:-
+                This method computes Western Easter Sunday with the anonymous Gregorian computus
+    @Returns:- easter_sunday:- date object
+    """
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+
+    return date(year, month, day + 1)
+
+def _nth_weekday(year, month, weekday, n):
+    # n-th(1-based, -1 for the last) given weekday(Monday=0) of a month
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+
+    last = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+def _observed(holiday):
+    # Saturday holidays are observed on Friday, Sunday holidays on Monday
+    if holiday.weekday() == 5:
+        return holiday - timedelta(days=1)
+    if holiday.weekday() == 6:
+        return holiday + timedelta(days=1)
+    return holiday
+
+def get_nyse_holidays(year):
+    """
+    @Args:- year:- int object containing the year
+    @Description:-
+                This method lists the regular NYSE full-day holidays of a year(as observed)
+    @Returns:- holidays:- list object containing date objects
+    """
+    holidays = []
+
+    # New Year's Day(a Saturday New Year's Day is not observed on the Friday before)
+    new_years_day = date(year, 1, 1)
+    if new_years_day.weekday() != 5:
+        holidays.append(_observed(new_years_day))
+
+    if year >= 1998:
+        holidays.append(_nth_weekday(year, 1, 0, 3))        # Martin Luther King Jr. Day
+    holidays.append(_nth_weekday(year, 2, 0, 3))            # Washington's Birthday
+    holidays.append(get_easter_sunday(year) - timedelta(days=2))  # Good Friday
+    holidays.append(_nth_weekday(year, 5, 0, -1))           # Memorial Day
+    if year >= 2022:
+        holidays.append(_observed(date(year, 6, 19)))       # Juneteenth
+    holidays.append(_observed(date(year, 7, 4)))            # Independence Day
+    holidays.append(_nth_weekday(year, 9, 0, 1))            # Labor Day
+    holidays.append(_nth_weekday(year, 11, 3, 4))           # Thanksgiving Day
+    holidays.append(_observed(date(year, 12, 25)))          # Christmas Day
+
+    return holidays
+
+def get_nyse_early_closes(year):
+    """
+    @Args:- year:- int object containing the year
+    @Description:-
+                This method lists the NYSE sessions closing at EARLY_CLOSE_TIME in a year
+    @Returns:- early_closes:- list object containing date objects
+    """
+    early_closes = [_nth_weekday(year, 11, 3, 4) + timedelta(days=1)]  # Day after Thanksgiving
+
+    # Day before Independence Day and Christmas Eve, unless they are weekends or observed holidays(Fridays)
+    for early_close in (date(year, 7, 3), date(year, 12, 24)):
+        if early_close.weekday() < 4:
+            early_closes.append(early_close)
+
+    return sorted(early_closes)
+
+def _to_day(day):
+    # Calendar day of a date-like value(str, date, datetime, Timestamp or datetime64); aware values keep their own date
+    if isinstance(day, (datetime, pd.Timestamp)):
+        day = day.date()
+    return np.datetime64(day, 'D')
+
+class TradingCalendar:
+    """
+    NYSE sessions, holidays and early closes precomputed for [first_year, last_year].
+
+    Sessions are a sorted datetime64[D] array plus a per-day bitmap, so "is session" is a single
+    lookup and the previous/next session is a binary search.
+    """
+
+    def __init__(self, first_year=CALENDAR_FIRST_YEAR, last_year=CALENDAR_LAST_YEAR):
+        """
+        @Args:- first_year, last_year:- int objects containing the first and last precomputed years
+        @Description:-
+                    This method precomputes the sessions of the calendar
+        @Returns:-
+        """
+        self.first_day = np.datetime64(f"{first_year}-01-01", 'D')
+        self.last_day = np.datetime64(f"{last_year}-12-31", 'D')
+
+        holidays = [holiday for year in range(first_year, last_year + 1) for holiday in get_nyse_holidays(year)]
+        holidays = np.unique(np.array(holidays + SPECIAL_CLOSURES, dtype='datetime64[D]'))
+        self.holidays = holidays[(holidays >= self.first_day) & (holidays <= self.last_day)]
+
+        days = np.arange(self.first_day, self.last_day + 1)
+        self._session_bitmap = np.is_busday(days, holidays=self.holidays)
+        self.sessions = days[self._session_bitmap]
+
+        early_closes = np.array([early_close for year in range(first_year, last_year + 1)
+                                 for early_close in get_nyse_early_closes(year)], dtype='datetime64[D]')
+        self.early_closes = early_closes[self._session_bitmap[(early_closes - self.first_day).astype(np.int64)]]
+
+    def _check_range(self, day):
+        if not self.first_day <= day <= self.last_day:
+            raise ValueError(f"{day} is outside the trading calendar({self.first_day} to {self.last_day})")
+
+    def is_session(self, day):
+        """
+        @Args:- day:- date-like object(str, date, datetime, Timestamp or datetime64)
+        @Description:-
+                    This method checks whether the exchange trades on day
+        @Returns:- bool object
+        """
+        day = _to_day(day)
+        self._check_range(day)
+        return bool(self._session_bitmap[(day - self.first_day).astype(np.int64)])
+
+    def previous_session(self, day, inclusive=False):
+        """
+        @Args:- day:- date-like object,
+                inclusive:- bool object, day itself is returned when it is a session
+        @Description:-
+                    This method finds the last session before(or on) day
+        @Returns:- session:- Timestamp object(midnight, timezone-naive)
+        """
+        day = _to_day(day)
+        self._check_range(day)
+        position = np.searchsorted(self.sessions, day, side='right' if inclusive else 'left') - 1
+        if position < 0:
+            raise ValueError(f"No session before {day} in the trading calendar")
+        return pd.Timestamp(self.sessions[position])
+
+    def next_session(self, day, inclusive=False):
+        """
+        @Args:- day:- date-like object,
+                inclusive:- bool object, day itself is returned when it is a session
+        @Description:-
+                    This method finds the first session after(or on) day
+        @Returns:- session:- Timestamp object(midnight, timezone-naive)
+        """
+        day = _to_day(day)
+        self._check_range(day)
+        position = np.searchsorted(self.sessions, day, side='left' if inclusive else 'right')
+        if position == len(self.sessions):
+            raise ValueError(f"No session after {day} in the trading calendar")
+        return pd.Timestamp(self.sessions[position])
+
+    def sessions_in_range(self, start, end):
+        """
+        @Args:- start:- date-like object of the first day, end:- date-like object of the exclusive end day
+        @Description:-
+                    This method slices the sessions of [start, end)
+        @Returns:- sessions:- DatetimeIndex object
+        """
+        first, last = np.searchsorted(self.sessions, [_to_day(start), _to_day(end)])
+        return pd.DatetimeIndex(self.sessions[first:last])
+
+    def close_time(self, day):
+        """
+        @Args:- day:- date-like object of a session
+        @Description:-
+                    This method returns the closing time of a session(EARLY_CLOSE_TIME on shortened sessions)
+        @Returns:- close_time:- time object(exchange timezone)
+        """
+        day = _to_day(day)
+        position = np.searchsorted(self.early_closes, day)
+        is_early_close = position < len(self.early_closes) and self.early_closes[position] == day
+        return EARLY_CLOSE_TIME if is_early_close else MARKET_CLOSE_TIME
+
+    def is_open(self, now=None):
+        """
+        @Args:- now:- timezone-aware datetime object(defaults to the current time)
+        @Description:-
+                    This method checks whether the exchange is in its regular trading hours at now
+        @Returns:- bool object
+        """
+        now = (now or datetime.now(MARKET_TIMEZONE)).astimezone(MARKET_TIMEZONE)
+        return self.is_session(now) and MARKET_OPEN_TIME <= now.time() < self.close_time(now)
+
+    def last_completed_session(self, now=None):
+        """
+        @Args:- now:- timezone-aware datetime object(defaults to the current time)
+        @Description:-
+                    This method finds the latest session whose daily bar is final:- today once the market
+                    has closed, the previous session otherwise(before the open, intraday or on closed days)
+        @Returns:- session:- Timestamp object(midnight, timezone-naive)
+        """
+        now = (now or datetime.now(MARKET_TIMEZONE)).astimezone(MARKET_TIMEZONE)
+        is_closed_session = self.is_session(now) and now.time() >= self.close_time(now)
+        return self.previous_session(now, inclusive=is_closed_session)
+
+# Shared calendar instance (created lazily on first use)
+_trading_calendar = None
+_trading_calendar_lock = threading.Lock()
+
+def get_trading_calendar():
+    """
+    @Args:- None
+    @Description:-
+                This method returns the process-wide TradingCalendar instance
+    @Returns:- trading_calendar:- TradingCalendar object
+    """
+    global _trading_calendar
+
+    if _trading_calendar is None:
+        with _trading_calendar_lock:
+            if _trading_calendar is None:
+                _trading_calendar = TradingCalendar()
+
+    return _trading_calendar
@@ -1,9 +1,39 @@
-from sklearn.model_selection import train_test_split, cross_val_score
+from sklearn.model_selection import train_test_split
 from sklearn.impute import SimpleImputer
 from sklearn.preprocessing import StandardScaler
-from sklearn.linear_model import RidgeCV
 from sklearn.metrics import mean_absolute_error, r2_score
+from model_store import get_model_store, get_training_data_hash
+from feature_store import compute_technical_features, TECHNICAL_FEATURE_COLUMNS, MODEL_FEATURE_COLUMNS
+from instrumentation import timed, increment
+from ridge_path import RidgePathRegressor, ridge_path_cross_val_score, DEFAULT_ALPHAS, DEFAULT_CV_FOLDS
 
+@timed
+def prepare_training_data(combined_data):
+    """
+    @Args:- combined_data:- dataframe object that contains the columns of both stock data and sentiment data
+                            (Date, Close, High, Low, Volume, date, neg, neu, pos)
+    @Description:-
+                This method calculates the technical features and the target variable(next day's close)
+                of combined_data in place
+    @Returns:- combined_data:- dataframe object containing transformed combined data
+    """
+
+    # Feature engineering(all technical indicators in one pass, shared with the prediction)
+    combined_data[TECHNICAL_FEATURE_COLUMNS] = compute_technical_features(combined_data)
+
+    # Prepare target variable
+    combined_data['target'] = combined_data['Close'].shift(-1)
+
+    # Drop NaN values created by rolling calculations
+    # Fill NaN values using forward fill method to retain the last row of data
+    combined_data.ffill(inplace=True)
+
+    # Drop rows where target is NaN (the last row will have NaN target after shifting)
+    combined_data.dropna(subset=['target'], inplace=True)
+
+    return combined_data
+
+@timed
 def get_model_metrics_and_train_model(combined_data):
     """
     @Args:- combined_data:- dataframe object that contains the columns of both stock data and sentiment data
@@ -13,8 +43,10 @@ def get_model_metrics_and_train_model(combined_data):
                 i. calculates new features,
                 ii. prepares feature and target variables
                 iii. Scales and normalizes feature variable values
-                iv. Uses RidgeCV model to train the model with training data
-                v. Calculates metrics(Cross Validation-R2, R2, MAE)
+                iv. Trains a ridge model on the training data, choosing its alpha among DEFAULT_ALPHAS by
+                    leave-one-out error from a single decomposition of the Gram matrix
+                v. Calculates metrics(Cross Validation-R2, R2, MAE), the folds being scored from the
+                   downdated full-data Gram matrix instead of refitting
     @Returns:- cv_scores, mae, r2 - float model metrics
                 imputer:- imputer that replaces missing values with the mean of the column
                 scaler:- scaler used to normalize the features of the dataset
@@ -22,52 +54,12 @@ def get_model_metrics_and_train_model(combined_data):
                 model:- model instance used to train
     """
 
-    # Feature engineering
-    # Calculate daily returns
-    combined_data['daily_return'] = combined_data['Close'].pct_change()
-
-    # Calculate moving averages
-    combined_data['SMA_5'] = combined_data['Close'].rolling(window=5).mean()
-    combined_data['SMA_20'] = combined_data['Close'].rolling(window=20).mean()
-
-    # Calculate RSI (14-day)
-    delta = combined_data['Close'].diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-    rs = gain / loss
-    combined_data['RSI'] = 100 - (100 / (1 + rs))
-
-    # Calculate MACD
-    ema_12 = combined_data['Close'].ewm(span=12, adjust=False).mean()
-    ema_26 = combined_data['Close'].ewm(span=26, adjust=False).mean()
-    combined_data['MACD'] = ema_12 - ema_26
-
-    # Calculate ATR (14-day)
-    high_low = combined_data['High'] - combined_data['Low']
-    high_close = abs(combined_data['High'] - combined_data['Close'].shift())
-    low_close = abs(combined_data['Low'] - combined_data['Close'].shift())
-    tr = high_low.combine(high_close, max).combine(low_close, max)
-    combined_data['ATR'] = tr.rolling(window=14).mean()
-
-    # Calculate average volume over a specified period
-    combined_data['avg_volume_5'] = combined_data['Volume'].rolling(window=5).mean()
-
-    # Lagged features
-    combined_data['prev_close'] = combined_data['Close'].shift(1)
-
-    # Prepare target variable
-    combined_data['target'] = combined_data['Close'].shift(-1)
-
-    # Drop NaN values created by rolling calculations
-    # Fill NaN values using forward fill method to retain the last row of data
-    combined_data.fillna(method='ffill', inplace=True)
-
-    # Drop rows where target is NaN (the last row will have NaN target after shifting)
-    combined_data.dropna(subset=['target'], inplace=True)
-    print(combined_data)
+    # Calculate features and the target variable
+    combined_data = prepare_training_data(combined_data)
+    increment('training_rows', len(combined_data))
 
     # Prepare features and target variable
-    X = combined_data[['neg', 'neu', 'pos', 'daily_return', 'SMA_5', 'SMA_20', 'RSI', 'MACD', 'ATR', 'avg_volume_5', 'prev_close']]
+    X = combined_data[MODEL_FEATURE_COLUMNS]
     y = combined_data['target']
 
     # Impute missing values using mean strategy (if any remain)
@@ -82,15 +74,13 @@ def get_model_metrics_and_train_model(combined_data):
     X_train, X_test, y_train, y_test = train_test_split(X_scaled, y, test_size=0.2, random_state=42)
 
     # Use Linear Regression - method that studies the relationship between two variables and is used to predict the value of one variable wrt another.
-    # Train Ridge Regression model with cross-validation for hyperparameter tuning
-    model = RidgeCV(alphas=1.0)
-
-    # Fit model using pipeline
+    # Train Ridge Regression model, the whole alpha grid is tuned by leave-one-out from one decomposition
+    model = RidgePathRegressor(alphas=DEFAULT_ALPHAS)
     model.fit(X_train, y_train)
 
     # Evaluate the model using cross-validation on the entire dataset for R-squared
     # Cross validated R-square:- is a statistical measure that rates the model against new or unseen data
-    cv_scores = cross_val_score(model, X_scaled, y, cv=5)
+    cv_scores = ridge_path_cross_val_score(X_scaled, y, alphas=DEFAULT_ALPHAS, cv=DEFAULT_CV_FOLDS)
     print(f"Cross-validated R-squared: {cv_scores.mean():.2f}")
 
     # Evaluate the model on the test set
@@ -108,4 +98,39 @@ def get_model_metrics_and_train_model(combined_data):
     print(f"Mean Absolute Error: {mae:.2f}")
     print(f"R-squared: {r2:.2f}")
 
-    return cv_scores.mean(), mae, r2, imputer, scaler, combined_data, model
\ No newline at end of file
+    return cv_scores.mean(), mae, r2, imputer, scaler, combined_data, model
+
+@timed
+def load_or_train_model(combined_data, ticker, model_store=None):
+    """
+    @Args:- combined_data:- dataframe object that contains the columns of both stock data and sentiment data
+                            (Date, Close, High, Low, Volume, date, neg, neu, pos),
+            ticker:- str object containing the ticker name,
+            model_store:- ModelStore object(defaults to the shared model store)
+    @Description:-
+                This method reuses the artifacts fitted on exactly the same combined_data(same ticker and
+                data hash) from the model store. Only when nothing matches, e.g. after new trading days
+                arrived, the model is retrained and its artifacts stored.
+    @Returns:- same values as get_model_metrics_and_train_model
+    """
+    model_store = model_store or get_model_store()
+
+    # Hash the data before the feature engineering transforms it
+    data_hash = get_training_data_hash(combined_data)
+    artifacts = model_store.load(ticker, data_hash)
+
+    increment('model_store_misses' if artifacts is None else 'model_store_hits')
+
+    if artifacts is None:
+        cv_scores, mae, r2, imputer, scaler, combined_data, model = get_model_metrics_and_train_model(combined_data)
+        model_store.save(ticker, data_hash, {
+            'cv_scores': cv_scores, 'mae': mae, 'r2': r2,
+            'imputer': imputer, 'scaler': scaler, 'model': model
+        })
+        return cv_scores, mae, r2, imputer, scaler, combined_data, model
+
+    # Warm path:- only the (cheap) features are recomputed for the prediction and the plot
+    combined_data = prepare_training_data(combined_data)
+
+    return (artifacts['cv_scores'], artifacts['mae'], artifacts['r2'], artifacts['imputer'],
+            artifacts['scaler'], combined_data, artifacts['model'])